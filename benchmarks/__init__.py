@@ -0,0 +1,3 @@
+"""
+Benchmarks and load-testing tools; nothing here is imported by the service.
+"""
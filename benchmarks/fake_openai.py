@@ -0,0 +1,287 @@
+"""
+Local stand-in for the OpenAI chat completions and embeddings API.
+
+Speaks the request and response shapes ``ChatOpenAI`` and
+``OpenAIEmbeddings`` use, so the whole service can run offline by pointing
+``OPENAI_API_BASE`` at it:
+
+    python -m benchmarks.fake_openai --port 8100 --chat-latency lognormal:800:0.4 --rate-limit-rate 0.02
+    OPENAI_API_BASE=http://127.0.0.1:8100/v1 OPENAI_API_KEY=sk-fake uvicorn main:app
+
+Replies are deterministic functions of the request: embeddings come from
+``HashingEmbeddings`` and chat replies are well-formed ``Score:`` /
+``Rationale:`` lines (or a JSON profile for the resume profiler) with a
+score derived from the word overlap of the resume and job description.
+Latency, server errors and 429 rate limits are drawn from a seeded
+random generator.
+
+``OpenAIEmbeddings`` tokenizes its input with tiktoken before sending it,
+so fully offline runs need tiktoken's BPE file cached (``TIKTOKEN_CACHE_DIR``);
+otherwise use ``EMBEDDING_BACKEND=local`` and fake only the chat model.
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import math
+import random
+import re
+import socket
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from services.embeddings import HashingEmbeddings
+from services.tokens import count_tokens, decode_tokens
+
+_WORD_RE = re.compile(r"[a-z][a-z0-9+#.]{2,}")
+_STOPWORDS = {
+    "about", "all", "and", "are", "but", "can", "for", "from", "has", "have", "our", "that", "the",
+    "their", "this", "will", "with", "you", "your", "who", "what", "which", "between", "into", "must"
+}
+
+@dataclass
+class LatencyModel:
+    """
+    Latency distribution in milliseconds, parsed from specs such as
+    ``fixed:50``, ``uniform:20:80`` or ``lognormal:800:0.4`` (median, sigma).
+    """
+    kind: str = "fixed"
+    params: Sequence[float] = (0.0,)
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        kind, *values = spec.split(":")
+        expected = {"fixed": 1, "uniform": 2, "lognormal": 2}
+        if kind not in expected or len(values) != expected[kind]:
+            raise ValueError(f"Invalid latency spec '{spec}', expected fixed:MS, uniform:MIN:MAX or lognormal:MEDIAN:SIGMA")
+        return cls(kind, tuple(float(value) for value in values))
+
+    def sample(self, rng: random.Random) -> float:
+        """Seconds to wait"""
+        if self.kind == "fixed":
+            ms = self.params[0]
+        elif self.kind == "uniform":
+            ms = rng.uniform(*self.params)
+        else:
+            median, sigma = self.params
+            ms = rng.lognormvariate(math.log(max(median, 1e-3)), sigma)
+        return max(ms, 0.0) / 1000
+
+@dataclass
+class FakeUpstreamConfig:
+    """Behaviour of the fake server"""
+    chat_latency: LatencyModel = field(default_factory=lambda: LatencyModel("fixed", (0.0,)))
+    embedding_latency: LatencyModel = field(default_factory=lambda: LatencyModel("fixed", (0.0,)))
+    # Fraction of requests answered with a 500
+    error_rate: float = 0.0
+    # Fraction of requests answered with a 429
+    rate_limit_rate: float = 0.0
+    # Seconds advertised in the Retry-After header of 429s
+    retry_after: float = 1.0
+    embedding_dim: int = 1536
+    seed: int = 0
+
+def _error(status: int, message: str, code: str, headers: Dict[str, str] = None) -> JSONResponse:
+    return JSONResponse(
+        status_code=status,
+        content={"error": {"message": message, "type": code, "param": None, "code": code}},
+        headers=headers
+    )
+
+def _section(text: str, start: str, end: Optional[str] = None) -> str:
+    index = text.find(start)
+    if index < 0:
+        return ""
+    text = text[index + len(start):]
+    if end and end in text:
+        text = text[:text.index(end)]
+    return text
+
+def _words(text: str) -> set:
+    return set(_WORD_RE.findall(text.lower())) - _STOPWORDS
+
+def _fraction(text: str) -> float:
+    """Stable pseudo-random number in [0, 1) derived from text"""
+    return int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16) / 2 ** 32
+
+def chat_reply(messages: List[Dict[str, Any]]) -> str:
+    """Deterministic reply in the format the prompt of ``messages`` asks for"""
+    prompt = "\n".join(str(message.get("content", "")) for message in messages)
+    if "single JSON object" in prompt:
+        return json.dumps({
+            "current_title": "Software Engineer",
+            "roles": [{"title": "Software Engineer", "company": "Example Corp", "start": "2019-01",
+                       "end": "present", "years": 5.0, "managed_people": False}],
+            "total_years": 5.0,
+            "management_years": 0.0,
+            "skills": sorted(_words(_section(prompt, "Resume:")))[:20],
+            "education": []
+        })
+    if "evaluation is complete enough" in prompt:
+        score = 75 + round(_fraction(prompt) * 23)
+        return f"Score: {score}\nRationale: The evaluation covers skills, experience and seniority with concrete evidence."
+
+    resume = _words(_section(prompt, "Candidate Resume:", "Job Description:"))
+    job = _words(_section(prompt, "Job Description:"))
+    overlap = len(resume & job) / len(job) if job else 0.0
+    score = round(35 + 60 * overlap + 5 * _fraction(prompt), 1)
+    matched = ", ".join(sorted(resume & job)[:5]) or "none observed"
+    missing = ", ".join(sorted(job - resume)[:5]) or "none observed"
+    return f"Score: {score}\nRationale: Strengths: {matched}. Gaps: {missing}."
+
+def _embedding_text(item: Union[str, List[int]], model: str) -> str:
+    """OpenAIEmbeddings sends token ids; decode them when a tokenizer is available"""
+    if isinstance(item, str):
+        return item
+    text = decode_tokens(item, model)
+    return text if text is not None else " ".join(str(token) for token in item)
+
+def create_app(config: FakeUpstreamConfig = None) -> FastAPI:
+    """
+    The fake API. ``app.state.requests`` counts requests by endpoint and
+    status so load tests can report what the upstream saw.
+    """
+    config = config or FakeUpstreamConfig()
+    app = FastAPI(title="Fake OpenAI API")
+    embeddings = HashingEmbeddings(dim=config.embedding_dim)
+    rng = random.Random(config.seed)
+    lock = threading.Lock()
+    app.state.config = config
+    app.state.requests = Counter()
+
+    def fault(endpoint: str, latency: LatencyModel):
+        """Draw the delay and the injected failure, if any, for one request"""
+        with lock:
+            delay = latency.sample(rng)
+            roll = rng.random()
+        if roll < config.rate_limit_rate:
+            app.state.requests[(endpoint, 429)] += 1
+            return delay, _error(429, "Rate limit reached for requests", "rate_limit_exceeded",
+                                 headers={"retry-after": str(config.retry_after)})
+        if roll < config.rate_limit_rate + config.error_rate:
+            app.state.requests[(endpoint, 500)] += 1
+            return delay, _error(500, "The server had an error while processing your request", "server_error")
+        app.state.requests[(endpoint, 200)] += 1
+        return delay, None
+
+    @app.get("/v1/models")
+    async def list_models() -> Dict[str, Any]:
+        return {"object": "list", "data": [
+            {"id": name, "object": "model", "created": 0, "owned_by": "fake"}
+            for name in ("gpt-3.5-turbo", "text-embedding-ada-002")
+        ]}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        delay, failure = fault("chat", config.chat_latency)
+        await asyncio.sleep(delay)
+        if failure is not None:
+            return failure
+        model = body.get("model", "gpt-3.5-turbo")
+        content = chat_reply(body.get("messages", []))
+        prompt_tokens = sum(count_tokens(str(message.get("content", "")), model) + 4 for message in body.get("messages", []))
+        completion_tokens = count_tokens(content, model)
+        return {
+            "id": f"chatcmpl-{hashlib.sha256(content.encode()).hexdigest()[:24]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens}
+        }
+
+    @app.post("/v1/embeddings")
+    async def create_embeddings(request: Request):
+        body = await request.json()
+        delay, failure = fault("embeddings", config.embedding_latency)
+        await asyncio.sleep(delay)
+        if failure is not None:
+            return failure
+        model = body.get("model", "text-embedding-ada-002")
+        items = body.get("input", [])
+        # A single string, a single token list, or a batch of either
+        if isinstance(items, str) or (items and isinstance(items[0], int)):
+            items = [items]
+        texts = [_embedding_text(item, model) for item in items]
+        vectors = embeddings.transform(texts) if texts else np.zeros((0, config.embedding_dim), dtype=np.float32)
+        data = []
+        for index, vector in enumerate(vectors):
+            if body.get("encoding_format") == "base64":
+                embedding = base64.b64encode(vector.astype(np.float32).tobytes()).decode("ascii")
+            else:
+                embedding = vector.tolist()
+            data.append({"object": "embedding", "index": index, "embedding": embedding})
+        tokens = sum(count_tokens(text, model) for text in texts)
+        return {"object": "list", "data": data, "model": model,
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens}}
+
+    return app
+
+def _free_port(host: str) -> int:
+    with socket.socket() as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+@contextmanager
+def serve(config: FakeUpstreamConfig = None, host: str = "127.0.0.1", port: int = None) -> Iterator[str]:
+    """
+    Run the fake server in a background thread, yielding its base URL
+    (ending in ``/v1``) for ``OPENAI_API_BASE``.
+    """
+    import uvicorn
+    port = port or _free_port(host)
+    app = create_app(config)
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning", lifespan="off"))
+    thread = threading.Thread(target=server.run, name="fake-openai", daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if not thread.is_alive() or time.monotonic() > deadline:
+            raise RuntimeError(f"Fake OpenAI server did not start on {host}:{port}")
+        time.sleep(0.01)
+    try:
+        yield f"http://{host}:{port}/v1"
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible chat and embeddings server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--chat-latency", type=LatencyModel.parse, default=LatencyModel(),
+                        help="fixed:MS, uniform:MIN:MAX or lognormal:MEDIAN:SIGMA (default fixed:0)")
+    parser.add_argument("--embedding-latency", type=LatencyModel.parse, default=LatencyModel(),
+                        help="Same format as --chat-latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--embedding-dim", type=int, default=1536)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    import uvicorn
+    config = FakeUpstreamConfig(
+        chat_latency=args.chat_latency,
+        embedding_latency=args.embedding_latency,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        embedding_dim=args.embedding_dim,
+        seed=args.seed
+    )
+    print(f"Fake OpenAI API on http://{args.host}:{args.port}/v1")
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
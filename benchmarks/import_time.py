@@ -0,0 +1,91 @@
+"""
+Measure cold import time of the API and the services package.
+
+Each measurement runs in a fresh interpreter so nothing is cached in
+``sys.modules``. The median ``import main`` time is compared against a
+target and the script exits non-zero when it is exceeded, so it can gate
+CI. ``--profile`` lists the slowest modules from ``python -X importtime``.
+
+    python benchmarks/import_time.py --runs 7 --target 1.0
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Heavy dependencies that must not be loaded by importing the API
+LAZY_MODULES = ("langchain", "langchain_community", "langgraph", "unstructured", "fitz", "docx", "graphviz", "IPython")
+
+_TIMER = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+loaded = [name for name in {lazy!r} if name in sys.modules]
+sys.__stdout__.write(f"{{elapsed}} {{','.join(loaded)}}\\n")
+"""
+
+def _env() -> dict:
+    env = dict(os.environ)
+    # Creating clients needs a key, importing must not
+    env.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    return env
+
+def time_import(module: str) -> Tuple[float, List[str]]:
+    """Seconds to import a module in a fresh interpreter, and the heavy modules it loaded"""
+    output = subprocess.run(
+        [sys.executable, "-c", _TIMER.format(module=module, lazy=LAZY_MODULES)],
+        cwd=ROOT, env=_env(), capture_output=True, text=True, check=True
+    ).stdout.split()
+    return float(output[0]), output[1].split(",") if len(output) > 1 else []
+
+def slowest_modules(module: str, top: int) -> List[Tuple[int, str]]:
+    """(cumulative microseconds, module) of the slowest imports, from -X importtime"""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=_env(), capture_output=True, text=True, check=True
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), name.rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per module")
+    parser.add_argument("--target", type=float, default=1.0, help="Median seconds allowed for 'import main'")
+    parser.add_argument("--profile", type=int, default=0, metavar="N", help="Also list the N slowest imports")
+    args = parser.parse_args()
+
+    failed = False
+    for module in ("services", "main"):
+        timings, loaded = [], set()
+        for _ in range(args.runs):
+            elapsed, heavy = time_import(module)
+            timings.append(elapsed)
+            loaded.update(heavy)
+        median = statistics.median(timings)
+        print(f"import {module:<9} median {median * 1000:7.1f}ms  min {min(timings) * 1000:7.1f}ms  max {max(timings) * 1000:7.1f}ms")
+        if loaded:
+            print(f"  eagerly loaded: {', '.join(sorted(loaded))}")
+            failed = True
+        if module == "main" and median > args.target:
+            print(f"  over the {args.target:.3f}s target")
+            failed = True
+
+    if args.profile:
+        print("\nSlowest imports for 'import main':")
+        for cumulative, name in slowest_modules("main", args.profile):
+            print(f"  {cumulative / 1e6:7.3f}s  {name}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
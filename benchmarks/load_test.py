@@ -0,0 +1,325 @@
+"""
+End-to-end load test of the /score service against the fake upstream.
+
+Drives the FastAPI app in-process (default) or a uvicorn subprocess with
+a document mix drawn from ``samples/``, while ``benchmarks.fake_openai``
+stands in for OpenAI. Requests arrive either open loop (``--rate``,
+Poisson arrivals, latency measured from the scheduled arrival so queueing
+is not hidden) or closed loop (``--concurrency`` callers back to back).
+
+Reports p50/p95/p99 latency, requests/sec, error rate, peak RSS and the
+per-node time breakdown scraped from /metrics, and writes them as JSON
+for run-to-run comparison:
+
+    python -m benchmarks.load_test --requests 200 --concurrency 16 --chat-latency lognormal:400:0.5 \\
+        --output results/load.json --compare results/previous.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import resource
+import subprocess
+import sys
+import time
+from collections import Counter
+from contextlib import ExitStack
+from typing import Any, Dict, List, Optional, Tuple
+import httpx
+from benchmarks.fake_openai import FakeUpstreamConfig, LatencyModel, serve, _free_port
+from services.utils import setup_workflow_logger
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLES = os.path.join(ROOT, "samples")
+
+_SPAN_SAMPLE_RE = re.compile(r'^workflow_span_duration_seconds_(sum|count)\{([^}]*)\} (\S+)$')
+_LABEL_RE = re.compile(r'(\w+)="([^"]*)"')
+
+def default_mix() -> List[Tuple[str, str]]:
+    """Every sample resume paired with every sample job description"""
+    names = sorted(os.listdir(SAMPLES))
+    resumes = [name for name in names if name.startswith("sample_resume")]
+    jobs = [name for name in names if name.startswith("sample_job")]
+    return [(resume, job) for resume in resumes for job in jobs]
+
+def parse_mix(spec: str) -> List[Tuple[str, str]]:
+    """``resume:job[=weight],...`` with paths relative to samples/"""
+    mix = []
+    for item in spec.split(","):
+        pair, _, weight = item.partition("=")
+        resume, job = pair.split(":")
+        mix.extend([(resume, job)] * int(weight or 1))
+    return mix
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+def span_totals(metrics_text: str) -> Dict[str, Dict[str, float]]:
+    """Seconds and count per span (summed over outcomes) from a /metrics scrape"""
+    totals: Dict[str, Dict[str, float]] = {}
+    for line in metrics_text.splitlines():
+        match = _SPAN_SAMPLE_RE.match(line)
+        if not match:
+            continue
+        span = dict(_LABEL_RE.findall(match.group(2))).get("span")
+        entry = totals.setdefault(span, {"seconds": 0.0, "count": 0.0})
+        entry["seconds" if match.group(1) == "sum" else "count"] += float(match.group(3))
+    return totals
+
+def node_breakdown(before: Dict[str, Dict[str, float]], after: Dict[str, Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    """Per-span totals accumulated during the run, with the mean per call"""
+    breakdown = {}
+    for span, entry in after.items():
+        previous = before.get(span, {"seconds": 0.0, "count": 0.0})
+        count = entry["count"] - previous["count"]
+        if count <= 0:
+            continue
+        seconds = entry["seconds"] - previous["seconds"]
+        breakdown[span] = {"calls": int(count), "total_seconds": round(seconds, 4), "mean_seconds": round(seconds / count, 4)}
+    return dict(sorted(breakdown.items(), key=lambda item: -item[1]["total_seconds"]))
+
+def peak_rss_mb(pid: int = None) -> float:
+    """Peak resident set size of this process, or of ``pid`` on Linux"""
+    if pid is None:
+        # ru_maxrss is in KiB on Linux and bytes on macOS
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2 ** 20
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+class LoadTest:
+    """One load-test run against an httpx client pointed at the service"""
+
+    def __init__(self, client: httpx.AsyncClient, mix: List[Tuple[str, str]], requests: int,
+                 concurrency: int, rate: float = None, profile: str = None, seed: int = 0):
+        self.client = client
+        self.mix = mix
+        self.requests = requests
+        self.concurrency = concurrency
+        self.rate = rate
+        self.profile = profile
+        self.rng = random.Random(seed)
+        self.documents = {name: open(os.path.join(SAMPLES, name), "rb").read() for pair in mix for name in pair}
+        self.latencies: List[float] = []
+        self.statuses: Counter = Counter()
+
+    async def _one(self, arrival: float) -> None:
+        resume, job = self.rng.choice(self.mix)
+        files = {
+            "resume": (os.path.basename(resume), self.documents[resume]),
+            "job_description": (os.path.basename(job), self.documents[job])
+        }
+        data = {"profile": self.profile} if self.profile else None
+        try:
+            response = await self.client.post("/score", files=files, data=data)
+            status = str(response.status_code)
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        self.latencies.append(time.perf_counter() - arrival)
+        self.statuses[status] += 1
+
+    async def run(self) -> float:
+        """Send every request, returning the wall-clock seconds taken"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        start = time.perf_counter()
+
+        async def bounded(arrival: float):
+            async with semaphore:
+                await self._one(arrival)
+
+        if self.rate:
+            # Open loop: Poisson arrivals, each timed from its scheduled arrival
+            tasks, arrival = [], start
+            for _ in range(self.requests):
+                arrival += self.rng.expovariate(self.rate)
+                await asyncio.sleep(max(arrival - time.perf_counter(), 0))
+                tasks.append(asyncio.create_task(bounded(arrival)))
+            await asyncio.gather(*tasks)
+        else:
+            # Closed loop: ``concurrency`` callers sending back to back
+            remaining = iter(range(self.requests))
+
+            async def caller():
+                for _ in remaining:
+                    await self._one(time.perf_counter())
+
+            await asyncio.gather(*(caller() for _ in range(self.concurrency)))
+        return time.perf_counter() - start
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        ok = self.statuses.get("200", 0)
+        total = sum(self.statuses.values())
+        return {
+            "requests": total,
+            "elapsed_seconds": round(elapsed, 3),
+            "requests_per_second": round(total / elapsed, 3) if elapsed else None,
+            "error_rate": round(1 - ok / total, 4) if total else None,
+            "latency_seconds": {
+                name: round(value, 4) if value is not None else None
+                for name, value in (
+                    ("p50", percentile(self.latencies, 0.50)),
+                    ("p95", percentile(self.latencies, 0.95)),
+                    ("p99", percentile(self.latencies, 0.99)),
+                    ("max", max(self.latencies, default=None))
+                )
+            },
+            "statuses": dict(self.statuses)
+        }
+
+async def _drive(args, client: httpx.AsyncClient, mix, server_pid: int = None) -> Dict[str, Any]:
+    load = LoadTest(client, mix, args.requests, args.concurrency, args.rate, args.profile, args.seed)
+    if args.warmup:
+        # Prime caches and connection pools outside the measured window
+        warm = LoadTest(client, mix, args.warmup, min(args.concurrency, args.warmup), profile=args.profile, seed=args.seed + 1)
+        await warm.run()
+    before = span_totals((await client.get("/metrics")).text)
+    elapsed = await load.run()
+    after = span_totals((await client.get("/metrics")).text)
+    result = load.summary(elapsed)
+    result["peak_rss_mb"] = round(peak_rss_mb(server_pid), 1)
+    result["nodes"] = node_breakdown(before, after)
+    return result
+
+def _start_uvicorn(port: int, workers: int, env: Dict[str, str]) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=ROOT, env=env
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/readyz", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("uvicorn did not become ready within 60s")
+
+def run(args) -> Dict[str, Any]:
+    mix = parse_mix(args.mix) if args.mix else default_mix()
+    upstream = FakeUpstreamConfig(
+        chat_latency=args.chat_latency,
+        embedding_latency=args.embedding_latency,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        seed=args.seed
+    )
+    with ExitStack() as stack:
+        base_url = stack.enter_context(serve(upstream))
+        env = {
+            "OPENAI_API_BASE": base_url,
+            "OPENAI_API_KEY": "sk-fake",
+            "EMBEDDING_BACKEND": args.embedding_backend,
+            "LOG_LEVEL": args.log_level
+        }
+        os.environ.update(env)
+        setup_workflow_logger(log_level=args.log_level)
+        timeout = httpx.Timeout(args.timeout)
+        if args.uvicorn:
+            port = _free_port("127.0.0.1")
+            process = _start_uvicorn(port, args.workers, {**os.environ, **env})
+            stack.callback(process.terminate)
+
+            async def remote():
+                async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=timeout,
+                                             limits=httpx.Limits(max_connections=args.concurrency)) as client:
+                    return await _drive(args, client, mix, server_pid=process.pid if args.workers == 1 else None)
+            result = asyncio.run(remote())
+        else:
+            import main
+
+            async def in_process():
+                async with main.lifespan(main.app):
+                    transport = httpx.ASGITransport(app=main.app)
+                    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=timeout) as client:
+                        return await _drive(args, client, mix)
+            result = asyncio.run(in_process())
+
+    result["config"] = {
+        "mode": f"uvicorn x{args.workers}" if args.uvicorn else "in-process",
+        "concurrency": args.concurrency,
+        "rate": args.rate,
+        "profile": args.profile,
+        "mix": sorted(Counter(f"{resume}:{job}" for resume, job in mix).items()),
+        "chat_latency": f"{args.chat_latency.kind}:{':'.join(f'{p:g}' for p in args.chat_latency.params)}",
+        "embedding_latency": f"{args.embedding_latency.kind}:{':'.join(f'{p:g}' for p in args.embedding_latency.params)}",
+        "embedding_backend": args.embedding_backend,
+        "error_rate": args.error_rate,
+        "rate_limit_rate": args.rate_limit_rate
+    }
+    result["timestamp"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    return result
+
+def report(result: Dict[str, Any], previous: Dict[str, Any] = None) -> str:
+    """Human-readable summary, with changes against a previous run"""
+    def change(path: List[str]) -> str:
+        if previous is None:
+            return ""
+        old, new = previous, result
+        for key in path:
+            old, new = (old or {}).get(key), (new or {}).get(key)
+        if not old or new is None:
+            return ""
+        return f"  ({(new - old) / old:+.1%})"
+
+    latency = result["latency_seconds"]
+    lines = [
+        f"{result['requests']} requests in {result['elapsed_seconds']}s ({result['config']['mode']})",
+        f"throughput   {result['requests_per_second']} req/s{change(['requests_per_second'])}",
+        f"error rate   {result['error_rate']:.2%}  {result['statuses']}",
+        *(f"latency {name:<4} {latency[name]}s{change(['latency_seconds', name])}" for name in ("p50", "p95", "p99")),
+        f"peak RSS     {result['peak_rss_mb']} MB{change(['peak_rss_mb'])}",
+        "per node:"
+    ]
+    lines.extend(f"  {span:<12} {entry['calls']:>5} calls  {entry['mean_seconds']:.4f}s mean  {entry['total_seconds']:.2f}s total"
+                 for span, entry in result["nodes"].items())
+    return "\n".join(lines)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test /score against a simulated upstream")
+    parser.add_argument("--requests", type=int, default=100, help="Measured requests")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests sent first")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum requests in flight")
+    parser.add_argument("--rate", type=float, default=None, help="Open-loop arrival rate in req/s (default closed loop)")
+    parser.add_argument("--profile", default=None, help="Workflow profile sent with each request")
+    parser.add_argument("--mix", default=None, help="resume:job[=weight],... from samples/ (default every sample pair)")
+    parser.add_argument("--uvicorn", action="store_true", help="Run the app in a uvicorn subprocess instead of in-process")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument("--chat-latency", type=LatencyModel.parse, default=LatencyModel.parse("lognormal:300:0.4"))
+    parser.add_argument("--embedding-latency", type=LatencyModel.parse, default=LatencyModel.parse("lognormal:40:0.3"))
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Upstream 500 rate")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Upstream 429 rate")
+    parser.add_argument("--embedding-backend", default="local",
+                        help="'local', or 'openai' to embed through the fake server (needs tiktoken's BPE file cached)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request client timeout in seconds")
+    parser.add_argument("--log-level", default="WARNING", help="Service log level during the run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Write the results as JSON")
+    parser.add_argument("--compare", default=None, help="Previous results JSON to compare against")
+    args = parser.parse_args()
+
+    result = run(args)
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+    print(report(result, previous))
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+if __name__ == "__main__":
+    main()
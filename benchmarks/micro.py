@@ -0,0 +1,402 @@
+"""
+Micro-benchmarks for the CPU-bound parts of scoring, runnable offline.
+
+Covers the parser backends on small, large and multi-page PDFs (generated
+with PyMuPDF, so no fixtures are needed), the similarity math at several
+chunk batch sizes, ``ScoreCombinerNode`` and ``ChatGPTScorer`` prompt
+building and response parsing with the model call stubbed out.
+
+Each benchmark is calibrated so one sample takes at least ``--min-time``,
+then timed for ``--repeat`` samples with the garbage collector paused; the
+median and interquartile range per call are reported. ``--save`` writes the
+medians as a baseline and ``--baseline`` compares against one, exiting
+non-zero when a median is slower by more than ``--threshold``:
+
+    python -m benchmarks.micro --save benchmarks/baseline.json        # on main
+    python -m benchmarks.micro --baseline benchmarks/baseline.json    # on a branch
+"""
+
+import argparse
+import asyncio
+import fnmatch
+import gc
+import inspect
+import json
+import os
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from io import BytesIO
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+import numpy as np
+
+# Constructing the OpenAI clients needs a key, the benchmarks never call them
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+Operation = Callable[[], Union[None, Awaitable[Any]]]
+
+@dataclass
+class Benchmark:
+    """A named setup function returning the operation to time"""
+    name: str
+    setup: Callable[[], Operation]
+    description: str = ""
+
+@dataclass
+class Result:
+    name: str
+    # Seconds per call, one entry per sample
+    samples: List[float] = field(default_factory=list)
+    loops: int = 0
+    skipped: Optional[str] = None
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.samples)
+
+    @property
+    def iqr(self) -> float:
+        if len(self.samples) < 4:
+            return 0.0
+        quartiles = statistics.quantiles(self.samples, n=4)
+        return quartiles[2] - quartiles[0]
+
+    def as_dict(self) -> Dict[str, Any]:
+        if self.skipped:
+            return {"skipped": self.skipped}
+        return {"median": self.median, "iqr": self.iqr, "min": min(self.samples), "loops": self.loops, "samples": len(self.samples)}
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+def benchmark(name: str, description: str = ""):
+    """Register a setup function under ``name``"""
+    def register(setup: Callable[[], Operation]) -> Callable[[], Operation]:
+        BENCHMARKS[name] = Benchmark(name, setup, description or (setup.__doc__ or "").strip())
+        return setup
+    return register
+
+class Runner:
+    """Calibrates and times operations, sync or async, on one event loop"""
+
+    def __init__(self, repeat: int = 15, warmup: int = 2, min_time: float = 0.02):
+        self.repeat = repeat
+        self.warmup = warmup
+        self.min_time = min_time
+        self.loop = asyncio.new_event_loop()
+
+    def close(self) -> None:
+        self.loop.close()
+
+    def _is_async(self, operation: Operation) -> bool:
+        """Call the operation once, awaiting it if it returned an awaitable"""
+        outcome = operation()
+        if inspect.isawaitable(outcome):
+            self.loop.run_until_complete(outcome)
+            return True
+        return False
+
+    def _time(self, operation: Operation, loops: int, is_async: bool) -> float:
+        """Seconds for ``loops`` calls"""
+        if is_async:
+            async def batch():
+                start = time.perf_counter()
+                for _ in range(loops):
+                    await operation()
+                return time.perf_counter() - start
+            return self.loop.run_until_complete(batch())
+        start = time.perf_counter()
+        for _ in range(loops):
+            operation()
+        return time.perf_counter() - start
+
+    def calibrate(self, operation: Operation, is_async: bool) -> int:
+        """Smallest power-of-two loop count whose batch takes at least ``min_time``"""
+        loops = 1
+        while loops < 2 ** 20:
+            if self._time(operation, loops, is_async) >= self.min_time:
+                break
+            loops *= 2
+        return loops
+
+    def run(self, bench: Benchmark) -> Result:
+        result = Result(bench.name)
+        try:
+            operation = bench.setup()
+        except ImportError as e:
+            result.skipped = f"missing dependency: {e.name or e}"
+            return result
+        is_async = self._is_async(operation)
+        result.loops = self.calibrate(operation, is_async)
+        for _ in range(self.warmup):
+            self._time(operation, result.loops, is_async)
+        gc_enabled = gc.isenabled()
+        gc.collect()
+        gc.disable()
+        try:
+            for _ in range(self.repeat):
+                result.samples.append(self._time(operation, result.loops, is_async) / result.loops)
+        finally:
+            if gc_enabled:
+                gc.enable()
+        return result
+
+def compare(results: List[Result], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Names of benchmarks whose median regressed by more than ``threshold`` against the baseline"""
+    regressions = []
+    for result in results:
+        previous = baseline.get(result.name, {})
+        if result.skipped or "median" not in previous:
+            continue
+        # Differences inside the noise of either run are not regressions
+        noise = max(result.iqr, previous.get("iqr", 0.0))
+        if result.median > previous["median"] * (1 + threshold) + noise:
+            regressions.append(result.name)
+    return regressions
+
+# --- documents -----------------------------------------------------------
+
+_RESUME_LINES = [
+    "Senior Software Engineer, Example Corp (2019 - present)",
+    "Designed and operated Python and Go services on Kubernetes handling 20k requests per second.",
+    "Led the migration of batch pipelines to Kafka streaming, cutting data latency from hours to seconds.",
+    "Mentored five engineers and ran the team's hiring loop and on-call rotation.",
+    "Skills: Python, Go, FastAPI, PostgreSQL, Redis, Kafka, Kubernetes, Terraform, AWS, GCP",
+    "Education: B.Sc. Computer Science, State University"
+]
+
+def resume_text(lines: int) -> str:
+    return "\n".join(_RESUME_LINES[i % len(_RESUME_LINES)] for i in range(lines))
+
+def make_pdf(pages: int, lines_per_page: int) -> bytes:
+    """A text PDF with the given number of pages and lines per page"""
+    import fitz
+    with fitz.open() as document:
+        for _ in range(pages):
+            page = document.new_page()
+            # insert_textbox drops text that overflows, so place each line explicitly
+            step = (page.rect.height - 72) / lines_per_page
+            for index, line in enumerate(resume_text(lines_per_page).splitlines()):
+                page.insert_text((36, 36 + step * (index + 1)), line, fontsize=min(10, step * 0.8))
+        return document.tobytes()
+
+def make_docx(paragraphs: int) -> bytes:
+    import docx
+    buffer = BytesIO()
+    document = docx.Document()
+    for line in resume_text(paragraphs).splitlines():
+        document.add_paragraph(line)
+    document.save(buffer)
+    return buffer.getvalue()
+
+PDF_SIZES = {"small": (1, 20), "large": (1, 120), "multipage": (10, 40)}
+
+# --- parsers -------------------------------------------------------------
+
+def _register_pdf_parser(backend: str, factory: Callable[[], Any]) -> None:
+    for size, (pages, lines) in PDF_SIZES.items():
+        def setup(pages=pages, lines=lines):
+            parser = factory()
+            content = make_pdf(pages, lines)
+            return lambda: parser.parse_bytes(content)
+        benchmark(f"parse.{backend}.{size}", f"{backend} on a {pages}-page PDF of {lines} lines per page")(setup)
+
+def _pymupdf():
+    from services.parsers import PyMuPDFResumeParser
+    return PyMuPDFResumeParser()
+
+def _unstructured():
+    from services.parsers import PDFResumeParser
+    # The backend imports Unstructured lazily; fail setup, not the timed call, when it is missing
+    import unstructured.partition.pdf  # noqa: F401
+    return PDFResumeParser()
+
+def _dispatch():
+    from services.parsers import FormatDispatchParser
+    return FormatDispatchParser()
+
+_register_pdf_parser("pymupdf", _pymupdf)
+_register_pdf_parser("unstructured", _unstructured)
+_register_pdf_parser("dispatch", _dispatch)
+
+@benchmark("parse.docx.large")
+def docx_large():
+    """python-docx on a 120-paragraph document"""
+    from services.parsers import DOCXResumeParser
+    parser, content = DOCXResumeParser(), make_docx(120)
+    return lambda: parser.parse_bytes(content)
+
+@benchmark("parse.text.large")
+def text_large():
+    """Plain text decoding of a 120-line document"""
+    from services.parsers import TextResumeParser
+    parser, content = TextResumeParser(), resume_text(120).encode("utf-8")
+    return lambda: parser.parse_bytes(content)
+
+# --- similarity ----------------------------------------------------------
+
+EMBEDDING_DIM = 1536
+CHUNK_BATCHES = [(1, 1), (8, 8), (32, 8), (128, 16)]
+
+def _unit_vectors(rows: int, seed: int) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((rows, EMBEDDING_DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+@benchmark("similarity.node.whole")
+def similarity_whole():
+    """SimilarityScoreNode on whole-document embeddings"""
+    from services.workflow import SimilarityScoreNode
+    node = SimilarityScoreNode()
+    state = {"resume_emb": _unit_vectors(1, 0)[0], "job_emb": _unit_vectors(1, 1)[0]}
+    return lambda: node.process(state)
+
+def _register_chunked(resume_chunks: int, job_chunks: int) -> None:
+    def setup():
+        from services.workflow import SimilarityScoreNode
+        node = SimilarityScoreNode(pooling="topk_mean")
+        state = {"resume_chunk_embs": _unit_vectors(resume_chunks, 0), "job_chunk_embs": _unit_vectors(job_chunks, 1)}
+        return lambda: node.process(state)
+    benchmark(f"similarity.node.chunks_{resume_chunks}x{job_chunks}",
+              f"SimilarityScoreNode over {resume_chunks}x{job_chunks} chunk embeddings")(setup)
+
+for _resume_chunks, _job_chunks in CHUNK_BATCHES:
+    _register_chunked(_resume_chunks, _job_chunks)
+
+class _CachedEmbeddings:
+    """Stands in for OpenAIEmbeddings, returning precomputed vectors as lists like the API client"""
+
+    def __init__(self):
+        self.vectors = [vector.tolist() for vector in _unit_vectors(2, 0)]
+        self.calls = 0
+
+    async def aembed_query(self, text: str) -> List[float]:
+        self.calls += 1
+        return self.vectors[self.calls % 2]
+
+@benchmark("similarity.cosine_scorer")
+def cosine_scorer():
+    """CosineSimilarityScorer.compute_similarity with cached embeddings"""
+    from services.embeddings import CosineSimilarityScorer
+    scorer = CosineSimilarityScorer()
+    scorer.embeddings = _CachedEmbeddings()
+    return lambda: scorer.compute_similarity("resume", "job")
+
+# --- scoring -------------------------------------------------------------
+
+@benchmark("combine.llm_scores")
+def combine_full():
+    """ScoreCombinerNode with embedding, technical and cultural scores"""
+    from services.workflow import ScoreCombinerNode
+    node = ScoreCombinerNode()
+    state = {"cosine_score": 0.62, "skill_score": 78.0, "skill_explain": "Strengths: Python. Gaps: Rust.",
+             "culture_score": 71.0, "culture_explain": "Strengths: mentoring. Gaps: none observed."}
+    return lambda: node.process(state)
+
+@benchmark("combine.embedding_only")
+def combine_embedding_only():
+    """ScoreCombinerNode with only the embedding score"""
+    from services.workflow import ScoreCombinerNode
+    node = ScoreCombinerNode()
+    state = {"cosine_score": 0.62}
+    return lambda: node.process(state)
+
+_REPLY = "Score: 78.5\nRationale: Strengths: Python, Kubernetes, Kafka. Gaps: no Rust experience, limited frontend work."
+
+def _stubbed_scorer(max_input_tokens: int = None):
+    from services.scorers import ChatGPTScorer
+    scorer = ChatGPTScorer(max_input_tokens=max_input_tokens)
+
+    async def invoke(messages):
+        return _REPLY
+    scorer._invoke = invoke
+    return scorer
+
+@benchmark("scorer.score")
+def scorer_score():
+    """ChatGPTScorer.score prompt building and response parsing, model stubbed"""
+    scorer, resume, job = _stubbed_scorer(), resume_text(40), resume_text(12)
+    return lambda: scorer.score(resume, job, context="technical skills and experience")
+
+@benchmark("scorer.score_over_budget")
+def scorer_score_over_budget():
+    """ChatGPTScorer.score with a resume trimmed to a 1000-token budget"""
+    scorer, resume, job = _stubbed_scorer(max_input_tokens=1000), resume_text(200), resume_text(12)
+    return lambda: scorer.score(resume, job, context="technical skills and experience")
+
+@benchmark("scorer.eval_score")
+def scorer_eval_score():
+    """ChatGPTScorer.eval_score prompt building and response parsing, model stubbed"""
+    scorer, evaluation, job = _stubbed_scorer(), resume_text(10), resume_text(12)
+    return lambda: scorer.eval_score(evaluation, job)
+
+# --- CLI -----------------------------------------------------------------
+
+def _format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:8.2f}{unit}"
+    return f"{seconds / 1e-9:8.0f}ns"
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline micro-benchmarks")
+    parser.add_argument("-k", "--select", action="append", default=[], metavar="GLOB",
+                        help="Only run benchmarks matching the pattern (repeatable)")
+    parser.add_argument("--list", action="store_true", help="List the benchmarks and exit")
+    parser.add_argument("--repeat", type=int, default=15, help="Timed samples per benchmark")
+    parser.add_argument("--warmup", type=int, default=2, help="Untimed samples per benchmark")
+    parser.add_argument("--min-time", type=float, default=0.02, help="Minimum seconds per sample")
+    parser.add_argument("--save", default=None, help="Write the results as a baseline JSON file")
+    parser.add_argument("--baseline", default=None, help="Baseline JSON file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown of the median against the baseline")
+    args = parser.parse_args(argv)
+
+    selected = [bench for name, bench in BENCHMARKS.items()
+                if not args.select or any(fnmatch.fnmatch(name, pattern) for pattern in args.select)]
+    if args.list:
+        for bench in selected:
+            print(f"{bench.name:<34} {bench.description}")
+        return 0
+
+    from services.utils import setup_workflow_logger
+    # Node log lines would otherwise dominate the cheaper benchmarks
+    setup_workflow_logger(log_level="ERROR")
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+    runner = Runner(repeat=args.repeat, warmup=args.warmup, min_time=args.min_time)
+    results = []
+    try:
+        for bench in selected:
+            result = runner.run(bench)
+            results.append(result)
+            if result.skipped:
+                print(f"{bench.name:<34} skipped ({result.skipped})")
+                continue
+            line = f"{bench.name:<34} {_format_time(result.median)} ± {_format_time(result.iqr).strip():<9} x{result.loops}"
+            previous = baseline.get(bench.name, {}).get("median")
+            if previous:
+                line += f"  {(result.median - previous) / previous:+7.1%}"
+            print(line)
+    finally:
+        runner.close()
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({
+                "python": sys.version.split()[0],
+                "platform": sys.platform,
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "results": {result.name: result.as_dict() for result in results}
+            }, f, indent=2)
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) slower than the baseline by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Score a directory (or manifest) of resumes against one job description.
+
+Runs a single ``ResumeWorkflow`` in-process: the job description is parsed
+and embedded once, resumes are parsed on a process pool and scored with
+bounded async concurrency, and each result is appended to a JSONL file as
+soon as it finishes. Items already in the output are skipped, so a crashed
+or interrupted run continues where it stopped when started again:
+
+    python bulk_score.py --job jd.pdf resumes/ --output scores.jsonl --concurrency 8
+    python bulk_score.py --job jd.pdf --manifest nightly.txt --output scores.jsonl --profile standard
+
+The output is append-only, so with ``--retry-errors`` a rescored item gets a
+second line after its failed one. The last line for an id wins; consumers
+should keep the last record per ``id``.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Any, Dict, List, Optional, Set, TextIO
+from fastapi import UploadFile
+
+RESUME_EXTENSIONS = (".pdf", ".docx", ".txt")
+
+@dataclass
+class Item:
+    """A resume to score; ``id`` identifies it in the output"""
+    id: str
+    path: str
+
+def discover(directory: str) -> List[Item]:
+    """Resumes under a directory, identified by their relative path"""
+    items = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.lower().endswith(RESUME_EXTENSIONS):
+                path = os.path.join(root, name)
+                items.append(Item(os.path.relpath(path, directory), path))
+    return sorted(items, key=lambda item: item.id)
+
+def read_manifest(manifest: str) -> List[Item]:
+    """
+    Resumes listed in a manifest: one path per line, or JSON lines with
+    ``path`` and an optional ``id``. Relative paths are resolved against the
+    manifest's directory.
+    """
+    base = os.path.dirname(os.path.abspath(manifest))
+    items = []
+    with open(manifest, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            entry = json.loads(line) if line.startswith("{") else {"path": line}
+            items.append(Item(entry.get("id") or entry["path"], os.path.join(base, entry["path"])))
+    return items
+
+def completed_ids(output: str, retry_errors: bool = False) -> Set[str]:
+    """Ids already written to the output; failed ones too unless they are to be retried"""
+    # The last line for an id wins, as a retried item is appended after its failure
+    statuses: Dict[str, str] = {}
+    if not os.path.exists(output):
+        return set()
+    with open(output, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by a crash; the item is scored again
+                continue
+            statuses[record["id"]] = record.get("status")
+    return {item_id for item_id, status in statuses.items() if status == "ok" or not retry_errors}
+
+def open_output(output: str) -> TextIO:
+    """Open the output for appending, terminating a line left incomplete by a crash"""
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    f = open(output, "a+", encoding="utf-8")
+    if f.tell() > 0:
+        f.seek(f.tell() - 1)
+        if f.read(1) != "\n":
+            f.write("\n")
+    return f
+
+_parser = None
+
+def parse_document(path: str) -> str:
+    """Parse one document to text; runs in a pool worker, which keeps its parser between calls"""
+    global _parser
+    if _parser is None:
+        from services.parsers import FormatDispatchParser
+        _parser = FormatDispatchParser()
+    with open(path, "rb") as f:
+        content = f.read()
+    return asyncio.run(_parser.parse_bytes(content))
+
+class Progress:
+    """Throughput and ETA on stderr, at most once per ``interval`` seconds"""
+
+    def __init__(self, total: int, skipped: int, stream: TextIO = sys.stderr, interval: float = 1.0):
+        self.total = total
+        self.skipped = skipped
+        self.stream = stream
+        self.interval = interval
+        self.done = 0
+        self.errors = 0
+        self.start = time.monotonic()
+        self._last = 0.0
+
+    def update(self, ok: bool) -> None:
+        self.done += 1
+        self.errors += 0 if ok else 1
+        now = time.monotonic()
+        if now - self._last >= self.interval or self.done == self.total:
+            self._last = now
+            self.stream.write(self.line(now) + ("\n" if not self.stream.isatty() or self.done == self.total else "\r"))
+            self.stream.flush()
+
+    def line(self, now: float = None) -> str:
+        elapsed = (now or time.monotonic()) - self.start
+        rate = self.done / elapsed if elapsed else 0.0
+        eta = (self.total - self.done) / rate if rate else float("inf")
+        eta_text = time.strftime("%H:%M:%S", time.gmtime(eta)) if eta != float("inf") else "--:--:--"
+        return (f"{self.done}/{self.total} scored ({self.skipped} skipped, {self.errors} failed)  "
+                f"{rate:.2f}/s  elapsed {time.strftime('%H:%M:%S', time.gmtime(elapsed))}  ETA {eta_text}")
+
+async def score_all(workflow, jd_id: str, items: List[Item], output: TextIO, pool: Optional[Executor],
+                    concurrency: int = 8, parse_ahead: int = 8, profile: str = None,
+                    progress: Progress = None) -> Dict[str, int]:
+    """
+    Parse ``items`` on ``pool`` (a thread when None) and score them with at
+    most ``concurrency`` workflow runs in flight, appending one JSON line per
+    item to ``output`` as it finishes.
+
+    Returns:
+        Counts of scored and failed items
+    """
+    loop = asyncio.get_running_loop()
+    # Parsed resumes waiting to be scored; bounds memory when parsing outpaces scoring
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    counts = {"ok": 0, "error": 0}
+
+    def write(item: Item, started: float, record: Dict[str, Any]) -> None:
+        record = {"id": item.id, "path": item.path, **record, "seconds": round(time.monotonic() - started, 3)}
+        output.write(json.dumps(record, default=str) + "\n")
+        output.flush()
+        counts[record["status"]] += 1
+        if progress is not None:
+            progress.update(record["status"] == "ok")
+
+    async def parse(item: Item, slots: asyncio.Semaphore) -> None:
+        started = time.monotonic()
+        try:
+            text = await loop.run_in_executor(pool, parse_document, item.path)
+            await queue.put((item, started, text, None))
+        except Exception as e:
+            await queue.put((item, started, None, e))
+        finally:
+            slots.release()
+
+    async def produce() -> None:
+        slots = asyncio.Semaphore(parse_ahead)
+        tasks = []
+        for item in items:
+            await slots.acquire()
+            tasks.append(asyncio.create_task(parse(item, slots)))
+        await asyncio.gather(*tasks)
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    async def score() -> None:
+        while (entry := await queue.get()) is not None:
+            item, started, text, error = entry
+            if error is None:
+                # The parsed text goes in as a plain-text upload, which the parser node passes through
+                upload = UploadFile(BytesIO(text.encode("utf-8")), filename=os.path.basename(item.path))
+                try:
+                    result = await workflow.run(upload, jd_id=jd_id, profile=profile)
+                    write(item, started, {"status": "ok", **result})
+                    continue
+                except Exception as e:
+                    error = e
+            write(item, started, {"status": "error", "error_type": type(error).__name__, "error": str(error)})
+
+    await asyncio.gather(produce(), *(score() for _ in range(concurrency)))
+    return counts
+
+async def run(args) -> int:
+    from services.workflow import ResumeWorkflow
+
+    items = read_manifest(args.manifest) if args.manifest else discover(args.resumes)
+    if args.limit:
+        items = items[:args.limit]
+    done = completed_ids(args.output, args.retry_errors)
+    pending = [item for item in items if item.id not in done]
+    print(f"{len(items)} resumes, {len(items) - len(pending)} already in {args.output}, {len(pending)} to score", file=sys.stderr)
+    if not pending:
+        return 0
+
+    workflow = ResumeWorkflow(max_iterations=args.max_iterations)
+    with open(args.job, "rb") as f:
+        job = await workflow.register_job(UploadFile(BytesIO(f.read()), filename=os.path.basename(args.job)))
+
+    pool = None
+    if args.parse_workers:
+        # Spawned workers do not inherit the logging thread or open clients
+        pool = ProcessPoolExecutor(args.parse_workers, mp_context=multiprocessing.get_context("spawn"))
+    progress = Progress(len(pending), len(items) - len(pending))
+    try:
+        with open_output(args.output) as output:
+            counts = await score_all(workflow, job.jd_id, pending, output, pool, concurrency=args.concurrency,
+                                     parse_ahead=max(args.parse_workers, 1) * 2, profile=args.profile, progress=progress)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    print(f"Scored {counts['ok']}, failed {counts['error']} in {time.monotonic() - progress.start:.1f}s", file=sys.stderr)
+    return 1 if counts["error"] else 0
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Score many resumes against one job description")
+    parser.add_argument("resumes", nargs="?", help="Directory searched recursively for .pdf, .docx and .txt resumes")
+    parser.add_argument("--manifest", help="File listing resumes, one path or JSON object per line")
+    parser.add_argument("--job", required=True, help="Job description document")
+    parser.add_argument("--output", required=True, help="JSONL file results are appended to; the last line for an id wins")
+    parser.add_argument("--profile", default=None, help="Workflow profile: fast, standard or thorough")
+    parser.add_argument("--max-iterations", type=int, default=3, help="Feedback loop iterations")
+    parser.add_argument("--concurrency", type=int, default=8, help="Workflow runs in flight")
+    parser.add_argument("--parse-workers", type=int, default=os.cpu_count() or 1,
+                        help="Parser processes; 0 parses in a thread of this process")
+    parser.add_argument("--retry-errors", action="store_true", help="Score again items that failed in an earlier run, appending a line that supersedes the failure")
+    parser.add_argument("--limit", type=int, default=None, help="Only the first N resumes")
+    parser.add_argument("--log-level", default="WARNING", help="Workflow log level")
+    args = parser.parse_args()
+    if (args.resumes is None) == (args.manifest is None):
+        parser.error("give either a resumes directory or --manifest")
+
+    from services.utils import setup_workflow_logger
+    setup_workflow_logger(log_level=args.log_level)
+    try:
+        return asyncio.run(run(args))
+    except KeyboardInterrupt:
+        print("\nInterrupted; run the same command again to continue", file=sys.stderr)
+        return 130
+
+if __name__ == "__main__":
+    sys.exit(main())
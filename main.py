@@ -1,12 +1,116 @@
-from fastapi import FastAPI, UploadFile, File
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Dict
-from services.workflow import ResumeWorkflow
-from services.utils import warning_filter
+from fastapi.responses import JSONResponse, PlainTextResponse
+from typing import TYPE_CHECKING, Dict, Optional
+from services.workflow import PROFILES
+from services.jobs import JobNotFoundError
+from services.parsers import DocumentParseError, ParseLimits
+from services.context import current_request_id
+from services.metrics import render_prometheus
+from services.resilience import UpstreamUnavailableError
+from services.tracing import new_request_id
+from services.utils import logger, warning_filter, env_bool
+
+parse_limits = ParseLimits.from_env()
+# Two documents plus multipart framing
+MAX_REQUEST_BYTES = 2 * parse_limits.max_bytes + 64 * 1024
+
+if TYPE_CHECKING:
+    from services.workflow import ResumeWorkflow
+
+_workflow: Optional["ResumeWorkflow"] = None
+_workflow_lock = threading.Lock()
+
+def get_workflow() -> "ResumeWorkflow":
+    """Shared workflow, so node caches and the job registry outlive a request"""
+    global _workflow
+    if _workflow is None:
+        with _workflow_lock:
+            if _workflow is None:
+                # Imported here so LangChain and LangGraph load with the first workflow, not with the app
+                from services.workflow import ResumeWorkflow
+                _workflow = ResumeWorkflow()
+    return _workflow
+
+async def warm_up(app: FastAPI, connect: bool) -> None:
+    """Build the workflow and warm it up, then mark the app ready"""
+    try:
+        # Building the workflow imports LangChain, keep that off the event loop
+        workflow = await asyncio.to_thread(get_workflow)
+        app.state.warm_up = await workflow.warm_up(connect=connect)
+    except Exception as e:
+        # Without a workflow nothing can be served, so stay not ready
+        logger.error(f"Warm-up failed, the app stays not ready: {type(e).__name__}: {e}")
+        app.state.warm_up_error = f"{type(e).__name__}: {e}"
+        return
+    app.state.ready = True
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    With WARMUP enabled, parser backends, graphs and the tokenizer (and with
+    WARMUP_CONNECT the upstream connection pools) are loaded in the
+    background after startup, and /readyz reports not ready until then.
+    """
+    app.state.ready = False
+    app.state.warm_up = None
+    app.state.warm_up_error = None
+    task = None
+    if env_bool("WARMUP"):
+        task = asyncio.create_task(warm_up(app, env_bool("WARMUP_CONNECT")))
+    else:
+        app.state.ready = True
+    yield
+    if task is not None:
+        task.cancel()
+
+class RequestSizeLimit:
+    """
+    ASGI middleware refusing request bodies larger than ``max_bytes`` with 413.
+
+    A declared Content-Length is checked before anything is read. The body is
+    also counted as it arrives, so a chunked upload without a length is cut
+    off once it crosses the limit instead of being spooled in full first.
+    """
+
+    def __init__(self, app, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length", b"").decode("latin-1")
+        if content_length.isdigit() and int(content_length) > self.max_bytes:
+            response = JSONResponse(
+                status_code=413,
+                content={"detail": f"Request body is {content_length} bytes, the limit is {self.max_bytes}"}
+            )
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Raised inside the body read, so FastAPI answers with the 413 before the rest arrives
+                    raise HTTPException(status_code=413, detail=f"Request body exceeds the {self.max_bytes} byte limit")
+            return message
+
+        await self.app(scope, limited_receive, send)
 
 # Initialize FastAPI with warning filtering
 with warning_filter:
-    app = FastAPI(title="Resume Parser API")
+    app = FastAPI(title="Resume Parser API", lifespan=lifespan)
     
     # Add CORS middleware
     app.add_middleware(
@@ -16,21 +120,98 @@ with warning_filter:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    app.add_middleware(RequestSizeLimit, max_bytes=MAX_REQUEST_BYTES)
+
+@app.middleware("http")
+async def assign_request_id(request: Request, call_next):
+    """Tag the request with an id (the caller's X-Request-ID if given) for spans and logs"""
+    request_id = request.headers.get("x-request-id") or new_request_id()
+    token = current_request_id.set(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        current_request_id.reset(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+@app.exception_handler(DocumentParseError)
+async def document_parse_error_handler(request: Request, exc: DocumentParseError):
+    """Report unparseable or oversized documents as client errors"""
+    detail = {"detail": str(exc)}
+    if exc.document:
+        detail["document"] = exc.document
+    return JSONResponse(status_code=exc.status_code, content=detail)
+
+@app.exception_handler(JobNotFoundError)
+async def job_not_found_handler(request: Request, exc: JobNotFoundError):
+    return JSONResponse(status_code=exc.status_code, content={"detail": str(exc)})
+
+@app.exception_handler(UpstreamUnavailableError)
+async def upstream_unavailable_handler(request: Request, exc: UpstreamUnavailableError):
+    """Fail fast while an upstream's circuit breaker is open"""
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(int(exc.retry_after), 1))}
+    )
+
+@app.post("/jobs")
+async def register_job(job_description: UploadFile = File(...)) -> Dict:
+    """
+    Register a job description once and get a ``jd_id`` to score against.
+    The parsed text, sections and embedding are stored for reuse.
+    """
+    with warning_filter:
+        job = await get_workflow().register_job(job_description)
+        return job.summary()
+
+@app.get("/jobs/{jd_id}")
+async def get_job(jd_id: str) -> Dict:
+    """Return the stored metadata of a registered job description"""
+    return get_workflow().job_registry.require(jd_id).summary()
 
 @app.post("/score")
 async def score_resume(
     resume: UploadFile = File(...),
-    job_description: UploadFile = File(...)
+    job_description: UploadFile = File(None),
+    jd_id: str = Form(None),
+    profile: str = Form(None)
 ) -> Dict:
     """
     Score a resume against a job description.
+    The job description is either uploaded or given as the ``jd_id`` of a registered one.
+    ``profile`` selects fast (embeddings only), standard (one LLM pass) or thorough (feedback loop).
     Returns both embedding similarity and LLM-based scores.
     """
+    if (job_description is None) == (jd_id is None):
+        raise HTTPException(status_code=422, detail="Provide exactly one of job_description or jd_id")
+    if profile is not None and profile not in PROFILES:
+        raise HTTPException(status_code=422, detail=f"Unknown profile '{profile}', expected one of {list(PROFILES)}")
     with warning_filter:
-        workflow = ResumeWorkflow()
-        result = await workflow.run(resume, job_description)
+        result = await get_workflow().run(resume, job_description, jd_id=jd_id, profile=profile)
         return result
 
+@app.get("/healthz")
+async def healthz() -> Dict:
+    """Liveness: the process is up and serving requests"""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz(request: Request) -> JSONResponse:
+    """Readiness: 503 until the warm-up (when enabled) has completed"""
+    state = request.app.state
+    if not getattr(state, "ready", False):
+        content = {"status": "warming_up"}
+        if getattr(state, "warm_up_error", None):
+            content = {"status": "failed", "detail": state.warm_up_error}
+        return JSONResponse(status_code=503, content=content)
+    return JSONResponse(content={"status": "ready", "warm_up": state.warm_up})
+
+@app.get("/metrics")
+async def get_metrics() -> PlainTextResponse:
+    """Counters and histograms in the Prometheus text format"""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True) 
@@ -2,9 +2,15 @@
 Resume Scorer Services Package
 """
 
-from . import parsers
-from . import scorers
-from . import embeddings
-from . import workflow
+import importlib
 
-__all__ = ['parsers', 'scorers', 'embeddings', 'workflow'] 
\ No newline at end of file
+__all__ = ['parsers', 'scorers', 'embeddings', 'retrieval', 'workflow']
+
+def __getattr__(name):
+    # Subpackages pull in langchain, langgraph and parser backends, so they are imported on first use
+    if name in __all__:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
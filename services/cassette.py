@@ -0,0 +1,159 @@
+"""
+Record and replay of upstream LLM and embedding calls.
+
+In ``record`` mode every call is made for real and its response appended to
+a JSON-lines cassette, keyed by a hash of the request (call kind, model,
+parameters and inputs). Recording starts from an empty cassette: the file is
+truncated when a recording cassette is opened, so re-recording after a prompt
+or upstream change replaces the old responses instead of shadowing the new
+ones. In ``replay`` mode responses are served from the cassette without
+touching the network, optionally after sleeping for the latency that was
+recorded, so workflow runs are reproducible and fast offline. ``auto``
+replays what the cassette has and appends the rest. Replayed calls cost
+nothing, so callers record their usage with ``replayed=True``.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from services.utils import logger, env_bool, env_str
+
+OFF = "off"
+RECORD = "record"
+REPLAY = "replay"
+AUTO = "auto"
+MODES = (OFF, RECORD, REPLAY, AUTO)
+
+class CassetteMissError(LookupError):
+    """A replayed request was never recorded"""
+
+def request_key(kind: str, request: Dict[str, Any]) -> str:
+    """Stable hash of a call kind and its JSON-serialisable request"""
+    payload = json.dumps({"kind": kind, "request": request}, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _jsonable(value: Any) -> Any:
+    # numpy arrays and scalars from local embedding backends
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class Cassette:
+    """Recorded responses loaded from, and appended to, a JSON-lines file"""
+
+    def __init__(self, path: str, mode: str = REPLAY, replay_timing: bool = False):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode '{mode}', expected one of {', '.join(MODES)}")
+        self.path = path
+        self.mode = mode
+        self.replay_timing = replay_timing
+        # Responses per key in recording order; a key recorded several times replays them in turn
+        self.entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._served: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        if mode == RECORD:
+            self._truncate()
+        elif mode != OFF:
+            self._load()
+
+    def _truncate(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        open(self.path, "w", encoding="utf-8").close()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.entries.setdefault(entry["key"], []).append(entry)
+        logger.info(f"Loaded {sum(len(entries) for entries in self.entries.values())} recorded responses from {self.path}")
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """Next recorded entry for a key, repeating the last one once all were served"""
+        with self._lock:
+            entries = self.entries.get(key)
+            if not entries:
+                return None
+            index = self._served.get(key, 0)
+            self._served[key] = index + 1
+            return entries[min(index, len(entries) - 1)]
+
+    def record(self, key: str, kind: str, request: Dict[str, Any], response: Any, latency: float) -> None:
+        entry = {"key": key, "kind": kind, "request": request, "response": response, "latency": round(latency, 4)}
+        line = json.dumps(entry, default=_jsonable, ensure_ascii=False)
+        with self._lock:
+            self.entries.setdefault(key, []).append(json.loads(line))
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    async def call(self, kind: str, request: Dict[str, Any], make_call: Callable[[], Awaitable[Any]]) -> Any:
+        """Response to a call, served from the cassette or made according to the mode"""
+        response, _ = await self.fetch(kind, request, make_call)
+        return response
+
+    async def fetch(self, kind: str, request: Dict[str, Any],
+                    make_call: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Serve a call from the cassette or make it, according to the mode.
+
+        Args:
+            kind: Call type, e.g. "chat" or "embed_query"; part of the key
+            request: Everything that determines the response; must be JSON-serialisable
+            make_call: Performs the real call
+
+        Returns:
+            The response, and whether it was replayed rather than made upstream
+
+        Raises:
+            CassetteMissError: In replay mode, when the request was not recorded
+        """
+        if self.mode == OFF:
+            return await make_call(), False
+        key = request_key(kind, request)
+        if self.mode in (REPLAY, AUTO):
+            entry = self.lookup(key)
+            if entry is not None:
+                if self.replay_timing:
+                    await asyncio.sleep(entry["latency"])
+                return entry["response"], True
+            if self.mode == REPLAY:
+                raise CassetteMissError(f"No recorded {kind} response for request {key[:12]} in {self.path}")
+        start = time.perf_counter()
+        response = await make_call()
+        self.record(key, kind, request, response, time.perf_counter() - start)
+        return response, False
+
+_cassette: Optional[Cassette] = None
+_cassette_configured = False
+_cassette_lock = threading.Lock()
+
+def get_cassette() -> Cassette:
+    """Cassette configured by CASSETTE_MODE, CASSETTE_FILE and CASSETTE_REPLAY_TIMING"""
+    global _cassette, _cassette_configured
+    with _cassette_lock:
+        if not _cassette_configured:
+            mode = env_str("CASSETTE_MODE", OFF).lower()
+            path = env_str("CASSETTE_FILE", "data/cassette.jsonl")
+            _cassette = Cassette(path, mode, env_bool("CASSETTE_REPLAY_TIMING"))
+            if mode != OFF:
+                logger.info(f"Upstream calls in cassette {mode} mode ({path})")
+            _cassette_configured = True
+        return _cassette
+
+def set_cassette(cassette: Optional[Cassette]) -> None:
+    """Replace the cassette, e.g. in tests; None reconfigures from the environment on next use"""
+    global _cassette, _cassette_configured
+    with _cassette_lock:
+        _cassette = cassette
+        _cassette_configured = cassette is not None
@@ -0,0 +1,15 @@
+"""
+Per-request context shared by nodes, scorers and instrumentation.
+"""
+
+from contextvars import ContextVar
+from typing import Optional
+
+# Name of the workflow node currently executing, set by the graph wrappers
+current_node: ContextVar[str] = ContextVar("current_node", default="unknown")
+
+# Checkpoint key of the workflow run in progress, set by ResumeWorkflow.run
+current_run: ContextVar[Optional[str]] = ContextVar("current_run", default=None)
+
+# Id of the HTTP request or workflow run being served, attached to logs and trace spans
+current_request_id: ContextVar[Optional[str]] = ContextVar("current_request_id", default=None)
@@ -2,7 +2,25 @@
 Embeddings Package
 """
 
+import importlib
 from .base_embeddings import BaseEmbeddingScorer
-from .cosine_similarity import CosineSimilarityScorer
+from .hashing_embeddings import HashingEmbeddings, LocalSimilarityScorer
+from .factory import create_embedding_scorer
+from .vector_store import QuantizedEmbeddingStore
 
-__all__ = ['BaseEmbeddingScorer', 'CosineSimilarityScorer'] 
\ No newline at end of file
+__all__ = [
+    'BaseEmbeddingScorer',
+    'CosineSimilarityScorer',
+    'HashingEmbeddings',
+    'LocalSimilarityScorer',
+    'create_embedding_scorer',
+    'QuantizedEmbeddingStore'
+]
+
+# The OpenAI scorer imports langchain, so it is only loaded when used
+_LAZY = {'CosineSimilarityScorer': '.cosine_similarity'}
+
+def __getattr__(name):
+    if name in _LAZY:
+        return getattr(importlib.import_module(_LAZY[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -6,4 +6,7 @@ class BaseEmbeddingScorer(ABC):
     @abstractmethod
     async def compute_similarity(self, text1: str, text2: str) -> float:
         """Compute similarity between two texts"""
-        pass 
\ No newline at end of file
+        pass
+
+    async def warm_up(self) -> None:
+        """Open upstream connections ahead of the first request"""
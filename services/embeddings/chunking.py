@@ -0,0 +1,92 @@
+import re
+from typing import List, Sequence
+import numpy as np
+
+POOLING_MODES = ("max", "mean", "topk_mean")
+
+def chunk_text(text: str, max_chars: int = 2000, overlap: int = 200) -> List[str]:
+    """
+    Split a document into bounded chunks along line boundaries.
+
+    Lines are packed greedily into chunks of at most ``max_chars`` characters
+    so sections such as a single job entry usually stay together. Lines longer
+    than the limit are split on whitespace. Consecutive chunks share up to
+    ``overlap`` trailing characters of context.
+
+    Args:
+        text: Document text
+        max_chars: Upper bound on chunk length, well below the model token limit
+        overlap: Characters of the previous chunk repeated at the start of the next
+
+    Returns:
+        List of non-empty chunks (empty for blank input)
+    """
+    if max_chars <= 0:
+        raise ValueError("max_chars must be positive")
+    overlap = max(0, min(overlap, max_chars // 2))
+
+    pieces: List[str] = []
+    for line in text.splitlines():
+        line = re.sub(r"\s+", " ", line).strip()
+        if not line:
+            continue
+        while len(line) > max_chars:
+            cut = line.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            pieces.append(line[:cut])
+            line = line[cut:].strip()
+        if line:
+            pieces.append(line)
+
+    chunks: List[str] = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + 1 + len(piece) > max_chars:
+            chunks.append(current)
+            tail = current[-overlap:] if overlap else ""
+            # Start the overlap on a word boundary
+            tail = tail[tail.find(" ") + 1:] if " " in tail else tail
+            current = tail if len(tail) + 1 + len(piece) <= max_chars else ""
+        current = f"{current} {piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+def cosine_similarity_matrix(a: Sequence[Sequence[float]], b: Sequence[Sequence[float]]) -> np.ndarray:
+    """Pairwise cosine similarities between the rows of ``a`` and ``b``"""
+    a = np.asarray(a, dtype=np.float32)
+    b = np.asarray(b, dtype=np.float32)
+    a_norm = np.linalg.norm(a, axis=1, keepdims=True)
+    b_norm = np.linalg.norm(b, axis=1, keepdims=True)
+    a_norm[a_norm == 0] = 1.0
+    b_norm[b_norm == 0] = 1.0
+    return (a / a_norm) @ (b / b_norm).T
+
+def pool_similarity(matrix: np.ndarray, pooling: str = "max", top_k: int = 3) -> float:
+    """
+    Aggregate a resume-chunk x job-chunk similarity matrix into one score.
+
+    Each job description chunk is matched to its best resume chunk, then
+    those best matches are pooled:
+        max       - strongest single section match
+        mean      - average coverage of every job description section
+        topk_mean - average of the ``top_k`` best covered sections
+
+    Args:
+        matrix: Array of shape (resume_chunks, job_chunks)
+        pooling: One of POOLING_MODES
+        top_k: Number of sections averaged by "topk_mean"
+    """
+    if pooling not in POOLING_MODES:
+        raise ValueError(f"Unknown pooling '{pooling}', expected one of {POOLING_MODES}")
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.size == 0:
+        return 0.0
+
+    best_matches = matrix.max(axis=0)
+    if pooling == "max":
+        return float(best_matches.max())
+    if pooling == "mean":
+        return float(best_matches.mean())
+    k = max(1, min(top_k, len(best_matches)))
+    return float(np.sort(best_matches)[-k:].mean())
@@ -1,14 +1,15 @@
 from langchain.embeddings import OpenAIEmbeddings
 import numpy as np
 from .base_embeddings import BaseEmbeddingScorer
-from dotenv import load_dotenv
-
-# Load environment variables (needed for OpenAI API key)
-load_dotenv()
+from services.utils import load_env, warning_filter
 
 class CosineSimilarityScorer(BaseEmbeddingScorer):
     def __init__(self):
-        self.embeddings = OpenAIEmbeddings()
+        # Load environment variables (needed for OpenAI API key)
+        load_env()
+        warning_filter.silence_langchain()
+        # Retries and timeouts are handled by services.resilience
+        self.embeddings = OpenAIEmbeddings(max_retries=0)
     
     async def compute_similarity(self, text1: str, text2: str) -> float:
         """Compute cosine similarity between two texts using embeddings"""
@@ -22,4 +23,8 @@ class CosineSimilarityScorer(BaseEmbeddingScorer):
         
         # Compute cosine similarity
         similarity = np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
-        return float(similarity) 
\ No newline at end of file
+        return float(similarity)
+
+    async def warm_up(self) -> None:
+        """Embed a short text, opening the client's connection pool"""
+        await self.embeddings.aembed_query("warm up")
@@ -0,0 +1,21 @@
+from .base_embeddings import BaseEmbeddingScorer
+from services.utils import env_int, env_str
+
+EMBEDDING_BACKENDS = ("openai", "local")
+
+def create_embedding_scorer(backend: str = None) -> BaseEmbeddingScorer:
+    """
+    Create the configured embedding scorer.
+
+    Args:
+        backend: "openai" (default) or "local" for offline hashed n-gram
+            vectors. Falls back to the EMBEDDING_BACKEND environment variable.
+    """
+    backend = (backend or env_str("EMBEDDING_BACKEND", "openai")).lower()
+    if backend == "openai":
+        from .cosine_similarity import CosineSimilarityScorer
+        return CosineSimilarityScorer()
+    if backend == "local":
+        from .hashing_embeddings import LocalSimilarityScorer
+        return LocalSimilarityScorer(dim=env_int("EMBEDDING_LOCAL_DIM", 1024))
+    raise ValueError(f"Unknown embedding backend '{backend}', expected one of {EMBEDDING_BACKENDS}")
@@ -0,0 +1,115 @@
+import asyncio
+import re
+import zlib
+from typing import Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from .base_embeddings import BaseEmbeddingScorer
+
+_WORD_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+_MULTIPLIER = np.uint64(0x100000001B3)
+_MIX = np.uint64(0xFF51AFD7ED558CCD)
+
+class HashingEmbeddings:
+    """
+    Offline embeddings built from hashed word and character n-gram counts.
+
+    Mirrors the ``embed_query``/``embed_documents`` interface of LangChain
+    embeddings so it can be used wherever ``OpenAIEmbeddings`` is, without
+    network access or a model download. Features are hashed into ``dim``
+    signed buckets, counts are sublinearly scaled, optionally weighted by an
+    IDF fitted on a reference corpus, and the vectors are L2-normalised.
+    Character n-gram hashes are computed with vectorised NumPy arithmetic, so
+    a full resume embeds in well under a millisecond on one core.
+    """
+
+    def __init__(self, dim: int = 1024, ngram_range: Tuple[int, int] = (3, 5), use_words: bool = True):
+        """
+        Args:
+            dim: Number of hash buckets (vector dimension)
+            ngram_range: Inclusive range of character n-gram lengths
+            use_words: Also hash whole word tokens
+        """
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self.use_words = use_words
+        self.idf: Optional[np.ndarray] = None
+
+    def fit(self, texts: Iterable[str]) -> "HashingEmbeddings":
+        """Learn per-bucket IDF weights from a reference corpus"""
+        counts = self._count_matrix(list(texts))
+        doc_freq = np.count_nonzero(counts, axis=0)
+        self.idf = (np.log((1 + len(counts)) / (1 + doc_freq)) + 1.0).astype(np.float32)
+        return self
+
+    def transform(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed a batch of texts into a float32 array of shape (len(texts), dim)"""
+        counts = self._count_matrix(texts)
+        vectors = np.sign(counts) * np.log1p(np.abs(counts))
+        if self.idf is not None:
+            vectors *= self.idf
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (vectors / norms).astype(np.float32)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.transform(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.transform([text])[0].tolist()
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        # CPU bound; keep the event loop free for large batches
+        if len(texts) > 8:
+            return await asyncio.to_thread(self.embed_documents, texts)
+        return self.embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return self.embed_query(text)
+
+    def _count_matrix(self, texts: Sequence[str]) -> np.ndarray:
+        counts = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            buckets, signs = self._hash_features(text)
+            if len(buckets):
+                counts[row] = np.bincount(buckets, weights=signs, minlength=self.dim)
+        return counts
+
+    def _hash_features(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        normalized = " " + " ".join(text.lower().split()) + " "
+        data = np.frombuffer(normalized.encode("utf-8"), dtype=np.uint8).astype(np.uint64)
+
+        hashes = []
+        low, high = self.ngram_range
+        for n in range(low, high + 1):
+            if len(data) < n:
+                break
+            # Polynomial rolling hash of every n-gram, wrapping at 64 bits
+            h = np.zeros(len(data) - n + 1, dtype=np.uint64)
+            for offset in range(n):
+                h = h * _MULTIPLIER + data[offset:len(data) - n + 1 + offset]
+            hashes.append(h + np.uint64(n))
+
+        if self.use_words:
+            words = _WORD_RE.findall(normalized)
+            if words:
+                hashes.append(np.fromiter((zlib.crc32(w.encode("utf-8")) for w in words), dtype=np.uint64, count=len(words)) << np.uint64(32))
+
+        if not hashes:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        h = np.concatenate(hashes)
+        h ^= h >> np.uint64(29)
+        h *= _MIX
+        h ^= h >> np.uint64(32)
+        buckets = (h % np.uint64(self.dim)).astype(np.int64)
+        signs = np.where((h >> np.uint64(63)) == 0, 1.0, -1.0)
+        return buckets, signs
+
+class LocalSimilarityScorer(BaseEmbeddingScorer):
+    """Embedding scorer backed by local hashed n-gram vectors"""
+    def __init__(self, dim: int = 1024):
+        self.embeddings = HashingEmbeddings(dim=dim)
+
+    async def compute_similarity(self, text1: str, text2: str) -> float:
+        """Compute cosine similarity between two texts using local embeddings"""
+        vec1, vec2 = self.embeddings.transform([text1, text2])
+        return float(np.dot(vec1, vec2))
@@ -0,0 +1,271 @@
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from services.utils import logger
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+_QUANTIZED_DTYPES = {
+    "int8": np.int8,
+    "float16": np.float16
+}
+
+class QuantizedEmbeddingStore:
+    """
+    Append-only, memory-mapped store of quantized embedding vectors.
+
+    Vectors are L2-normalised and stored as int8 codes with a per-vector
+    float32 scale, or as float16. The files are opened with ``np.memmap`` in
+    read-only mode, so every worker process maps the same pages from the OS
+    page cache instead of holding its own copy. An optional float32 copy is
+    kept on disk and only touched to rescore the final top-k at full precision.
+    Replacing a document appends a new row; the last row written for an id
+    wins and the older ones are skipped by searches.
+
+    Layout of the store directory:
+        meta.json   - dimension, dtype and whether full precision is kept
+        codes.bin   - N x dim quantized codes
+        scales.bin  - N float32 dequantization scales
+        full.bin    - N x dim float32 vectors (optional)
+        ids.txt     - one document id per line
+    """
+
+    def __init__(self, path: str, dim: int = 1536, dtype: str = "int8", keep_full_precision: bool = True):
+        """
+        Open or create a store.
+
+        Args:
+            path: Directory holding the store files
+            dim: Embedding dimension (ignored when opening an existing store)
+            dtype: Quantized storage type, either "int8" or "float16"
+            keep_full_precision: Also persist float32 vectors for rescoring
+        """
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+        meta_path = os.path.join(path, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+        else:
+            if dtype not in _QUANTIZED_DTYPES:
+                raise ValueError(f"Unsupported dtype '{dtype}', expected one of {list(_QUANTIZED_DTYPES)}")
+            meta = {"dim": dim, "dtype": dtype, "keep_full_precision": keep_full_precision}
+            with open(meta_path, "w") as f:
+                json.dump(meta, f)
+
+        self.dim = int(meta["dim"])
+        self.dtype = meta["dtype"]
+        self.keep_full_precision = bool(meta["keep_full_precision"])
+        self._code_type = np.dtype(_QUANTIZED_DTYPES[self.dtype])
+
+        self._codes_path = os.path.join(path, "codes.bin")
+        self._scales_path = os.path.join(path, "scales.bin")
+        self._full_path = os.path.join(path, "full.bin")
+        self._ids_path = os.path.join(path, "ids.txt")
+        self._lock_path = os.path.join(path, ".lock")
+
+        self._count = 0
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        # Rows whose id was written again later
+        self._superseded: List[int] = []
+        self._ids_offset = 0
+        self._codes: Optional[np.memmap] = None
+        self._scales: Optional[np.memmap] = None
+        self._full: Optional[np.memmap] = None
+        self.refresh()
+
+    def __len__(self) -> int:
+        self.refresh()
+        return self._count - sum(1 for row in self._superseded if row < self._count)
+
+    def __contains__(self, doc_id: str) -> bool:
+        self.refresh()
+        return doc_id in self._rows
+
+    @property
+    def ids(self) -> List[str]:
+        self.refresh()
+        return [doc_id for doc_id, row in self._rows.items() if row < self._count]
+
+    def quantize(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Normalise and quantize a batch of vectors, returning (codes, scales)"""
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+        if self.dtype == "int8":
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+        else:
+            scales = np.ones(len(vectors), dtype=np.float32)
+            codes = vectors.astype(np.float16)
+        return codes, scales.astype(np.float32)
+
+    def add(self, ids: Sequence[str], vectors: Iterable[Sequence[float]], replace: bool = False) -> None:
+        """
+        Append vectors to the store.
+
+        Appends are serialised with an advisory file lock so several
+        ingestion processes can write to the same store. Readers only see a
+        row once its id has been written, which happens last.
+
+        Args:
+            ids: Document ids, one per vector
+            vectors: Embeddings to store
+            replace: Supersede the vectors of ids already stored instead of rejecting them
+        """
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        if len(ids) != len(vectors):
+            raise ValueError(f"Got {len(ids)} ids for {len(vectors)} vectors")
+        if any("\n" in doc_id for doc_id in ids):
+            raise ValueError("Document ids must not contain newlines")
+        if not len(ids):
+            return
+        if len(set(ids)) != len(ids):
+            raise ValueError("Document ids must be unique within a batch")
+
+        codes, scales = self.quantize(vectors)
+        with open(self._lock_path, "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                # Another process may have appended since our last refresh
+                self.refresh()
+                duplicates = [doc_id for doc_id in ids if doc_id in self._rows]
+                if duplicates and not replace:
+                    raise ValueError(f"Documents already stored: {duplicates[:5]}")
+                self._truncate_to(self._count)
+                with open(self._codes_path, "ab") as f:
+                    f.write(codes.tobytes())
+                with open(self._scales_path, "ab") as f:
+                    f.write(scales.tobytes())
+                if self.keep_full_precision:
+                    with open(self._full_path, "ab") as f:
+                        f.write(_normalize(vectors).tobytes())
+                with open(self._ids_path, "a") as f:
+                    f.write("".join(f"{doc_id}\n" for doc_id in ids))
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+        logger.debug("Appended %s vectors to embedding store at %s", len(ids), self.path)
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Pick up rows appended by other processes and remap the files"""
+        if os.path.exists(self._ids_path):
+            with open(self._ids_path) as f:
+                f.seek(self._ids_offset)
+                # Only consume complete lines; a concurrent writer may be mid-line
+                for line in f:
+                    if not line.endswith("\n"):
+                        break
+                    self._ids_offset += len(line.encode())
+                    doc_id = line[:-1]
+                    if doc_id in self._rows:
+                        self._superseded.append(self._rows[doc_id])
+                    self._rows[doc_id] = len(self._ids)
+                    self._ids.append(doc_id)
+
+        count = min(len(self._ids), self._rows_on_disk())
+        if count == self._count and self._codes is not None:
+            return
+
+        self._count = count
+        if count == 0:
+            self._codes = self._scales = self._full = None
+            return
+        self._codes = np.memmap(self._codes_path, dtype=self._code_type, mode="r", shape=(count, self.dim))
+        self._scales = np.memmap(self._scales_path, dtype=np.float32, mode="r", shape=(count,))
+        if self.keep_full_precision:
+            self._full = np.memmap(self._full_path, dtype=np.float32, mode="r", shape=(count, self.dim))
+
+    def get(self, doc_id: str) -> np.ndarray:
+        """Return the stored (normalised) vector for a document"""
+        self.refresh()
+        row = self._rows[doc_id]
+        if self._full is not None:
+            return np.array(self._full[row])
+        return self._codes[row].astype(np.float32) * self._scales[row]
+
+    def search(self, query: Sequence[float], top_k: int = 10, rescore_factor: int = 4,
+               block_size: int = 65536) -> List[Tuple[str, float]]:
+        """
+        Find the stored vectors most similar to the query.
+
+        Candidates are ranked by approximate cosine similarity over the
+        quantized codes, scanned in blocks to bound memory. The best
+        ``top_k * rescore_factor`` candidates are then rescored against the
+        full-precision vectors when they are available.
+
+        Returns:
+            List of (doc_id, cosine similarity) pairs, best first
+        """
+        self.refresh()
+        if self._count == 0 or top_k <= 0:
+            return []
+
+        q = _normalize(np.asarray(query, dtype=np.float32).reshape(1, self.dim))[0]
+        n_candidates = min(self._count, max(top_k, top_k * rescore_factor))
+
+        approx = np.empty(self._count, dtype=np.float32)
+        for start in range(0, self._count, block_size):
+            stop = min(start + block_size, self._count)
+            block = np.asarray(self._codes[start:stop], dtype=np.float32)
+            approx[start:stop] = (block @ q) * self._scales[start:stop]
+
+        live = self._count
+        if self._superseded:
+            stale = [row for row in self._superseded if row < self._count]
+            approx[stale] = -np.inf
+            live -= len(stale)
+            if live == 0:
+                return []
+        candidates = _top_indices(approx, min(n_candidates, live))
+        if self._full is not None:
+            rows = np.sort(candidates)  # sequential reads from the mapped file
+            exact = np.asarray(self._full[rows]) @ q
+            order = _top_indices(exact, min(top_k, len(rows)))
+            return [(self._ids[rows[i]], float(exact[i])) for i in order]
+
+        order = candidates[:top_k]
+        return [(self._ids[i], float(approx[i])) for i in order]
+
+    def _rows_on_disk(self) -> int:
+        if not os.path.exists(self._scales_path):
+            return 0
+        counts = [
+            os.path.getsize(self._codes_path) // (self.dim * self._code_type.itemsize),
+            os.path.getsize(self._scales_path) // 4
+        ]
+        if self.keep_full_precision:
+            counts.append(os.path.getsize(self._full_path) // (self.dim * 4) if os.path.exists(self._full_path) else 0)
+        return min(counts)
+
+    def _truncate_to(self, count: int) -> None:
+        """Drop any partially written rows left behind by a crashed writer"""
+        sizes = [
+            (self._codes_path, count * self.dim * self._code_type.itemsize),
+            (self._scales_path, count * 4)
+        ]
+        if self.keep_full_precision:
+            sizes.append((self._full_path, count * self.dim * 4))
+        for path, size in sizes:
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                os.truncate(path, size)
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+def _top_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest scores, best first"""
+    if k >= len(scores):
+        return np.argsort(-scores)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
@@ -0,0 +1,7 @@
+"""
+Job Description Registry Package
+"""
+
+from .registry import JobRegistry, RegisteredJob, JobNotFoundError, make_jd_id
+
+__all__ = ['JobRegistry', 'RegisteredJob', 'JobNotFoundError', 'make_jd_id']
\ No newline at end of file
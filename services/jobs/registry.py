@@ -0,0 +1,173 @@
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from services.utils import logger, env_int, env_str, content_hash, LRUCache
+
+_JD_ID_RE = re.compile(r"^[0-9a-f]{16}$")
+
+class JobNotFoundError(LookupError):
+    """Raised when a job description id is not registered"""
+    status_code = 404
+
+    def __init__(self, jd_id: str):
+        super().__init__(f"Job description '{jd_id}' is not registered")
+        self.jd_id = jd_id
+
+@dataclass
+class RegisteredJob:
+    """A parsed, segmented and embedded job description"""
+    jd_id: str
+    text: str
+    sections: Dict[str, str]
+    compact: str
+    requirements: List[str] = field(default_factory=list)
+    nice_to_have: List[str] = field(default_factory=list)
+    # Identifies the embedding backend, vectors are only reused by the same one
+    embedding_model: Optional[str] = None
+    embedding: Optional[np.ndarray] = None
+    # (chunk_size, chunk_overlap) the chunk vectors were computed with
+    chunking: Optional[Tuple[int, int]] = None
+    chunk_embeddings: Optional[np.ndarray] = None
+    created_at: float = field(default_factory=time.time)
+
+    def summary(self) -> Dict[str, Any]:
+        """Metadata returned by the API, without the text and vectors"""
+        return {
+            "jd_id": self.jd_id,
+            "sections": list(self.sections),
+            "requirements": self.requirements,
+            "nice_to_have": self.nice_to_have,
+            "characters": len(self.text),
+            "embedding_model": self.embedding_model,
+            "created_at": self.created_at
+        }
+
+def make_jd_id(text: str) -> str:
+    """Id of a job description: a short hash of its parsed text"""
+    return content_hash(text)[:16]
+
+def list_items(section_text: Optional[str]) -> List[str]:
+    """Split a section into its bullet or line items"""
+    if not section_text:
+        return []
+    return [line[2:] if line.startswith("- ") else line for line in section_text.splitlines() if line.strip()]
+
+class JobRegistry:
+    """
+    Store of registered job descriptions, addressable by ``jd_id``.
+
+    Each job is kept in an in-memory LRU cache and, when ``path`` is set,
+    persisted as ``<jd_id>.json`` (text, sections, requirement lists) plus
+    ``<jd_id>.npz`` (float32 embeddings), so registrations survive restarts
+    and are shared by every worker process using the same directory.
+    """
+
+    def __init__(self, path: str = None, cache_size: int = None):
+        """
+        Args:
+            path: Directory for persisted jobs (env JOB_REGISTRY_DIR); "" keeps them in memory only
+            cache_size: Jobs kept in memory (env JOB_REGISTRY_CACHE_SIZE)
+        """
+        self.path = env_str("JOB_REGISTRY_DIR", "data/jobs") if path is None else path
+        self.cache = LRUCache(cache_size or env_int("JOB_REGISTRY_CACHE_SIZE", 256))
+
+    def __contains__(self, jd_id: str) -> bool:
+        return self.get(jd_id) is not None
+
+    def get(self, jd_id: str) -> Optional[RegisteredJob]:
+        """Return a registered job, or None for unknown or malformed ids"""
+        if not _JD_ID_RE.match(jd_id or ""):
+            return None
+        job = self.cache.get(jd_id)
+        if job is None and self.path:
+            job = self._load(jd_id)
+            if job is not None:
+                self.cache.put(jd_id, job)
+        return job
+
+    def require(self, jd_id: str) -> RegisteredJob:
+        """
+        Return a registered job.
+
+        Raises:
+            JobNotFoundError: If the id is not registered
+        """
+        job = self.get(jd_id)
+        if job is None:
+            raise JobNotFoundError(jd_id)
+        return job
+
+    def put(self, job: RegisteredJob) -> None:
+        """Register or replace a job"""
+        self.cache.put(job.jd_id, job)
+        if self.path:
+            self._save(job)
+        logger.info(f"Registered job description {job.jd_id} ({len(job.requirements)} requirements)")
+
+    def _files(self, jd_id: str) -> Tuple[str, str]:
+        base = os.path.join(self.path, jd_id)
+        return f"{base}.json", f"{base}.npz"
+
+    def _save(self, job: RegisteredJob) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        meta_path, vectors_path = self._files(job.jd_id)
+        vectors = {}
+        if job.embedding is not None:
+            vectors["embedding"] = np.asarray(job.embedding, dtype=np.float32)
+        if job.chunk_embeddings is not None:
+            vectors["chunk_embeddings"] = np.asarray(job.chunk_embeddings, dtype=np.float32)
+        if vectors:
+            # np.savez appends .npz to names without it
+            tmp_vectors = f"{vectors_path}.{os.getpid()}.tmp.npz"
+            np.savez(tmp_vectors, **vectors)
+            os.replace(tmp_vectors, vectors_path)
+
+        meta = {
+            "jd_id": job.jd_id,
+            "text": job.text,
+            "sections": job.sections,
+            "compact": job.compact,
+            "requirements": job.requirements,
+            "nice_to_have": job.nice_to_have,
+            "embedding_model": job.embedding_model,
+            "chunking": list(job.chunking) if job.chunking else None,
+            "created_at": job.created_at
+        }
+        # The metadata is written last, so a job is never visible without its vectors
+        tmp_meta = f"{meta_path}.{os.getpid()}.tmp"
+        with open(tmp_meta, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_meta, meta_path)
+
+    def _load(self, jd_id: str) -> Optional[RegisteredJob]:
+        meta_path, vectors_path = self._files(jd_id)
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            vectors = {}
+            if os.path.exists(vectors_path):
+                with np.load(vectors_path) as data:
+                    vectors = {name: data[name] for name in data.files}
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable job description {jd_id}: {e}")
+            return None
+
+        return RegisteredJob(
+            jd_id=meta["jd_id"],
+            text=meta["text"],
+            sections=meta["sections"],
+            compact=meta["compact"],
+            requirements=meta.get("requirements", []),
+            nice_to_have=meta.get("nice_to_have", []),
+            embedding_model=meta.get("embedding_model"),
+            embedding=vectors.get("embedding"),
+            chunking=tuple(meta["chunking"]) if meta.get("chunking") else None,
+            chunk_embeddings=vectors.get("chunk_embeddings"),
+            created_at=meta.get("created_at", 0.0)
+        )
@@ -0,0 +1,126 @@
+"""
+Process-wide metrics registry.
+"""
+
+import threading
+from typing import Dict, Sequence, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+class Counter:
+    """Monotonically increasing value per label set"""
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_label_key(labels), 0.0)
+
+    def samples(self) -> Dict[LabelKey, float]:
+        with self._lock:
+            return dict(self._values)
+
+class Histogram:
+    """Bucketed distribution of observed values per label set"""
+
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    def __init__(self, name: str, description: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[LabelKey, Tuple[list, float, int]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            entry = self._values.get(_label_key(labels))
+            return entry[2] if entry else 0
+
+    def samples(self) -> Dict[LabelKey, Tuple[list, float, int]]:
+        """Cumulative bucket counts, sum and count per label set"""
+        with self._lock:
+            return {key: (list(counts), total, count) for key, (counts, total, count) in self._values.items()}
+
+class MetricsRegistry:
+    """Named collection of counters and histograms"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, description: str = "") -> Counter:
+        return self._get_or_create(name, lambda: Counter(name, description), Counter)
+
+    def histogram(self, name: str, description: str = "", buckets: Sequence[float] = Histogram.DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(name, lambda: Histogram(name, description, buckets), Histogram)
+
+    def all(self) -> Dict[str, object]:
+        with self._lock:
+            return dict(self._metrics)
+
+    def _get_or_create(self, name, factory, kind):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = factory()
+            elif not isinstance(metric, kind):
+                raise ValueError(f"Metric '{name}' is already registered as {type(metric).__name__}")
+            return metric
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    labels = key + extra
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+def render_prometheus(registry: MetricsRegistry = None) -> str:
+    """Render every metric in the Prometheus text exposition format (version 0.0.4)"""
+    registry = registry or metrics
+    lines = []
+    for name, metric in sorted(registry.all().items()):
+        if metric.description:
+            lines.append(f"# HELP {name} {_escape(metric.description)}")
+        if isinstance(metric, Counter):
+            lines.append(f"# TYPE {name} counter")
+            for key, value in sorted(metric.samples().items()):
+                lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+        else:
+            lines.append(f"# TYPE {name} histogram")
+            for key, (counts, total, count) in sorted(metric.samples().items()):
+                for bound, bucket_count in zip(metric.buckets, counts):
+                    lines.append(f"{name}_bucket{_format_labels(key, (('le', repr(float(bound))),))} {bucket_count}")
+                lines.append(f"{name}_bucket{_format_labels(key, (('le', '+Inf'),))} {count}")
+                lines.append(f"{name}_sum{_format_labels(key)} {_format_value(total)}")
+                lines.append(f"{name}_count{_format_labels(key)} {count}")
+    return "\n".join(lines) + "\n"
+
+# Default registry shared by the whole process
+metrics = MetricsRegistry()
@@ -2,7 +2,42 @@
 Resume Parser Package
 """
 
+import importlib
 from .base_parser import BaseResumeParser
-from .pdf_parser import PDFResumeParser
+from .dispatcher import FormatDispatchParser, TextResumeParser, detect_format
+from .errors import (
+    DocumentParseError, UnsupportedDocumentError,
+    DocumentTooLargeError, PageLimitExceededError
+)
+from .limits import ParseLimits, read_upload
+from .segmenter import segment_document, compact_text
 
-__all__ = ['BaseResumeParser', 'PDFResumeParser'] 
\ No newline at end of file
+__all__ = [
+    'BaseResumeParser',
+    'PDFResumeParser',
+    'PyMuPDFResumeParser',
+    'DOCXResumeParser',
+    'TextResumeParser',
+    'FormatDispatchParser',
+    'detect_format',
+    'DocumentParseError',
+    'UnsupportedDocumentError',
+    'DocumentTooLargeError',
+    'PageLimitExceededError',
+    'ParseLimits',
+    'read_upload',
+    'segment_document',
+    'compact_text'
+]
+
+# Parser backends pull in PyMuPDF, python-docx or Unstructured, so they are imported on first access
+_LAZY = {
+    'PDFResumeParser': '.pdf_parser',
+    'PyMuPDFResumeParser': '.pymupdf_parser',
+    'DOCXResumeParser': '.docx_parser'
+}
+
+def __getattr__(name):
+    if name in _LAZY:
+        return getattr(importlib.import_module(_LAZY[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
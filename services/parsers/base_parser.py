@@ -7,4 +7,12 @@ class BaseResumeParser(ABC):
     @abstractmethod
     async def parse_file(self, file: UploadFile) -> str:
         """Parse the uploaded file and return text content"""
-        pass 
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    async def parse_bytes(self, content: bytes) -> str:
+        """Parse an in-memory document and return text content"""
+        pass
+
+    async def warm_up(self) -> None:
+        """Load the backend's libraries and resources ahead of the first document"""
@@ -0,0 +1,111 @@
+from fastapi import UploadFile
+from typing import Dict
+from .base_parser import BaseResumeParser
+from .errors import UnsupportedDocumentError
+from .limits import ParseLimits, read_upload
+from services.utils import logger
+
+PDF = "pdf"
+DOCX = "docx"
+TEXT = "text"
+
+def detect_format(content: bytes) -> str:
+    """
+    Identify a document format from its leading bytes.
+
+    The upload filename and content type are client-controlled, so they are
+    never consulted.
+
+    Raises:
+        UnsupportedDocumentError: For empty, legacy Office or unknown binary content
+    """
+    if not content:
+        raise UnsupportedDocumentError("Document is empty")
+    # Some generators emit a few junk bytes before the PDF header
+    if b"%PDF-" in content[:1024]:
+        return PDF
+    if content.startswith(b"PK\x03\x04"):
+        # DOCX is a zip package whose part names include word/
+        if b"word/" in content:
+            return DOCX
+        raise UnsupportedDocumentError("Zip archive is not a Word document")
+    if content.startswith(b"\xd0\xcf\x11\xe0"):
+        raise UnsupportedDocumentError("Legacy .doc files are not supported, please upload PDF or DOCX")
+    try:
+        content[:4096].decode("utf-8")
+    except UnicodeDecodeError as e:
+        # A multi-byte character may straddle the cut; only reject real binary
+        if e.start < 4092:
+            raise UnsupportedDocumentError("Unrecognised binary document format") from e
+    return TEXT
+
+def sample_document(document_format: str) -> bytes:
+    """A tiny document of the given format, used to warm up parser backends"""
+    text = "Warm-up document\nSkills: Python"
+    if document_format == PDF:
+        import fitz
+        with fitz.open() as document:
+            document.new_page().insert_text((72, 72), text)
+            return document.tobytes()
+    if document_format == DOCX:
+        from io import BytesIO
+        import docx
+        buffer = BytesIO()
+        document = docx.Document()
+        document.add_paragraph(text)
+        document.save(buffer)
+        return buffer.getvalue()
+    return text.encode("utf-8")
+
+class TextResumeParser(BaseResumeParser):
+    """Parser for plain-text documents"""
+    def __init__(self, limits: ParseLimits = None):
+        self.limits = limits or ParseLimits.from_env()
+
+    async def parse_file(self, file: UploadFile) -> str:
+        return await self.parse_bytes(await read_upload(file, self.limits.max_bytes))
+
+    async def parse_bytes(self, content: bytes) -> str:
+        if self.limits.truncate:
+            # No character can need more than 4 bytes, so skip decoding the rest
+            content = content[:self.limits.max_chars * 4]
+        return self.limits.clip_text(content.decode("utf-8", errors="replace"))
+
+class FormatDispatchParser(BaseResumeParser):
+    """
+    Parser that sniffs each document's format and routes it to a backend.
+
+    Defaults to in-memory backends: PyMuPDF for PDF, python-docx for DOCX
+    and a UTF-8 decode for plain text. Uploads are streamed in chunks and
+    rejected as soon as they exceed ``limits.max_bytes``.
+    """
+    def __init__(self, backends: Dict[str, BaseResumeParser] = None, limits: ParseLimits = None):
+        self.limits = limits or ParseLimits.from_env()
+        if backends is None:
+            from .docx_parser import DOCXResumeParser
+            from .pymupdf_parser import PyMuPDFResumeParser
+            backends = {
+                PDF: PyMuPDFResumeParser(self.limits),
+                DOCX: DOCXResumeParser(self.limits),
+                TEXT: TextResumeParser(self.limits)
+            }
+        self.backends = backends
+
+    async def parse_file(self, file: UploadFile) -> str:
+        """Read the upload once and parse it with the matching backend"""
+        content = await read_upload(file, self.limits.max_bytes)
+        return await self.parse_bytes(content)
+
+    async def parse_bytes(self, content: bytes) -> str:
+        document_format = detect_format(content)
+        backend = self.backends.get(document_format)
+        if backend is None:
+            raise UnsupportedDocumentError(f"No parser configured for {document_format} documents")
+        logger.debug("Parsing %s byte %s document with %s", len(content), document_format, type(backend).__name__)
+        return await backend.parse_bytes(content)
+
+    async def warm_up(self) -> None:
+        """Parse a sample document with every backend so its imports and resources are loaded"""
+        for document_format, backend in self.backends.items():
+            await backend.warm_up()
+            await backend.parse_bytes(sample_document(document_format))
@@ -0,0 +1,49 @@
+from fastapi import UploadFile
+import asyncio
+import zipfile
+from io import BytesIO
+import docx
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+from .base_parser import BaseResumeParser
+from .errors import DocumentParseError
+from .limits import ParseLimits, read_upload
+
+class DOCXResumeParser(BaseResumeParser):
+    """In-memory DOCX text extraction with python-docx"""
+    def __init__(self, limits: ParseLimits = None):
+        self.limits = limits or ParseLimits.from_env()
+
+    async def parse_file(self, file: UploadFile) -> str:
+        """Parse DOCX file and return text content"""
+        content = await read_upload(file, self.limits.max_bytes)
+        return await self.parse_bytes(content)
+
+    async def parse_bytes(self, content: bytes) -> str:
+        """Parse DOCX bytes without touching disk, off the event loop"""
+        return await asyncio.to_thread(self._parse, content)
+
+    def _parse(self, content: bytes) -> str:
+        try:
+            document = docx.Document(BytesIO(content))
+        except (KeyError, ValueError, zipfile.BadZipFile) as e:
+            raise DocumentParseError(f"Could not open DOCX: {e}") from e
+
+        # Walk the body in document order so table rows (common for
+        # skills matrices) stay next to the headings that introduce them
+        lines = []
+        chars = 0
+        for child in document.element.body.iterchildren():
+            tag = child.tag.rsplit('}', 1)[-1]
+            if tag == "p":
+                new_lines = [Paragraph(child, document).text]
+            elif tag == "tbl":
+                new_lines = [" | ".join(cell.text.strip() for cell in row.cells) for row in Table(child, document).rows]
+            else:
+                continue
+            new_lines = [line for line in new_lines if line.strip()]
+            lines.extend(new_lines)
+            chars += sum(len(line) + 1 for line in new_lines)
+            if chars > self.limits.max_chars:
+                break
+        return self.limits.clip_text("\n".join(lines))
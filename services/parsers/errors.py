@@ -0,0 +1,17 @@
+class DocumentParseError(ValueError):
+    """Raised when an uploaded document cannot be parsed"""
+    status_code = 422
+
+    def __init__(self, message: str, document: str = None):
+        super().__init__(message)
+        self.document = document
+
+class UnsupportedDocumentError(DocumentParseError):
+    """Raised when an uploaded document is not in a supported format"""
+
+class DocumentTooLargeError(DocumentParseError):
+    """Raised when an upload exceeds the configured byte limit"""
+    status_code = 413
+
+class PageLimitExceededError(DocumentParseError):
+    """Raised when a document has more pages or characters than allowed"""
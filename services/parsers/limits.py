@@ -0,0 +1,74 @@
+from dataclasses import dataclass
+from fastapi import UploadFile
+from .errors import DocumentTooLargeError, PageLimitExceededError
+from services.utils import env_int, env_str
+
+READ_CHUNK_SIZE = 64 * 1024
+
+@dataclass
+class ParseLimits:
+    """
+    Bounds on how much of an uploaded document is read and parsed.
+
+    Attributes:
+        max_bytes: Largest accepted upload; larger files are rejected while streaming
+        max_pages: Pages parsed per document
+        max_chars: Characters of text extracted per document
+        truncate: Stop quietly at max_pages/max_chars instead of rejecting
+    """
+    max_bytes: int = 10 * 1024 * 1024
+    max_pages: int = 30
+    max_chars: int = 100_000
+    truncate: bool = False
+
+    @classmethod
+    def from_env(cls) -> "ParseLimits":
+        """Build limits from PARSE_MAX_BYTES, PARSE_MAX_PAGES, PARSE_MAX_CHARS and PARSE_LIMIT_MODE"""
+        defaults = cls()
+        return cls(
+            max_bytes=env_int("PARSE_MAX_BYTES", defaults.max_bytes),
+            max_pages=env_int("PARSE_MAX_PAGES", defaults.max_pages),
+            max_chars=env_int("PARSE_MAX_CHARS", defaults.max_chars),
+            truncate=env_str("PARSE_LIMIT_MODE", "reject").lower() == "truncate"
+        )
+
+    def check_pages(self, page_count: int) -> int:
+        """Return how many pages to parse, or raise if the document is too long"""
+        if page_count <= self.max_pages:
+            return page_count
+        if self.truncate:
+            return self.max_pages
+        raise PageLimitExceededError(f"Document has {page_count} pages, the limit is {self.max_pages}")
+
+    def clip_text(self, text: str) -> str:
+        """Apply the character limit to extracted text"""
+        if len(text) <= self.max_chars:
+            return text
+        if self.truncate:
+            return text[:self.max_chars]
+        raise PageLimitExceededError(f"Document has {len(text)} characters of text, the limit is {self.max_chars}")
+
+async def read_upload(file: UploadFile, max_bytes: int, chunk_size: int = READ_CHUNK_SIZE) -> bytes:
+    """
+    Read an upload in chunks, rejecting it as soon as it exceeds ``max_bytes``.
+
+    The declared size is checked first so oversized uploads are refused
+    without reading them at all.
+
+    Raises:
+        DocumentTooLargeError: If the upload is larger than ``max_bytes``
+    """
+    name = file.filename or "upload"
+    declared = getattr(file, "size", None)
+    if declared is not None and declared > max_bytes:
+        raise DocumentTooLargeError(f"{name} is {declared} bytes, the limit is {max_bytes}")
+
+    buffer = bytearray()
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        buffer += chunk
+        if len(buffer) > max_bytes:
+            raise DocumentTooLargeError(f"{name} exceeds the {max_bytes} byte limit")
+    return bytes(buffer)
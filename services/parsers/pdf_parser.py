@@ -1,14 +1,42 @@
 from fastapi import UploadFile
+import asyncio
 import tempfile
 import os
-from langchain.document_loaders import UnstructuredPDFLoader
+import fitz
 from .base_parser import BaseResumeParser
+from .errors import DocumentParseError
+from .limits import ParseLimits, read_upload
+from services.utils import warning_filter
 
 class PDFResumeParser(BaseResumeParser):
+    def __init__(self, limits: ParseLimits = None):
+        self.limits = limits or ParseLimits.from_env()
+
     async def parse_file(self, file: UploadFile) -> str:
         """Parse PDF file and return text content"""
-        content = await file.read()
-        
+        content = await read_upload(file, self.limits.max_bytes)
+        return await self.parse_bytes(content)
+
+    async def parse_bytes(self, content: bytes) -> str:
+        """Parse PDF bytes with Unstructured, off the event loop"""
+        return await asyncio.to_thread(self._parse, content)
+
+    def _parse(self, content: bytes) -> str:
+        # Unstructured is heavy and optional, so it is only imported when this backend is used
+        from langchain.document_loaders import UnstructuredPDFLoader
+        warning_filter.silence_langchain()
+
+        # Unstructured partitions every page it is given, so apply the page limit before handing the file over
+        try:
+            document = fitz.open(stream=content, filetype="pdf")
+        except Exception as e:  # MuPDF raises its own error hierarchy
+            raise DocumentParseError(f"Could not open PDF: {e}") from e
+        with document:
+            page_count = self.limits.check_pages(document.page_count)
+            if page_count < document.page_count:
+                document.select(range(page_count))
+                content = document.tobytes()
+
         # Create a temporary file
         with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp:
             tmp.write(content)
@@ -19,7 +47,7 @@ class PDFResumeParser(BaseResumeParser):
             loader = UnstructuredPDFLoader(tmp_path)
             documents = loader.load()
             text = ' '.join([doc.page_content for doc in documents])
-            return text
+            return self.limits.clip_text(text)
         finally:
             # Clean up temporary file
-            os.unlink(tmp_path) 
\ No newline at end of file
+            os.unlink(tmp_path)
\ No newline at end of file
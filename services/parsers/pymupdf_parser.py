@@ -0,0 +1,39 @@
+from fastapi import UploadFile
+import asyncio
+import fitz
+from .base_parser import BaseResumeParser
+from .errors import DocumentParseError
+from .limits import ParseLimits, read_upload
+
+class PyMuPDFResumeParser(BaseResumeParser):
+    """Fast in-memory PDF text extraction with PyMuPDF"""
+    def __init__(self, limits: ParseLimits = None):
+        self.limits = limits or ParseLimits.from_env()
+
+    async def parse_file(self, file: UploadFile) -> str:
+        """Parse PDF file and return text content"""
+        content = await read_upload(file, self.limits.max_bytes)
+        return await self.parse_bytes(content)
+
+    async def parse_bytes(self, content: bytes) -> str:
+        """Parse PDF bytes without touching disk, off the event loop"""
+        return await asyncio.to_thread(self._parse, content)
+
+    def _parse(self, content: bytes) -> str:
+        try:
+            document = fitz.open(stream=content, filetype="pdf")
+        except Exception as e:  # MuPDF raises its own error hierarchy
+            raise DocumentParseError(f"Could not open PDF: {e}") from e
+        with document:
+            page_count = self.limits.check_pages(document.page_count)
+            pages = []
+            chars = 0
+            for number in range(page_count):
+                text = document[number].get_text()
+                pages.append(text)
+                chars += len(text) + 1
+                # Stop extracting as soon as the character budget is spent
+                if chars > self.limits.max_chars:
+                    break
+            # Form feeds mark page breaks, so the segmenter can recognise running headers and footers
+            return self.limits.clip_text("\f".join(pages))
@@ -0,0 +1,224 @@
+import re
+from collections import Counter
+from typing import Dict, List, Sequence
+from services.tokens import count_tokens, DEFAULT_MODEL
+from services.utils import LRUCache, content_hash
+
+HEADER = "header"
+
+# Heading aliases per section, matched against the start of short lines.
+# Longer aliases are tried first so "nice to have skills" is not read as "skills".
+SECTION_ALIASES = {
+    "summary": ["summary", "professional summary", "profile", "objective", "about me"],
+    "experience": [
+        "experience", "work experience", "professional experience", "employment history",
+        "work history", "career history", "employment"
+    ],
+    "skills": ["skills", "technical skills", "core competencies", "technologies", "tech stack", "tools"],
+    "education": ["education", "academic background", "certifications", "certificates"],
+    "projects": ["projects", "personal projects", "key projects"],
+    "requirements": [
+        "requirements", "required", "required experience", "required skills", "must have",
+        "must have skills", "must-have", "minimum qualifications", "basic qualifications",
+        "qualifications", "what you'll need", "what you will need", "who you are"
+    ],
+    "responsibilities": ["responsibilities", "what you'll do", "what you will do", "the role", "key responsibilities"],
+    "nice_to_have": [
+        "nice to have", "nice-to-have", "preferred", "preferred qualifications", "bonus",
+        "bonus points", "good to have", "pluses"
+    ],
+    "about": ["about us", "about the company", "who we are", "company overview"],
+    # Recognised only so their content can be dropped
+    "boilerplate": ["benefits", "perks", "equal opportunity", "eeo statement", "references"]
+}
+
+RESUME_PRIORITY = ["summary", HEADER, "experience", "skills", "projects", "education", "other"]
+JOB_PRIORITY = [HEADER, "requirements", "responsibilities", "nice_to_have", "skills", "experience", "summary", "education", "other", "about"]
+
+_ALIASES = sorted(
+    ((alias, section) for section, aliases in SECTION_ALIASES.items() for alias in aliases),
+    key=lambda item: len(item[0]),
+    reverse=True
+)
+
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+_URL_RE = re.compile(r"(https?://|www\.|linkedin\.com|github\.com)\S*", re.IGNORECASE)
+_PHONE_RE = re.compile(r"[+(]*\d[\d\s().+-]{8,}\d")
+_CONTACT_LABEL_RE = re.compile(r"\b(tel|phone|mobile|e-?mail|linkedin|github)\s*:?\s*(?=[|,.;]|$)", re.IGNORECASE)
+
+_BOILERPLATE_PATTERNS = [
+    # Link labels left behind by PDF hyperlinks, e.g. "Email LinkedIn"
+    re.compile(r"^((e-?mail|linkedin|github|phone|tel|mobile|portfolio|website)\b[\s|,]*)+$", re.IGNORECASE),
+    re.compile(r"^page\s+\d+(\s+of\s+\d+)?$", re.IGNORECASE),
+    re.compile(r"^\d+$"),  # bare page numbers
+    # Print timestamps such as "Thu May 29 14:40:56 2025"
+    re.compile(r"^(mon|tue|wed|thu|fri|sat|sun)\w*\s+\w+\s+\d{1,2}\s+\d{1,2}:\d{2}(:\d{2})?\s+\d{4}$", re.IGNORECASE),
+    re.compile(r"^\S+\.(pdf|docx?|txt)$", re.IGNORECASE)  # file names stamped by print drivers
+]
+
+_BULLET_RE = re.compile(r"^[•●▪‣⁃◦*·-]+\s*")
+_section_cache = LRUCache(max_size=512)
+
+def normalize_line(line: str) -> str:
+    """Collapse whitespace and normalise bullet characters"""
+    line = re.sub(r"\s+", " ", line).strip()
+    if _BULLET_RE.match(line):
+        line = "- " + _BULLET_RE.sub("", line)
+    return line
+
+def _drop_phone_number(match: re.Match) -> str:
+    # Date ranges such as "2018 - 2020" look like phone numbers; require 10+ digits
+    digits = sum(c.isdigit() for c in match.group())
+    return "" if digits >= 10 else match.group()
+
+def _strip_contact_details(line: str) -> str:
+    """Remove emails, links and phone numbers, keeping the rest of the line"""
+    stripped = _EMAIL_RE.sub("", line)
+    stripped = _URL_RE.sub("", stripped)
+    stripped = _PHONE_RE.sub(_drop_phone_number, stripped)
+    if stripped == line:
+        return line
+    # Drop labels and separators left dangling, e.g. "Tel: . Bengaluru" -> "Bengaluru"
+    stripped = _CONTACT_LABEL_RE.sub("", stripped)
+    stripped = re.sub(r"\s*([|,;.])(\s*[|,;.])+", r"\1", stripped)
+    stripped = stripped.strip(" |,.;:-")
+    return stripped if len(re.sub(r"[\W_]", "", stripped)) >= 3 else ""
+
+def _is_boilerplate(line: str) -> bool:
+    return any(pattern.search(line) for pattern in _BOILERPLATE_PATTERNS)
+
+_TITLE_SMALL_WORDS = {"and", "&", "of", "the", "to", "for", "/"}
+
+def _looks_like_heading(text: str) -> bool:
+    """Whether text is in all caps or title case, such as TECHNICAL SKILLS or Skills and Tools"""
+    words = [word for word in text.split() if word.lower() not in _TITLE_SMALL_WORDS]
+    return bool(words) and (text.isupper() or all(word[0].isupper() or not word[0].isalpha() for word in words))
+
+def _match_heading(line: str):
+    """
+    Return (section, trailing content) if the line is a section heading.
+
+    The text before any colon must be exactly an alias ("Skills",
+    "Must Have Skills:"), or start with one and be formatted as a heading
+    ("TECHNICAL SKILLS & TOOLS"). Bullet items are never headings, so
+    "- Skills in Go and Rust" stays content.
+    """
+    if len(line) > 80 or _BULLET_RE.match(line):
+        return None
+    head, _, rest = line.partition(":")
+    head = head.strip(" #*")
+    candidate = head.lower()
+    if not rest and len(candidate) > 40:
+        return None
+    for alias, section in _ALIASES:
+        if candidate == alias:
+            return section, rest.strip()
+        if candidate.startswith(alias + " ") and len(candidate) <= len(alias) + 15 and _looks_like_heading(head):
+            return section, rest.strip()
+    return None
+
+# Lines at the top and bottom of each page that may be running headers or footers
+_PAGE_EDGE_LINES = 3
+
+def _page_furniture(pages: List[List[str]]) -> set:
+    """Short lines repeated at the edges of at least half the pages (running headers and footers)"""
+    if len(pages) < 2:
+        return set()
+    counts = Counter()
+    for page in pages:
+        counts.update(set(page[:_PAGE_EDGE_LINES] + page[-_PAGE_EDGE_LINES:]))
+    threshold = max(2, (len(pages) + 1) // 2)
+    return {line for line, count in counts.items() if count >= threshold and len(line) < 80}
+
+def segment_document(text: str) -> Dict[str, str]:
+    """
+    Split parsed document text into named sections.
+
+    Whitespace is normalised; contact details, page furniture and short
+    lines repeated at the top or bottom of most pages (running headers and
+    footers, with pages separated by form feeds) are dropped, and content is
+    grouped under the section heading it follows. Text before the first
+    heading goes to ``header``; unrecognised headings go to ``other``.
+    Results are cached by content hash, so repeated documents are only
+    segmented once.
+
+    Returns:
+        Mapping of section name to normalised text, in document order
+    """
+    key = content_hash(text)
+    cached = _section_cache.get(key)
+    if cached is not None:
+        return dict(cached)
+
+    # Parsers separate pages with form feeds; repeats are only furniture at page edges
+    pages = []
+    for page in text.split("\f"):
+        page_lines = [_strip_contact_details(normalize_line(line)) for line in page.splitlines()]
+        pages.append([line for line in page_lines if line])
+    furniture = _page_furniture(pages)
+    lines = []
+    for page in pages:
+        for index, line in enumerate(page):
+            at_edge = index < _PAGE_EDGE_LINES or index >= len(page) - _PAGE_EDGE_LINES
+            if not (at_edge and line in furniture):
+                lines.append(line)
+
+    sections: Dict[str, List[str]] = {}
+    current = HEADER
+    for line in lines:
+        if _is_boilerplate(line):
+            continue
+        heading = _match_heading(line)
+        if heading:
+            current, rest = heading
+            # "Required Experience: 5+ years" is a heading and content at once
+            if rest:
+                sections.setdefault(current, []).append(line)
+            continue
+        sections.setdefault(current, []).append(line)
+
+    sections.pop("boilerplate", None)
+    result = {name: "\n".join(content) for name, content in sections.items() if content}
+    _section_cache.put(key, result)
+    return dict(result)
+
+def compact_text(sections: Dict[str, str], token_budget: int = None, priority: Sequence[str] = RESUME_PRIORITY,
+                 model: str = DEFAULT_MODEL) -> str:
+    """
+    Render sections into a compact prompt representation.
+
+    Sections are emitted in ``priority`` order (anything not listed comes
+    last) until ``token_budget`` is spent; the section that crosses the
+    budget is cut at a line boundary.
+
+    Args:
+        sections: Output of ``segment_document``
+        token_budget: Maximum tokens, or None for no limit
+        priority: Section names from most to least important
+        model: Model whose tokenizer is used for counting
+    """
+    order = [name for name in priority if name in sections]
+    order += [name for name in sections if name not in order]
+
+    parts: List[str] = []
+    used = 0
+    for name in order:
+        title = name.replace("_", " ").upper()
+        block = sections[name] if name == HEADER else f"{title}:\n{sections[name]}"
+        cost = count_tokens(block, model) + 1
+        if token_budget is not None and used + cost > token_budget:
+            remaining = token_budget - used
+            kept = []
+            for line in block.splitlines():
+                line_cost = count_tokens(line, model) + 1
+                if line_cost > remaining:
+                    break
+                kept.append(line)
+                remaining -= line_cost
+            # A lone section title carries no information
+            if len(kept) > 1 or (kept and name == HEADER):
+                parts.append("\n".join(kept))
+            break
+        parts.append(block)
+        used += cost
+    return "\n\n".join(parts)
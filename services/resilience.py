@@ -0,0 +1,288 @@
+"""
+Timeouts, retries, circuit breaking and hedging for upstream calls.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+from services.metrics import metrics
+from services.utils import logger, env_bool, env_float, env_int
+
+T = TypeVar("T")
+
+# OpenAI client errors worth retrying, matched by name so no client import is needed
+_RETRYABLE_ERROR_NAMES = {
+    "APIConnectionError", "APITimeoutError", "RateLimitError",
+    "InternalServerError", "ServiceUnavailableError", "Timeout"
+}
+
+class UpstreamUnavailableError(RuntimeError):
+    """Raised when an upstream's circuit breaker is open"""
+    status_code = 503
+
+    def __init__(self, upstream: str, retry_after: float):
+        super().__init__(f"Upstream '{upstream}' is unavailable, retry in {retry_after:.0f}s")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+def is_retryable(error: BaseException) -> bool:
+    """Timeouts, connection failures, rate limits and 5xx responses are retryable"""
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    if type(error).__name__ in _RETRYABLE_ERROR_NAMES:
+        return True
+    status = getattr(error, "status_code", None) or getattr(error, "http_status", None)
+    return isinstance(status, int) and (status == 429 or status >= 500)
+
+@dataclass
+class ResiliencePolicy:
+    """Per-upstream call policy"""
+    timeout: float = 30.0
+    max_attempts: int = 3
+    backoff_base: float = 0.5
+    backoff_max: float = 8.0
+    failure_threshold: int = 5
+    reset_timeout: float = 30.0
+    hedge: bool = False
+    hedge_min_samples: int = 20
+
+    @classmethod
+    def from_env(cls, upstream: str) -> "ResiliencePolicy":
+        """
+        Read UPSTREAM_* settings, overridable per upstream, e.g. LLM_TIMEOUT or EMBEDDINGS_TIMEOUT.
+        """
+        prefix = upstream.upper()
+        defaults = cls()
+
+        def setting(name, reader, default):
+            return reader(f"{prefix}_{name}", reader(f"UPSTREAM_{name}", default))
+
+        return cls(
+            timeout=setting("TIMEOUT", env_float, defaults.timeout),
+            max_attempts=setting("MAX_ATTEMPTS", env_int, defaults.max_attempts),
+            backoff_base=setting("BACKOFF_BASE", env_float, defaults.backoff_base),
+            backoff_max=setting("BACKOFF_MAX", env_float, defaults.backoff_max),
+            failure_threshold=setting("CIRCUIT_FAILURES", env_int, defaults.failure_threshold),
+            reset_timeout=setting("CIRCUIT_RESET", env_float, defaults.reset_timeout),
+            hedge=setting("HEDGE", env_bool, defaults.hedge),
+            hedge_min_samples=setting("HEDGE_MIN_SAMPLES", env_int, defaults.hedge_min_samples)
+        )
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff before retry number ``attempt`` (1-based)"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+class CircuitBreaker:
+    """
+    Fails fast after ``failure_threshold`` consecutive failures.
+
+    After ``reset_timeout`` seconds one trial call is let through (half
+    open); its success closes the circuit, its failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def retry_after(self) -> float:
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            return max(self.reset_timeout - (self._clock() - self._opened_at), 0.0)
+
+    def allow(self) -> Optional[str]:
+        """
+        Admit a call now, if the circuit lets it through.
+
+        Returns:
+            "closed" for an ordinary call, "trial" when the call holds the
+            half-open trial slot, or None when the call is refused
+        """
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return "closed"
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return "trial"
+            return None
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+            self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """Free the half-open trial slot after the trial call ended without an outcome, e.g. was cancelled"""
+        with self._lock:
+            self._trial_in_flight = False
+
+class LatencyTracker:
+    """Rolling window of successful call latencies"""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+class ResilientCaller:
+    """
+    Runs calls to one upstream under a ResiliencePolicy.
+
+    Every attempt is bounded by ``timeout``. Retryable failures are retried
+    with jittered exponential backoff and counted by the circuit breaker.
+    With hedging enabled, once enough latencies are known a duplicate
+    request is fired when an attempt outlives the p95 latency, and the
+    first result wins. Retries, hedges, timeouts and rejections are
+    recorded in the metrics registry, labelled by upstream.
+    """
+
+    def __init__(self, upstream: str, policy: ResiliencePolicy = None, breaker: CircuitBreaker = None):
+        self.upstream = upstream
+        self.policy = policy or ResiliencePolicy.from_env(upstream)
+        self.breaker = breaker or CircuitBreaker(self.policy.failure_threshold, self.policy.reset_timeout)
+        self.latency = LatencyTracker()
+        self._retries = metrics.counter("upstream_retries_total", "Upstream calls retried after a retryable failure")
+        self._timeouts = metrics.counter("upstream_timeouts_total", "Upstream attempts that exceeded the timeout")
+        self._hedges = metrics.counter("upstream_hedges_total", "Duplicate requests fired after the p95 latency")
+        self._hedge_wins = metrics.counter("upstream_hedge_wins_total", "Hedged requests that finished first")
+        self._rejections = metrics.counter("upstream_circuit_rejections_total", "Calls refused by an open circuit")
+        self._failures = metrics.counter("upstream_failures_total", "Upstream calls that failed after all attempts")
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Call ``fn`` (which creates a fresh awaitable per attempt) under the policy.
+
+        Raises:
+            UpstreamUnavailableError: If the circuit is open
+            Exception: The last error once attempts are exhausted, or any non-retryable error
+        """
+        for attempt in range(1, self.policy.max_attempts + 1):
+            admission = self.breaker.allow()
+            if admission is None:
+                self._rejections.inc(upstream=self.upstream)
+                raise UpstreamUnavailableError(self.upstream, self.breaker.retry_after())
+            try:
+                result = await self._attempt(fn)
+            except asyncio.CancelledError:
+                # A cancelled call says nothing about the upstream, but a cancelled trial must free its slot
+                if admission == "trial":
+                    self.breaker.release_trial()
+                raise
+            except Exception as e:
+                if not is_retryable(e):
+                    # The upstream answered; a bad request says nothing about its health
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                if attempt == self.policy.max_attempts:
+                    self._failures.inc(upstream=self.upstream)
+                    logger.error(f"{self.upstream} call failed after {attempt} attempts: {type(e).__name__}: {e}")
+                    raise
+                delay = self.policy.backoff(attempt)
+                self._retries.inc(upstream=self.upstream)
+                logger.warning(f"{self.upstream} call failed ({type(e).__name__}: {e}), retry {attempt} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+            else:
+                self.breaker.record_success()
+                return result
+
+    async def _attempt(self, fn: Callable[[], Awaitable[T]]) -> T:
+        start = time.perf_counter()
+        hedge_after = self._hedge_delay()
+        try:
+            if hedge_after is None:
+                result = await asyncio.wait_for(fn(), self.policy.timeout)
+            else:
+                result = await asyncio.wait_for(self._hedged(fn, hedge_after), self.policy.timeout)
+        except asyncio.TimeoutError:
+            self._timeouts.inc(upstream=self.upstream)
+            raise
+        self.latency.observe(time.perf_counter() - start)
+        return result
+
+    def _hedge_delay(self) -> Optional[float]:
+        if not self.policy.hedge or len(self.latency) < self.policy.hedge_min_samples:
+            return None
+        return self.latency.percentile(0.95)
+
+    async def _hedged(self, fn: Callable[[], Awaitable[T]], hedge_after: float) -> T:
+        primary = asyncio.ensure_future(fn())
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+            if not done:
+                self._hedges.inc(upstream=self.upstream)
+                tasks.add(asyncio.ensure_future(fn()))
+            while True:
+                done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((task for task in done if task.exception() is None), None)
+                if winner is not None:
+                    if winner is not primary:
+                        self._hedge_wins.inc(upstream=self.upstream)
+                    return winner.result()
+                if not pending:
+                    # Both failed; report the primary's error
+                    return primary.result()
+                tasks = pending
+        finally:
+            for task in tasks:
+                task.cancel()
+
+_callers: Dict[str, ResilientCaller] = {}
+_callers_lock = threading.Lock()
+
+def resilient(upstream: str) -> ResilientCaller:
+    """Process-wide caller for an upstream, so its breaker and latency history are shared"""
+    with _callers_lock:
+        caller = _callers.get(upstream)
+        if caller is None:
+            caller = _callers[upstream] = ResilientCaller(upstream)
+        return caller
+
+def reset_callers() -> None:
+    """Forget every upstream's state, e.g. between tests"""
+    with _callers_lock:
+        _callers.clear()
@@ -0,0 +1,8 @@
+"""
+Retrieval Package
+"""
+
+from .bm25_index import BM25Index, tokenize
+from .fusion import reciprocal_rank_fusion, HybridRetriever
+
+__all__ = ['BM25Index', 'tokenize', 'reciprocal_rank_fusion', 'HybridRetriever']
\ No newline at end of file
@@ -0,0 +1,143 @@
+import json
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+# Keeps tokens such as "c++", "c#", "node.js" and "5+" intact
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it of on or our that the their this to we will with you your
+""".split())
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase and split text into index terms, dropping stopwords"""
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        token = token.rstrip(".")
+        if token and token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+class BM25Index:
+    """
+    Incrementally updatable inverted index with Okapi BM25 scoring.
+
+    Postings are kept as append-only per-term lists and converted to NumPy
+    arrays lazily at query time, so adding a document only touches the
+    postings of its own terms. Removing or re-adding a document tombstones
+    the old entry instead of rewriting postings.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._doc_ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._doc_lengths: List[int] = []
+        self._doc_terms: List[Optional[Tuple[str, ...]]] = []
+        self._postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        self._doc_freq: Counter = Counter()
+        self._total_length = 0
+        self._arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._rows
+
+    def add(self, doc_id: str, text: str) -> None:
+        """Index a document, replacing any previous version with the same id"""
+        if doc_id in self._rows:
+            self.remove(doc_id)
+
+        self._add_counts(doc_id, Counter(tokenize(text)))
+
+    def remove(self, doc_id: str) -> None:
+        """Remove a document from the index"""
+        row = self._rows.pop(doc_id)
+        for term in self._doc_terms[row]:
+            self._doc_freq[term] -= 1
+        self._total_length -= self._doc_lengths[row]
+        self._doc_terms[row] = None
+
+    def search(self, query: str, top_k: int = 10) -> List[Tuple[str, float]]:
+        """
+        Rank indexed documents against a query (e.g. a job description).
+
+        Returns:
+            List of (doc_id, BM25 score) pairs with a positive score, best first
+        """
+        n_docs = len(self._rows)
+        if not n_docs or top_k <= 0:
+            return []
+
+        lengths = np.asarray(self._doc_lengths, dtype=np.float32)
+        avg_length = self._total_length / n_docs or 1.0
+        norm = self.k1 * (1 - self.b + self.b * lengths / avg_length)
+        scores = np.zeros(len(self._doc_ids), dtype=np.float32)
+
+        for term in set(tokenize(query)):
+            df = self._doc_freq.get(term, 0)
+            if df <= 0:
+                continue
+            idf = math.log((n_docs - df + 0.5) / (df + 0.5) + 1.0)
+            rows, tfs = self._term_arrays(term)
+            scores[rows] += idf * tfs * (self.k1 + 1) / (tfs + norm[rows])
+
+        # Tombstoned rows still have postings; mask them out
+        alive = np.fromiter((terms is not None for terms in self._doc_terms), dtype=bool, count=len(self._doc_terms))
+        scores[~alive] = 0.0
+
+        k = min(top_k, int(np.count_nonzero(scores)))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self._doc_ids[i], float(scores[i])) for i in top]
+
+    def save(self, path: str) -> None:
+        """Write the live documents' term counts to a JSON file"""
+        documents = {doc_id: {} for doc_id in self._rows}
+        for term, (rows, tfs) in self._postings.items():
+            for row, tf in zip(rows, tfs):
+                if self._doc_terms[row] is not None:
+                    documents[self._doc_ids[row]][term] = tf
+        with open(path, "w") as f:
+            json.dump({"k1": self.k1, "b": self.b, "documents": documents}, f)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        """Rebuild an index saved with ``save``"""
+        with open(path) as f:
+            data = json.load(f)
+        index = cls(k1=data["k1"], b=data["b"])
+        for doc_id, counts in data["documents"].items():
+            index._add_counts(doc_id, Counter(counts))
+        return index
+
+    def _add_counts(self, doc_id: str, counts: Counter) -> None:
+        row = len(self._doc_ids)
+        self._doc_ids.append(doc_id)
+        self._rows[doc_id] = row
+        length = sum(counts.values())
+        self._doc_lengths.append(length)
+        self._doc_terms.append(tuple(counts))
+        self._total_length += length
+        for term, tf in counts.items():
+            rows, tfs = self._postings.setdefault(term, ([], []))
+            rows.append(row)
+            tfs.append(tf)
+            self._doc_freq[term] += 1
+            self._arrays.pop(term, None)
+
+    def _term_arrays(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            rows, tfs = self._postings[term]
+            arrays = (np.asarray(rows, dtype=np.int64), np.asarray(tfs, dtype=np.float32))
+            self._arrays[term] = arrays
+        return arrays
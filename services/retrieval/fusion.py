@@ -0,0 +1,84 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+from .bm25_index import BM25Index
+from ..embeddings.vector_store import QuantizedEmbeddingStore
+from services.utils import logger
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60,
+                           weights: Optional[Sequence[float]] = None) -> List[Tuple[str, float]]:
+    """
+    Fuse several ranked lists of document ids with reciprocal rank fusion.
+
+    Each document scores ``sum(weight / (k + rank))`` over the lists it
+    appears in (ranks start at 1), so no score normalisation is needed
+    between lexical and semantic rankings.
+
+    Args:
+        rankings: Ranked lists of document ids, best first
+        k: Rank damping constant; 60 is the usual choice
+        weights: Optional per-list weights, defaults to 1.0 each
+
+    Returns:
+        List of (doc_id, fused score) pairs, best first
+    """
+    weights = weights or [1.0] * len(rankings)
+    if len(weights) != len(rankings):
+        raise ValueError(f"Got {len(weights)} weights for {len(rankings)} rankings")
+
+    fused: Dict[str, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + weight / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+class HybridRetriever:
+    """
+    Shortlist resumes for a job description by fusing BM25 and embedding ranks.
+
+    The lexical index catches hard requirements such as "Kubernetes" or
+    "5+ years" that a single cosine score blurs, while the embedding store
+    catches paraphrases. Only the fused shortlist goes on to LLM scoring.
+    """
+
+    def __init__(self, index: BM25Index, store: QuantizedEmbeddingStore, embeddings,
+                 rrf_k: int = 60, weights: Tuple[float, float] = (1.0, 1.0)):
+        """
+        Args:
+            index: BM25 index over parsed resume text
+            store: Embedding store keyed by the same document ids
+            embeddings: Client with ``aembed_query`` used to embed the job description
+            rrf_k: Reciprocal rank fusion damping constant
+            weights: (lexical, semantic) weights for the fusion
+        """
+        self.index = index
+        self.store = store
+        self.embeddings = embeddings
+        self.rrf_k = rrf_k
+        self.weights = weights
+
+    async def add(self, doc_id: str, text: str, embedding: Sequence[float] = None) -> None:
+        """Index a parsed resume in both the lexical index and the embedding store, replacing an earlier version"""
+        if embedding is None:
+            embedding = await self.embeddings.aembed_query(text)
+        self.store.add([doc_id], [embedding], replace=True)
+        self.index.add(doc_id, text)
+
+    async def shortlist(self, job_text: str, top_k: int = 50, candidates: int = 200) -> List[Tuple[str, float]]:
+        """
+        Return the ``top_k`` best candidates for a job description.
+
+        Args:
+            job_text: Parsed job description text
+            top_k: Size of the shortlist
+            candidates: Depth of each ranking fed into the fusion
+        """
+        lexical = self.index.search(job_text, top_k=candidates)
+        query = await self.embeddings.aembed_query(job_text)
+        semantic = self.store.search(query, top_k=candidates)
+
+        fused = reciprocal_rank_fusion(
+            [[doc_id for doc_id, _ in lexical], [doc_id for doc_id, _ in semantic]],
+            k=self.rrf_k,
+            weights=list(self.weights)
+        )
+        logger.info(f"Hybrid shortlist: {len(lexical)} lexical and {len(semantic)} semantic candidates fused into {min(top_k, len(fused))}")
+        return fused[:top_k]
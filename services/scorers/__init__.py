@@ -4,5 +4,6 @@ Resume Scorer Package
 
 from .base_scorer import BaseLLMScorer
 from .chatgpt_scorer import ChatGPTScorer
+from .profiler import ResumeProfiler, parse_profile, render_profile
 
-__all__ = ['BaseLLMScorer', 'ChatGPTScorer'] 
\ No newline at end of file
+__all__ = ['BaseLLMScorer', 'ChatGPTScorer', 'ResumeProfiler', 'parse_profile', 'render_profile'] 
\ No newline at end of file
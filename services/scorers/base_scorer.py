@@ -7,4 +7,7 @@ class BaseLLMScorer(ABC):
     @abstractmethod
     async def score(self, resume_text: str, job_text: str) -> Tuple[float, str]:
         """Score resume against job description and return score with explanation"""
-        pass 
\ No newline at end of file
+        pass
+
+    async def warm_up(self) -> None:
+        """Open upstream connections ahead of the first request"""
@@ -1,16 +1,30 @@
-from langchain.chat_models import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate, SystemMessagePromptTemplate, HumanMessagePromptTemplate
-from typing import Tuple
+import logging
+import time
+from typing import Any, Dict, List, Tuple
 from .base_scorer import BaseLLMScorer
-from dotenv import load_dotenv
-from services.utils import logger
-
-# Load environment variables (needed for OpenAI API key)
-load_dotenv()
+from services.cassette import get_cassette
+from services.parsers.segmenter import JOB_PRIORITY
+from services.tokens import count_tokens, count_message_tokens, fit_text_to_budget
+from services.resilience import resilient
+from services.usage import record_usage
+from services.utils import logger, env_int, load_env, warning_filter
 
 class ChatGPTScorer(BaseLLMScorer):
-    def __init__(self):
-        self.llm = ChatOpenAI(temperature=0.3)
+    def __init__(self, max_input_tokens: int = None):
+        """
+        Args:
+            max_input_tokens: Prompt token budget per call (env LLM_MAX_INPUT_TOKENS)
+        """
+        from langchain.chat_models import ChatOpenAI
+        from langchain.prompts import ChatPromptTemplate, SystemMessagePromptTemplate, HumanMessagePromptTemplate
+        warning_filter.silence_langchain()
+        
+        # Load environment variables (needed for OpenAI API key)
+        load_env()
+        # Retries and timeouts are handled by services.resilience
+        self.llm = ChatOpenAI(temperature=0.3, max_retries=0)
+        self.model_name = self.llm.model_name
+        self.max_input_tokens = max_input_tokens or env_int("LLM_MAX_INPUT_TOKENS", 6000)
         
         # System message template for scoring
         self.score_system_template = """You are an experienced technical recruiter with expertise in assessing candidates for engineering/software development roles. You always evaluate profiles realistically with your experience, leaving room for everyone to learn some skills on the job. But you also know that some required skills, experience and leadership exposure are must to even begin with. You avoid generic praise and base your scores only on factual evidence from the resume compared to the job description. Try to make safe deductions from the resume and the job description. For example, resume's don't exactly always mention the total work experience of a person, so you will have to calculate the total work experience and experience specifically managing people by looking at the various jobs held by the candidate and adding them and then compare with what the jd is asking."""
@@ -93,27 +107,35 @@ Rationale: [Brief assessment of evaluation completeness, NOT the candidate's fit
             Tuple of (score, explanation)
         """
         logger.debug("=== ChatGPT Scoring Request ===")
-        logger.debug(f"Context: {context}")
-        logger.debug(f"Resume:\n{resume[:100]}...(truncated)")
-        logger.debug(f"Job description:\n{job_description[:100]}...(truncated)")
+        logger.debug("Context: %s", context)
+        logger.debug("Resume:\n%s...(truncated)", resume[:100])
+        logger.debug("Job description:\n%s...(truncated)", job_description[:100])
         
         messages = self.score_prompt.format_messages(
             resume=resume,
             job_description=job_description,
             context=context
         )
+        prompt_tokens = count_message_tokens(messages, self.model_name)
+        if prompt_tokens > self.max_input_tokens:
+            resume, job_description = self._fit_inputs(prompt_tokens, resume, job_description)
+            messages = self.score_prompt.format_messages(
+                resume=resume,
+                job_description=job_description,
+                context=context
+            )
         
         # Log the exact prompt being sent
-        logger.debug("=== ChatGPT Prompt ===")
-        for msg in messages:
-            logger.debug(f"Role: {msg.type}")
-            logger.debug(f"Content:\n{msg.content[:50]}...(truncated)...{msg.content[-50:]}\n")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("=== ChatGPT Prompt ===")
+            for msg in messages:
+                logger.debug("Role: %s", msg.type)
+                logger.debug("Content:\n%s...(truncated)...%s\n", msg.content[:50], msg.content[-50:])
         
-        response = await self.llm.ainvoke(messages)
-        response_text = response.content
+        response_text = await self._invoke(messages)
         
         logger.debug("=== ChatGPT Response ===")
-        logger.debug(f"{response_text}\n")
+        logger.debug("%s\n", response_text)
         
         # Parse response
         lines = response_text.split('\n')
@@ -124,8 +146,8 @@ Rationale: [Brief assessment of evaluation completeness, NOT the candidate's fit
         # Keep the full rationale including "Strengths:" and "Gaps:" prefixes
         rationale = rationale_line.replace('Rationale:', '').strip()
         
-        logger.debug(f"Parsed score: {score}")
-        logger.debug(f"Parsed rationale: {rationale}")
+        logger.debug("Parsed score: %s", score)
+        logger.debug("Parsed rationale: %s", rationale)
         
         return score, rationale
     
@@ -142,24 +164,33 @@ Rationale: [Brief assessment of evaluation completeness, NOT the candidate's fit
             Score of 90+ indicates the evaluation is complete enough
         """
         logger.debug("=== ChatGPT Evaluation Completeness Request ===")
-        logger.debug(f"Current evaluation:\n{evaluation[:100]}...(truncated)")
+        logger.debug("Current evaluation:\n%s...(truncated)", evaluation[:100])
         
         messages = self.eval_prompt.format_messages(
             text_to_evaluate=evaluation,
             job_description=job_description
         )
+        prompt_tokens = count_message_tokens(messages, self.model_name)
+        if prompt_tokens > self.max_input_tokens:
+            available = self.max_input_tokens - (prompt_tokens - count_tokens(job_description, self.model_name))
+            job_description = fit_text_to_budget(job_description, max(available, 0), priority=JOB_PRIORITY, model=self.model_name)
+            logger.warning(f"Evaluation prompt of {prompt_tokens} tokens exceeds budget of {self.max_input_tokens}, job description truncated")
+            messages = self.eval_prompt.format_messages(
+                text_to_evaluate=evaluation,
+                job_description=job_description
+            )
         
         # Log the exact prompt being sent
-        logger.debug("=== ChatGPT Evaluation Prompt ===")
-        for msg in messages:
-            logger.debug(f"Role: {msg.type}")
-            logger.debug(f"Content:\n{msg.content[:50]}...(truncated)...{msg.content[-50:]}\n")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("=== ChatGPT Evaluation Prompt ===")
+            for msg in messages:
+                logger.debug("Role: %s", msg.type)
+                logger.debug("Content:\n%s...(truncated)...%s\n", msg.content[:50], msg.content[-50:])
         
-        response = await self.llm.ainvoke(messages)
-        response_text = response.content
+        response_text = await self._invoke(messages)
         
         logger.debug("=== ChatGPT Evaluation Response ===")
-        logger.debug(f"{response_text[:50]}...(truncated)...{response_text[-50:]}\n")
+        logger.debug("%s...(truncated)...%s\n", response_text[:50], response_text[-50:])
         
         # Parse response
         lines = response_text.split('\n')
@@ -169,7 +200,65 @@ Rationale: [Brief assessment of evaluation completeness, NOT the candidate's fit
         score = float(score_line.split(':')[1].strip())
         rationale = rationale_line.split(':')[1].strip()
         
-        logger.debug(f"Parsed evaluation score: {score}")
-        logger.debug(f"Parsed evaluation rationale: {rationale}")
+        logger.debug("Parsed evaluation score: %s", score)
+        logger.debug("Parsed evaluation rationale: %s", rationale)
         
-        return score, rationale 
\ No newline at end of file
+        return score, rationale
+
+    def _fit_inputs(self, prompt_tokens: int, resume: str, job_description: str) -> Tuple[str, str]:
+        """
+        Shrink the resume and job description so the prompt fits the budget.
+
+        The job description keeps its full length unless the resume would
+        then get less than two thirds of the space left by the template;
+        the resume loses the sections least relevant to the job first.
+        """
+        resume_tokens = count_tokens(resume, self.model_name)
+        job_tokens = count_tokens(job_description, self.model_name)
+        available = max(self.max_input_tokens - (prompt_tokens - resume_tokens - job_tokens), 0)
+
+        resume_budget = min(resume_tokens, max(available - job_tokens, available * 2 // 3))
+        job_budget = available - resume_budget
+        job_description = fit_text_to_budget(job_description, job_budget, priority=JOB_PRIORITY, model=self.model_name)
+        resume = fit_text_to_budget(resume, available - count_tokens(job_description, self.model_name),
+                                    reference=job_description, model=self.model_name)
+
+        logger.warning(f"Scoring prompt of {prompt_tokens} tokens exceeds budget of {self.max_input_tokens}, least relevant sections dropped")
+        return resume, job_description
+
+    async def warm_up(self) -> None:
+        """
+        Open the client's connection pool by listing models, which costs no tokens.
+        """
+        # langchain keeps the OpenAI client behind the completions resource
+        client = getattr(getattr(self.llm, "async_client", None), "_client", None)
+        if client is not None:
+            await client.models.list()
+
+    async def _invoke(self, messages: List) -> str:
+        """Call the model and record token usage, latency and cost"""
+        return await invoke_chat(self.llm, messages, self.model_name)
+
+async def invoke_chat(llm, messages: List, model_name: str) -> str:
+    """Call a chat model under the LLM resilience policy and record token usage, latency and cost"""
+    async def make_call() -> Dict[str, Any]:
+        response = await resilient("llm").call(lambda: llm.ainvoke(messages))
+        # Prefer the usage reported by the API when the client exposes it
+        metadata = getattr(response, "response_metadata", None)
+        token_usage = (metadata.get("token_usage") if isinstance(metadata, dict) else None) or {}
+        return {"content": response.content, "token_usage": token_usage}
+
+    request = {
+        "model": model_name,
+        "temperature": getattr(llm, "temperature", None),
+        "messages": [[message.type, message.content] for message in messages]
+    }
+    start = time.perf_counter()
+    response, replayed = await get_cassette().fetch("chat", request, make_call)
+    latency = time.perf_counter() - start
+    response_text = response["content"]
+    token_usage = response["token_usage"]
+    prompt_tokens = token_usage.get("prompt_tokens") or count_message_tokens(messages, model_name)
+    completion_tokens = token_usage.get("completion_tokens") or count_tokens(response_text, model_name)
+    record_usage(model_name, prompt_tokens, completion_tokens, latency, replayed=replayed)
+    return response_text
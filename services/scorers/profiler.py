@@ -0,0 +1,233 @@
+import asyncio
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from .chatgpt_scorer import invoke_chat
+from services.usage import RequestUsage, attribute_usage, track_usage
+from services.utils import logger, env_int, env_str, content_hash, load_env, warning_filter, LRUCache
+
+# Bump when the prompt or schema changes so stale cached profiles are ignored
+PROFILE_VERSION = 1
+
+_profile_cache = LRUCache(max_size=1024)
+# Running extractions and the usage they collect, by cache key
+_inflight: Dict[str, Tuple[asyncio.Future, RequestUsage]] = {}
+
+def _forget_inflight(key: str, task: asyncio.Future) -> None:
+    if _inflight.get(key, (None, None))[0] is task:
+        del _inflight[key]
+    # Every waiter may have gone; mark the outcome as retrieved
+    if not task.cancelled():
+        task.exception()
+
+class ResumeProfiler:
+    """
+    Distils a resume into a compact structured profile with one LLM call.
+
+    The profile (roles with dates, total and people-management years,
+    skills, education) replaces the raw resume in scoring prompts, so a
+    candidate scored against many openings is only read in full once.
+    Profiles are cached in memory by document hash and, when ``cache_dir``
+    is set, on disk as JSON so they survive restarts.
+    """
+
+    def __init__(self, llm=None, cache_dir: str = None, max_skills: int = None):
+        """
+        Args:
+            llm: Chat model, defaults to a deterministic ChatOpenAI
+            cache_dir: Directory for persisted profiles (env RESUME_PROFILE_CACHE_DIR)
+            max_skills: Skills kept in the rendered profile (env RESUME_PROFILE_MAX_SKILLS)
+        """
+        from langchain.prompts import ChatPromptTemplate, SystemMessagePromptTemplate, HumanMessagePromptTemplate
+        warning_filter.silence_langchain()
+        if llm is None:
+            from langchain.chat_models import ChatOpenAI
+            load_env()
+            llm = ChatOpenAI(temperature=0, max_retries=0)
+        self.llm = llm
+        self.model_name = getattr(self.llm, "model_name", "gpt-3.5-turbo")
+        self.cache_dir = cache_dir or env_str("RESUME_PROFILE_CACHE_DIR", "") or None
+        self.max_skills = max_skills or env_int("RESUME_PROFILE_MAX_SKILLS", 40)
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+        self.system_template = """You extract facts from resumes into JSON for a recruiting system. Only use information stated in the resume. Compute durations from the dates given, treating "present" or "current" as {today}. Never invent employers, dates or skills."""
+
+        self.human_template = """Extract a profile from the resume below and reply with a single JSON object and nothing else, using exactly these keys:
+
+{{"current_title": string or null,
+ "roles": [{{"title": string, "company": string, "start": "YYYY-MM" or null, "end": "YYYY-MM" or "present" or null, "years": number, "managed_people": true or false}}],
+ "total_years": number,
+ "management_years": number,
+ "skills": [string],
+ "education": [string]}}
+
+List roles most recent first. "management_years" counts only time spent managing people. Keep skills as short canonical names without duplicates.
+
+Resume:
+{resume}"""
+
+        self.prompt = ChatPromptTemplate.from_messages([
+            SystemMessagePromptTemplate.from_template(self.system_template),
+            HumanMessagePromptTemplate.from_template(self.human_template)
+        ])
+
+    def cache_key(self, resume_text: str) -> str:
+        return content_hash(f"v{PROFILE_VERSION}:{self.model_name}:{resume_text}")
+
+    async def profile(self, resume_text: str) -> Dict[str, Any]:
+        """
+        Return the structured profile of a resume, extracting it on a cache miss.
+
+        Concurrent requests for the same resume share a single LLM call, and
+        each of them reports that call's usage; the metrics count it once.
+
+        Raises:
+            ValueError: If the model reply is not a usable profile
+        """
+        key = self.cache_key(resume_text)
+        cached = self._load(key)
+        if cached is not None:
+            logger.debug("Resume profile cache hit for %s", key[:12])
+            return cached
+
+        # The extraction runs as its own task, so a waiter that goes away (e.g. a client
+        # disconnect) does not cancel it for the others
+        entry = _inflight.get(key)
+        if entry is None:
+            usage = RequestUsage()
+            task = asyncio.ensure_future(self._extract_and_store(key, resume_text, usage))
+            entry = _inflight[key] = (task, usage)
+            task.add_done_callback(lambda done: _forget_inflight(key, done))
+        task, usage = entry
+        try:
+            return await asyncio.shield(task)
+        finally:
+            # The task would otherwise bill the whole call to the request that started it
+            if task.done():
+                attribute_usage(usage)
+
+    async def _extract_and_store(self, key: str, resume_text: str, usage: RequestUsage) -> Dict[str, Any]:
+        with track_usage(usage):
+            profile = await self._extract(resume_text)
+        self._store(key, profile)
+        return profile
+
+    async def _extract(self, resume_text: str) -> Dict[str, Any]:
+        from datetime import date
+        messages = self.prompt.format_messages(resume=resume_text, today=date.today().strftime("%Y-%m"))
+        response_text = await invoke_chat(self.llm, messages, self.model_name)
+        profile = parse_profile(response_text)
+        logger.info(f"Extracted resume profile: {len(profile['roles'])} roles, {profile['total_years']} years, {len(profile['skills'])} skills")
+        return profile
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        profile = _profile_cache.get(key)
+        if profile is None and self.cache_dir:
+            path = os.path.join(self.cache_dir, f"{key}.json")
+            try:
+                with open(path, encoding="utf-8") as f:
+                    profile = json.load(f)
+                _profile_cache.put(key, profile)
+            except FileNotFoundError:
+                return None
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable cached profile {path}: {e}")
+                return None
+        return profile
+
+    def _store(self, key: str, profile: Dict[str, Any]) -> None:
+        _profile_cache.put(key, profile)
+        if self.cache_dir:
+            path = os.path.join(self.cache_dir, f"{key}.json")
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(profile, f)
+            os.replace(tmp_path, path)
+
+    def render(self, profile: Dict[str, Any]) -> str:
+        """Render a profile as the compact text used in scoring prompts"""
+        return render_profile(profile, max_skills=self.max_skills)
+
+def _number(value, default: float = 0.0) -> float:
+    try:
+        return round(float(value), 1)
+    except (TypeError, ValueError):
+        return default
+
+def _strings(values) -> List[str]:
+    if not isinstance(values, list):
+        return []
+    seen = {}
+    for value in values:
+        if isinstance(value, str) and value.strip():
+            seen.setdefault(value.strip().lower(), value.strip())
+    return list(seen.values())
+
+def parse_profile(response_text: str) -> Dict[str, Any]:
+    """
+    Parse and normalise a profile from a model reply.
+
+    Tolerates code fences and prose around the JSON object; missing numeric
+    totals are summed from the roles.
+
+    Raises:
+        ValueError: If no JSON object with a list of roles is found
+    """
+    match = re.search(r"\{.*\}", response_text, re.DOTALL)
+    if not match:
+        raise ValueError("Profile reply contains no JSON object")
+    data = json.loads(match.group())
+    if not isinstance(data, dict) or not isinstance(data.get("roles", []), list):
+        raise ValueError("Profile reply is not a profile object")
+
+    roles = []
+    for role in data.get("roles", []):
+        if not isinstance(role, dict):
+            continue
+        roles.append({
+            "title": str(role.get("title") or "").strip(),
+            "company": str(role.get("company") or "").strip(),
+            "start": role.get("start"),
+            "end": role.get("end"),
+            "years": _number(role.get("years")),
+            "managed_people": bool(role.get("managed_people"))
+        })
+
+    total_years = data.get("total_years")
+    management_years = data.get("management_years")
+    return {
+        "current_title": data.get("current_title") or (roles[0]["title"] if roles else None),
+        "roles": roles,
+        "total_years": _number(total_years) if total_years is not None else round(sum(r["years"] for r in roles), 1),
+        "management_years": (
+            _number(management_years) if management_years is not None
+            else round(sum(r["years"] for r in roles if r["managed_people"]), 1)
+        ),
+        "skills": _strings(data.get("skills")),
+        "education": _strings(data.get("education"))
+    }
+
+def render_profile(profile: Dict[str, Any], max_skills: int = 40) -> str:
+    """Render a parsed profile as compact prompt text"""
+    lines = []
+    if profile.get("current_title"):
+        lines.append(f"Current title: {profile['current_title']}")
+    lines.append(f"Total experience: {profile['total_years']} years (people management: {profile['management_years']} years)")
+    if profile["roles"]:
+        lines.append("Roles:")
+        for role in profile["roles"]:
+            period = f"{role['start'] or '?'} to {role['end'] or '?'}"
+            managed = ", managed people" if role["managed_people"] else ""
+            company = f", {role['company']}" if role["company"] else ""
+            lines.append(f"- {role['title']}{company} ({period}, {role['years']} years{managed})")
+    if profile["skills"]:
+        lines.append("Skills: " + ", ".join(profile["skills"][:max_skills]))
+    if profile["education"]:
+        lines.append("Education: " + "; ".join(profile["education"]))
+    return "\n".join(lines)
+
+def clear_profile_cache() -> None:
+    """Drop in-memory profiles, e.g. between tests"""
+    _profile_cache.clear()
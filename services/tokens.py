@@ -0,0 +1,101 @@
+"""
+Local token counting and prompt budgeting.
+"""
+
+import math
+from typing import Dict, Iterable, List, Optional, Sequence
+from services.utils import LRUCache, logger
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - falls back to the character heuristic
+    tiktoken = None
+
+DEFAULT_MODEL = "gpt-3.5-turbo"
+
+# Per-message framing tokens added by the chat completions API
+_TOKENS_PER_MESSAGE = 4
+_TOKENS_PER_REPLY = 3
+
+_encodings = LRUCache(max_size=16)
+_UNAVAILABLE = object()
+
+def _encoding(model: str):
+    """tiktoken encoding for a model, or None when it cannot be loaded"""
+    if tiktoken is None:
+        return None
+    encoding = _encodings.get(model)
+    if encoding is None:
+        try:
+            try:
+                encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            # tiktoken downloads its BPE files on first use; offline it cannot
+            logger.warning(f"tiktoken encoding for {model} unavailable ({type(e).__name__}), estimating token counts")
+            encoding = _UNAVAILABLE
+        _encodings.put(model, encoding)
+    return None if encoding is _UNAVAILABLE else encoding
+
+def count_tokens(text: str, model: str = DEFAULT_MODEL) -> int:
+    """
+    Count tokens locally, without calling the API.
+
+    Uses tiktoken when it is installed and otherwise estimates roughly four
+    characters per token, which is close for English prose.
+    """
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+def decode_tokens(tokens: Sequence[int], model: str = DEFAULT_MODEL) -> Optional[str]:
+    """Turn token ids back into text, or None when no tokenizer is available"""
+    encoding = _encoding(model)
+    return encoding.decode(list(tokens)) if encoding is not None else None
+
+def count_message_tokens(messages: Iterable, model: str = DEFAULT_MODEL) -> int:
+    """Count prompt tokens for a list of chat messages (objects with ``content``)"""
+    total = _TOKENS_PER_REPLY
+    for message in messages:
+        total += _TOKENS_PER_MESSAGE + count_tokens(message.content, model)
+    return total
+
+def _relevance(section_text: str, reference_terms: set) -> float:
+    from services.retrieval import tokenize
+    terms = set(tokenize(section_text))
+    if not terms:
+        return 0.0
+    return len(terms & reference_terms) / math.sqrt(len(terms))
+
+def fit_text_to_budget(text: str, budget: int, reference: Optional[str] = None,
+                       priority: Optional[Sequence[str]] = None, model: str = DEFAULT_MODEL) -> str:
+    """
+    Shrink a document to ``budget`` tokens by dropping its least relevant sections.
+
+    The document is segmented and its sections ranked by term overlap with
+    ``reference`` (typically the job description); without a reference the
+    ``priority`` order is used (resume priority by default). The lowest
+    ranked sections are dropped until the rest fits, and the remainder is
+    rendered most relevant first, cut at a line boundary if needed.
+    """
+    if count_tokens(text, model) <= budget:
+        return text
+
+    from services.parsers.segmenter import segment_document, compact_text, HEADER, RESUME_PRIORITY
+    sections = segment_document(text)
+    if reference:
+        from services.retrieval import tokenize
+        reference_terms = set(tokenize(reference))
+        scores: Dict[str, float] = {name: _relevance(body, reference_terms) for name, body in sections.items()}
+        # The header holds the candidate's title, keep it whenever possible
+        scores[HEADER] = math.inf
+        order: List[str] = sorted(sections, key=lambda name: scores[name], reverse=True)
+    else:
+        order = [name for name in (priority or RESUME_PRIORITY) if name in sections]
+        order += [name for name in sections if name not in order]
+
+    return compact_text(sections, token_budget=budget, priority=order, model=model)
@@ -0,0 +1,105 @@
+"""
+Timing spans for workflow runs and nodes, recorded as metrics and optionally exported as JSON lines.
+"""
+
+import json
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+from services.context import current_request_id
+from services.metrics import metrics
+from services.utils import logger, env_str
+
+_span_duration = metrics.histogram(
+    "workflow_span_duration_seconds", "Duration of workflow runs and nodes",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+)
+_spans_total = metrics.counter("workflow_spans_total", "Workflow runs and nodes, by outcome")
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex
+
+class SpanExporter:
+    """Appends finished spans to a file, one JSON object per line"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span: Dict[str, Any]) -> None:
+        line = json.dumps(span, default=str)
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError as e:
+            logger.warning(f"Could not export span to {self.path}: {e}")
+
+_exporter: Optional[SpanExporter] = None
+_exporter_configured = False
+_exporter_lock = threading.Lock()
+
+def get_exporter() -> Optional[SpanExporter]:
+    """Exporter for the file named by TRACE_EXPORT_FILE, or None when unset"""
+    global _exporter, _exporter_configured
+    with _exporter_lock:
+        if not _exporter_configured:
+            path = env_str("TRACE_EXPORT_FILE", "")
+            _exporter = SpanExporter(path) if path else None
+            _exporter_configured = True
+        return _exporter
+
+def set_exporter(exporter: Optional[SpanExporter]) -> None:
+    """Replace the exporter, e.g. in tests; None disables exporting"""
+    global _exporter, _exporter_configured
+    with _exporter_lock:
+        _exporter = exporter
+        _exporter_configured = True
+
+class Span:
+    """A timed unit of work; set ``outcome`` or ``attributes`` before it ends"""
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self.name = name
+        self.attributes = attributes
+        self.outcome = "ok"
+        self.start = time.time()
+        self.duration: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "request_id": current_request_id.get(),
+            "start": self.start,
+            "duration_seconds": self.duration,
+            "outcome": self.outcome,
+            **self.attributes
+        }
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Span]:
+    """
+    Time a block of work.
+
+    The duration is observed in ``workflow_span_duration_seconds`` and
+    counted in ``workflow_spans_total``, both labelled by span name and
+    outcome ("ok", "error", or whatever the block set). With an exporter
+    configured the span is also written out together with the current
+    request id and the given attributes.
+    """
+    current = Span(name, attributes)
+    started = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.outcome = "error"
+        current.attributes.setdefault("error", type(e).__name__)
+        raise
+    finally:
+        current.duration = time.perf_counter() - started
+        _span_duration.observe(current.duration, span=name, outcome=current.outcome)
+        _spans_total.inc(span=name, outcome=current.outcome)
+        exporter = get_exporter()
+        if exporter is not None:
+            exporter.export(current.to_dict())
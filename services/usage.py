@@ -0,0 +1,126 @@
+"""
+Token, latency and cost accounting for upstream model calls.
+"""
+
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional, Tuple
+from services.context import current_node
+from services.metrics import metrics
+from services.utils import logger
+
+# USD per 1K (input, output) tokens; the longest matching prefix wins
+PRICES_PER_1K: Dict[str, Tuple[float, float]] = {
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+    "gpt-4o-mini": (0.00015, 0.0006),
+    "gpt-4o": (0.0025, 0.01),
+    "gpt-4-turbo": (0.01, 0.03),
+    "gpt-4": (0.03, 0.06),
+    "text-embedding-ada-002": (0.0001, 0.0),
+    "text-embedding-3-small": (0.00002, 0.0),
+    "text-embedding-3-large": (0.00013, 0.0)
+}
+
+_tokens_total = metrics.counter("llm_tokens_total", "Tokens sent to and received from upstream models")
+_cost_total = metrics.counter("llm_cost_usd_total", "Estimated upstream model cost in USD")
+_calls_total = metrics.counter("llm_calls_total", "Upstream model calls")
+_call_latency = metrics.histogram("llm_call_latency_seconds", "Upstream model call latency")
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int = 0) -> float:
+    """Estimate the USD cost of a call from the price table (0 for unknown models)"""
+    matches = [name for name in PRICES_PER_1K if model and model.startswith(name)]
+    if not matches:
+        return 0.0
+    input_price, output_price = PRICES_PER_1K[max(matches, key=len)]
+    return (prompt_tokens * input_price + completion_tokens * output_price) / 1000
+
+class RequestUsage:
+    """Accumulates usage for one workflow run, broken down by node"""
+
+    def __init__(self):
+        self.nodes: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, node: str, prompt_tokens: int, completion_tokens: int, latency: float, cost: float) -> None:
+        with self._lock:
+            entry = self.nodes.setdefault(node, {
+                "calls": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                "latency_seconds": 0.0, "cost_usd": 0.0
+            })
+            entry["calls"] += 1
+            entry["prompt_tokens"] += prompt_tokens
+            entry["completion_tokens"] += completion_tokens
+            entry["latency_seconds"] += latency
+            entry["cost_usd"] += cost
+
+    def merge(self, other: "RequestUsage") -> None:
+        """Add another collection's per-node usage to this one"""
+        with other._lock:
+            nodes = {name: dict(entry) for name, entry in other.nodes.items()}
+        with self._lock:
+            for name, entry in nodes.items():
+                mine = self.nodes.setdefault(name, {key: 0 for key in entry})
+                for key, value in entry.items():
+                    mine[key] += value
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals plus the per-node breakdown, ready to return in a response"""
+        with self._lock:
+            nodes = {name: dict(entry) for name, entry in self.nodes.items()}
+        total = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "latency_seconds": 0.0, "cost_usd": 0.0}
+        for entry in nodes.values():
+            for key in total:
+                total[key] += entry[key]
+        for entry in [total, *nodes.values()]:
+            entry["latency_seconds"] = round(entry["latency_seconds"], 4)
+            entry["cost_usd"] = round(entry["cost_usd"], 6)
+        return {**total, "nodes": nodes}
+
+_current_usage: ContextVar[Optional[RequestUsage]] = ContextVar("current_usage", default=None)
+
+@contextmanager
+def track_usage(usage: RequestUsage = None) -> Iterator[RequestUsage]:
+    """Collect usage of every upstream call made inside the block, into ``usage`` when given"""
+    usage = usage if usage is not None else RequestUsage()
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+
+def attribute_usage(shared: RequestUsage) -> None:
+    """
+    Add usage collected elsewhere, e.g. by a call shared between requests,
+    to the current request. The metrics already counted it and are left alone.
+    """
+    usage = _current_usage.get()
+    if usage is not None and usage is not shared:
+        usage.merge(shared)
+
+def record_usage(model: str, prompt_tokens: int, completion_tokens: int, latency: float,
+                 replayed: bool = False) -> float:
+    """
+    Record one upstream call against the current node and request.
+
+    A call ``replayed`` from a cassette still counts its tokens but costs nothing.
+
+    Returns:
+        Estimated cost of the call in USD
+    """
+    node = current_node.get()
+    cost = 0.0 if replayed else estimate_cost(model, prompt_tokens, completion_tokens)
+
+    usage = _current_usage.get()
+    if usage is not None:
+        usage.add(node, prompt_tokens, completion_tokens, latency, cost)
+
+    _calls_total.inc(node=node, model=model)
+    _tokens_total.inc(prompt_tokens, node=node, model=model, type="prompt")
+    _tokens_total.inc(completion_tokens, node=node, model=model, type="completion")
+    _cost_total.inc(cost, node=node, model=model)
+    _call_latency.observe(latency, node=node, model=model)
+
+    logger.debug("Usage [%s] %s: %s prompt + %s completion tokens, %.3fs, $%.6f%s", node, model, prompt_tokens, completion_tokens, latency, cost,
+                 " (replayed)" if replayed else "")
+    return cost
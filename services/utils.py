@@ -2,54 +2,262 @@
 Shared utilities for the resume scorer package.
 """
 
+import atexit
+import copy
+import hashlib
+import json
 import logging
+import queue
 import sys
+import threading
 import warnings
 import os
-from typing import Optional
+from collections import OrderedDict
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Hashable, Optional, Tuple, Union
 from contextlib import contextmanager
-from io import StringIO
+from services.context import current_node, current_request_id
 
-class WarningFilter:
-    def __init__(self):
-        self.stderr = StringIO()
-        self._real_stderr = sys.stderr
+# Library noise that is safe to drop: pdfminer page warnings and LangChain deprecation notices
+SUPPRESSED_MESSAGES = (
+    "CropBox missing",
+    "LangChainDeprecationWarning",
+    "langchain_community.chat_models",
+    "warn_deprecated"
+)
+
+# Loggers that emit the noise above; logger filters only see records created on that exact logger
+NOISY_LOGGERS = ("pdfminer.pdfpage", "pdfminer.pdfinterp", "pdfminer.converter")
+
+class WarningFilter(logging.Filter):
+    """
+    Drops known library noise without touching ``sys.stderr``.
+
+    Deprecation warnings are ignored through the ``warnings`` filters and
+    noisy log records through this logging filter, attached to the loggers
+    that emit them and to the last-resort stderr handler. Nothing is
+    buffered and no per-use state is kept, so using it as a context manager
+    (``with warning_filter:``) is a cheap no-op that is safe to enter from
+    any number of concurrent requests.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        message = record.getMessage()
+        return not any(pattern in message for pattern in SUPPRESSED_MESSAGES)
+
+    def install(self) -> None:
+        """Attach the filter; safe to call more than once"""
+        warnings.filterwarnings("ignore", category=DeprecationWarning)
+        warnings.filterwarnings("ignore", category=UserWarning)
+        for name in NOISY_LOGGERS:
+            logging.getLogger(name).addFilter(self)
+        if logging.lastResort is not None:
+            logging.lastResort.addFilter(self)
+
+    def silence_langchain(self) -> None:
+        """
+        Ignore LangChain deprecation warnings again. Importing langchain_core
+        re-enables them, and LangChain is imported lazily, after ``install``.
+        """
+        try:
+            from langchain_core._api.deprecation import LangChainDeprecationWarning, LangChainPendingDeprecationWarning
+        except ImportError:
+            return
+        warnings.filterwarnings("ignore", category=LangChainDeprecationWarning)
+        warnings.filterwarnings("ignore", category=LangChainPendingDeprecationWarning)
 
     def __enter__(self):
-        sys.stderr = self.stderr
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        sys.stderr = self._real_stderr
-        # Only print stderr content that we want to keep
-        filtered_content = self.stderr.getvalue()
-        if filtered_content:
-            lines = filtered_content.splitlines()
-            for line in lines:
-                if not any(warning in line for warning in [
-                    "CropBox missing",
-                    "LangChainDeprecationWarning",
-                    "langchain_community.chat_models",
-                    "warn_deprecated"
-                ]) and not line.strip().startswith("warn_deprecated"):
-                    print(line, file=self._real_stderr)
+        return False
 
 # Create a global warning filter
 warning_filter = WarningFilter()
-sys.stderr = warning_filter.stderr
+warning_filter.install()
+
+_env_loaded = False
+
+def load_env() -> None:
+    """Load a .env file into the environment once, before the first upstream client is created"""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
+
+def env_str(name: str, default: Optional[str] = None) -> Optional[str]:
+    """Read a string setting from the environment"""
+    value = os.getenv(name)
+    return value if value not in (None, "") else default
+
+def env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment"""
+    value = env_str(name)
+    return int(value) if value is not None else default
+
+def env_float(name: str, default: float) -> float:
+    """Read a float setting from the environment"""
+    value = env_str(name)
+    return float(value) if value is not None else default
+
+def env_bool(name: str, default: bool = False) -> bool:
+    """Read a boolean flag (1/true/yes/on) from the environment"""
+    value = env_str(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+def content_hash(data: Union[str, bytes]) -> str:
+    """Stable SHA-256 hex digest of text or bytes, used as a cache key"""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+class LRUCache:
+    """Small thread-safe LRU cache with a bounded number of entries"""
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
 
-# Also suppress warnings through the warnings module
-warnings.filterwarnings("ignore", category=DeprecationWarning)
-warnings.filterwarnings("ignore", category=UserWarning)
+class ContextFilter(logging.Filter):
+    """Stamps records with the request id and workflow node of the calling task"""
 
-def setup_workflow_logger(log_level: str = "DEBUG", log_file: Optional[str] = None) -> logging.Logger:
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = current_request_id.get()
+        record.node = current_node.get()
+        return True
+
+class DebugSampler(logging.Filter):
+    """
+    Keeps a fraction ``rate`` of DEBUG records from each call site, spread
+    evenly, so verbose debug logging stays affordable under load. Records
+    of other levels always pass.
+    """
+
+    def __init__(self, rate: float = 1.0):
+        super().__init__()
+        self.rate = min(max(rate, 0.0), 1.0)
+        self._counts: Dict[Tuple[str, int], int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno != logging.DEBUG or self.rate >= 1.0:
+            return True
+        site = (record.pathname, record.lineno)
+        with self._lock:
+            count = self._counts.get(site, 0)
+            self._counts[site] = count + 1
+        # Keep the record whenever the running total of kept records ticks over
+        return int((count + 1) * self.rate) > int(count * self.rate)
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with the request id and node from ContextFilter"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "node": getattr(record, "node", None)
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to a background QueueListener instead of writing them.
+
+    The message is merged with its arguments on the calling thread, only
+    for records that passed the level and filters, and records are dropped
+    (and counted) rather than blocking when the bounded queue is full.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self.listener: Optional[QueueListener] = None
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+_listener: Optional[QueueListener] = None
+
+def _stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+atexit.register(_stop_listener)
+
+def setup_workflow_logger(log_level: str = None, log_file: Optional[str] = None, log_format: str = None,
+                          debug_sample_rate: float = None) -> logging.Logger:
     """
     Configure and return a logger for the resume workflow
     
+    Records are queued by a non-blocking handler and written to stdout (and
+    the log file) by a background thread, so logging never blocks the event
+    loop. Every setting falls back to the environment.
+    
     Args:
-        log_level: Logging level (DEBUG, INFO, WARNING, ERROR)
-        log_file: Optional file path to write logs to
+        log_level: Logging level (DEBUG, INFO, WARNING, ERROR) (env LOG_LEVEL, default INFO)
+        log_file: Optional file path to write logs to (env LOG_FILE)
+        log_format: ``text`` or ``json`` (env LOG_FORMAT)
+        debug_sample_rate: Fraction of DEBUG records kept per call site (env LOG_DEBUG_SAMPLE_RATE)
     """
+    global _listener
+    log_level = log_level or env_str("LOG_LEVEL", "INFO")
+    log_file = log_file or env_str("LOG_FILE")
+    log_format = (log_format or env_str("LOG_FORMAT", "text")).lower()
+    if debug_sample_rate is None:
+        debug_sample_rate = env_float("LOG_DEBUG_SAMPLE_RATE", 1.0)
+    
     # Create logger
     logger = logging.getLogger("resume_workflow")
     logger.setLevel(getattr(logging, log_level.upper()))
@@ -58,28 +266,40 @@ def setup_workflow_logger(log_level: str = "DEBUG", log_file: Optional[str] = No
     logger.propagate = False
     
     # Create formatters
-    console_formatter = logging.Formatter(
-        '%(asctime)s - %(levelname)s - %(message)s',
-        datefmt='%H:%M:%S'
-    )
+    if log_format == "json":
+        console_formatter = file_formatter = JsonFormatter()
+    else:
+        console_formatter = logging.Formatter(
+            '%(asctime)s - %(levelname)s - %(message)s',
+            datefmt='%H:%M:%S'
+        )
+        file_formatter = logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        )
     
-    file_formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-    
-    # Remove any existing handlers
+    # Remove any existing handlers, flushing records queued for them
+    _stop_listener()
+    for handler in logger.handlers:
+        handler.close()
     logger.handlers = []
     
     # Console handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(console_formatter)
-    logger.addHandler(console_handler)
+    sinks = [console_handler]
     
     # File handler if specified
     if log_file:
         file_handler = logging.FileHandler(log_file)
         file_handler.setFormatter(file_formatter)
-        logger.addHandler(file_handler)
+        sinks.append(file_handler)
+    
+    queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=env_int("LOG_QUEUE_SIZE", 10000)))
+    queue_handler.addFilter(DebugSampler(debug_sample_rate))
+    queue_handler.addFilter(ContextFilter())
+    queue_handler.listener = _listener = QueueListener(queue_handler.queue, *sinks, respect_handler_level=True)
+    _listener.start()
+    logger.addHandler(queue_handler)
     
     return logger
 
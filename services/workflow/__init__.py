@@ -2,21 +2,18 @@
 Workflow Package
 """
 
-from .graph import ResumeWorkflow
-from .nodes import (
-    ResumeParserNode, TextEmbeddingNode, SimilarityScoreNode,
-    TechnicalSkillsNode, CulturalFitNode, ScoreCombinerNode,
-    FeedbackNode, IterationDecisionNode
-)
-from .base import (
-    BaseNode, BaseParserNode, BaseEmbeddingNode,
-    BaseScoringNode, BaseFeedbackNode, BaseDecisionNode,
-    WorkflowState
-)
+import importlib
+from .profiles import WorkflowProfile, PROFILES, get_profile
 
 __all__ = [
     'ResumeWorkflow',
+    'CheckpointStore',
+    'WorkflowProfile',
+    'PROFILES',
+    'get_profile',
     'ResumeParserNode',
+    'SegmentationNode',
+    'ResumeProfileNode',
     'TextEmbeddingNode',
     'SimilarityScoreNode',
     'TechnicalSkillsNode',
@@ -31,4 +28,24 @@ __all__ = [
     'BaseFeedbackNode',
     'BaseDecisionNode',
     'WorkflowState'
-] 
\ No newline at end of file
+]
+
+# The graph and nodes import langgraph, numpy and every parser, embedding and scorer
+# dependency, so they are only loaded when used; the profiles stay cheap to import
+_LAZY = {
+    'ResumeWorkflow': '.graph',
+    'CheckpointStore': '.checkpoint',
+    **{name: '.nodes' for name in (
+        'ResumeParserNode', 'SegmentationNode', 'ResumeProfileNode', 'TextEmbeddingNode', 'SimilarityScoreNode',
+        'TechnicalSkillsNode', 'CulturalFitNode', 'ScoreCombinerNode', 'FeedbackNode', 'IterationDecisionNode'
+    )},
+    **{name: '.base' for name in (
+        'BaseNode', 'BaseParserNode', 'BaseEmbeddingNode', 'BaseScoringNode', 'BaseFeedbackNode',
+        'BaseDecisionNode', 'WorkflowState'
+    )}
+}
+
+def __getattr__(name):
+    if name in _LAZY:
+        return getattr(importlib.import_module(_LAZY[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,19 +1,34 @@
 from abc import ABC, abstractmethod
 from typing import Dict, Any, TypedDict, Optional
+import numpy as np
 from fastapi import UploadFile
 
 class WorkflowState(TypedDict, total=False):
-    # Input files
-    resume_file: UploadFile
-    job_file: UploadFile
+    # Input files, released (set to None) once parsed
+    resume_file: Optional[UploadFile]
+    job_file: Optional[UploadFile]
     
     # Parser output
     resume_text: str
     job_desc: str
     
-    # Embedding output
-    resume_emb: list
-    job_emb: list
+    # Segmentation output
+    resume_sections: dict
+    job_sections: dict
+    resume_compact: str
+    job_compact: str
+    
+    # Resume profile output (only set when profiling is enabled)
+    resume_profile: dict
+    resume_profile_text: str
+    
+    # Embedding output (float32 vectors)
+    resume_emb: np.ndarray
+    job_emb: np.ndarray
+    
+    # Chunked embedding output (float32 chunks x dim, only set in chunked mode)
+    resume_chunk_embs: np.ndarray
+    job_chunk_embs: np.ndarray
     
     # Similarity output
     cosine_score: float
@@ -39,7 +54,7 @@ class BaseNode(ABC):
     """Base interface for all workflow nodes"""
     @abstractmethod
     async def process(self, state: Dict[str, Any]) -> Dict[str, Any]:
-        """Process the state and return updates"""
+        """Process the state and return only the keys that changed"""
         pass
 
 class BaseParserNode(BaseNode):
@@ -0,0 +1,118 @@
+import base64
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+import numpy as np
+from services.utils import logger
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return {
+            "__ndarray__": base64.b64encode(np.ascontiguousarray(value).tobytes()).decode("ascii"),
+            "dtype": str(value.dtype),
+            "shape": list(value.shape)
+        }
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot checkpoint value of type {type(value).__name__}")
+
+def _decode(obj: Dict[str, Any]) -> Any:
+    if "__ndarray__" in obj:
+        data = base64.b64decode(obj["__ndarray__"])
+        return np.frombuffer(data, dtype=obj["dtype"]).reshape(obj["shape"]).copy()
+    return obj
+
+def dumps(updates: Dict[str, Any]) -> str:
+    """Serialise node updates to JSON, with numpy arrays stored as base64"""
+    return json.dumps(updates, default=_encode)
+
+def loads(data: str) -> Dict[str, Any]:
+    return json.loads(data, object_hook=_decode)
+
+class CheckpointStore:
+    """
+    SQLite store of completed node outputs, so a retried run can skip them.
+
+    Each entry holds the updates one node returned, keyed by the run (a hash
+    of the inputs and settings), the node name and the feedback iteration.
+    Entries older than ``ttl`` seconds are ignored and purged.
+    """
+
+    _PURGE_EVERY = 100
+
+    def __init__(self, path: str, ttl: float = 3600.0):
+        """
+        Args:
+            path: SQLite database file, created if missing
+            ttl: Seconds a checkpoint stays valid
+        """
+        self.path = path
+        self.ttl = ttl
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            "key TEXT PRIMARY KEY, created_at REAL NOT NULL, data TEXT NOT NULL)"
+        )
+        self.purge()
+
+    @staticmethod
+    def make_key(run_key: str, node: str, iteration: int) -> str:
+        return f"{run_key}:{node}:{iteration}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the checkpointed updates for a key, or None if missing or expired"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM checkpoints WHERE key = ? AND created_at >= ?",
+                (key, time.time() - self.ttl)
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            return loads(row[0])
+        except ValueError as e:
+            logger.warning(f"Ignoring corrupt checkpoint {key}: {e}")
+            return None
+
+    def put(self, key: str, updates: Dict[str, Any]) -> None:
+        """
+        Store the updates a node returned.
+
+        Checkpointing is best effort: unserialisable values or database
+        errors are logged and the step is simply not checkpointed.
+        """
+        try:
+            data = dumps(updates)
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO checkpoints (key, created_at, data) VALUES (?, ?, ?)",
+                    (key, time.time(), data)
+                )
+                self._writes += 1
+                purge = self._writes % self._PURGE_EVERY == 0
+        except (TypeError, ValueError, sqlite3.Error) as e:
+            logger.warning(f"Could not checkpoint {key}: {e}")
+            return
+        if purge:
+            self.purge()
+
+    def purge(self) -> int:
+        """Delete expired checkpoints, returning how many were removed"""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM checkpoints WHERE created_at < ?", (time.time() - self.ttl,))
+        if cursor.rowcount:
+            logger.debug("Purged %s expired checkpoints", cursor.rowcount)
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
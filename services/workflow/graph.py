@@ -1,19 +1,51 @@
-from typing import Dict, Any, cast
+import asyncio
+import hashlib
+import json
+import time
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Tuple, cast
 from langgraph.graph import StateGraph, END
 from fastapi import UploadFile
 from .base import WorkflowState
+from .checkpoint import CheckpointStore
+from .profiles import WorkflowProfile, PROFILES, get_profile
 from .nodes import (
-    ResumeParserNode, TextEmbeddingNode, SimilarityScoreNode,
+    ResumeParserNode, SegmentationNode, ResumeProfileNode, TextEmbeddingNode, SimilarityScoreNode,
     TechnicalSkillsNode, CulturalFitNode, ScoreCombinerNode,
     FeedbackNode, IterationDecisionNode
 )
-from services.utils import logger
+from services.context import current_node, current_run, current_request_id
+from services.jobs import JobRegistry, RegisteredJob, make_jd_id
+from services.jobs.registry import list_items
+from services.metrics import metrics
+from services.parsers import ParseLimits
+from services.resilience import resilient
+from services.tokens import count_tokens
+from services.tracing import span, new_request_id
+from services.usage import track_usage
+from services.utils import logger, env_str, env_float
 
 class ResumeWorkflow:
-    def __init__(self, max_iterations: int = 3):
+    def __init__(self, max_iterations: int = 3, job_registry: JobRegistry = None,
+                 checkpoints: CheckpointStore = None, profile: str = None):
+        """
+        Args:
+            max_iterations: Maximum feedback loop iterations
+            profile: Default profile, one of fast/standard/thorough (env WORKFLOW_PROFILE)
+            job_registry: Store of pre-registered job descriptions
+            checkpoints: Store of completed node outputs (env WORKFLOW_CHECKPOINT_DB, WORKFLOW_CHECKPOINT_TTL)
+        """
         logger.info(f"Initializing Resume Workflow with max_iterations={max_iterations}")
+        self.job_registry = job_registry or JobRegistry()
+        checkpoint_db = env_str("WORKFLOW_CHECKPOINT_DB", "")
+        if checkpoints is None and checkpoint_db:
+            checkpoints = CheckpointStore(checkpoint_db, ttl=env_float("WORKFLOW_CHECKPOINT_TTL", 3600.0))
+        self.checkpoints = checkpoints
+        # Uploads past the parser's byte limit are not read in full just to key their checkpoints
+        self.max_upload_bytes = ParseLimits.from_env().max_bytes
         # Initialize nodes
         self.parser_node = ResumeParserNode()
+        self.segmentation_node = SegmentationNode()
+        self.profile_node = ResumeProfileNode()
         self.embedding_node = TextEmbeddingNode()
         self.similarity_node = SimilarityScoreNode()
         self.technical_node = TechnicalSkillsNode()
@@ -22,73 +54,153 @@ class ResumeWorkflow:
         self.feedback_node = FeedbackNode()
         self.decision_node = IterationDecisionNode(max_iterations=max_iterations)
         self.max_iterations = max_iterations
+        self.profile = get_profile(profile or env_str("WORKFLOW_PROFILE", "thorough"))
         
-        # Build graph
-        self.graph = self._build_graph()
+        # Build graph for the default profile, the others are compiled on first use
+        self._graphs: Dict[str, Any] = {}
+        self.graph = self.get_graph(self.profile)
         logger.info("Resume Workflow initialized successfully")
 
-    def _build_graph(self) -> StateGraph:
-        """Build the LangGraph workflow"""
-        logger.debug("Building workflow graph")
+    def get_graph(self, profile: WorkflowProfile):
+        """Compiled graph of a profile, built once and cached"""
+        graph = self._graphs.get(profile.name)
+        if graph is None:
+            graph = self._graphs[profile.name] = self._build_graph(profile)
+        return graph
+
+    async def warm_up(self, connect: bool = False) -> Dict[str, float]:
+        """
+        Do the one-off work of a first request ahead of time.
+
+        Compiles the graph of every profile, parses a sample document with
+        every parser backend and loads the tokenizer. With ``connect`` the
+        LLM and embedding clients also open their connection pools. Steps
+        are best effort: a failure is logged and the other steps still run.
+
+        Returns:
+            Seconds spent per completed step
+        """
+        def compile_all():
+            for profile in PROFILES.values():
+                self.get_graph(profile)
+
+        async def compile_graphs():
+            # Compiling is CPU-bound; keep the loop free for /healthz and /readyz meanwhile
+            await asyncio.to_thread(compile_all)
+
+        async def load_tokenizer():
+            await asyncio.to_thread(count_tokens, "warm up")
+
+        steps: List[Tuple[str, Callable[[], Awaitable[None]]]] = [
+            ("graphs", compile_graphs),
+            ("parsers", self.parser_node.parser.warm_up),
+            ("tokenizer", load_tokenizer)
+        ]
+        if connect:
+            steps.append(("embeddings", self.embedding_node.embedder.warm_up))
+            # Every scorer owns its own client and connection pool
+            scorers = {id(node.scorer): node.scorer for node in (self.technical_node, self.cultural_node, self.feedback_node)}
+            steps.extend(("llm", scorer.warm_up) for scorer in scorers.values())
+
+        timings: Dict[str, float] = {}
+        for name, step in steps:
+            start = time.perf_counter()
+            try:
+                if name in ("llm", "embeddings"):
+                    await asyncio.wait_for(step(), resilient(name).policy.timeout)
+                else:
+                    await step()
+            except Exception as e:
+                logger.warning(f"Warm-up step '{name}' failed: {type(e).__name__}: {e}")
+                continue
+            timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+        logger.info("Warm-up finished: " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items()))
+        return timings
+
+    def _build_graph(self, profile: WorkflowProfile) -> StateGraph:
+        """Build the LangGraph workflow for a profile"""
+        logger.debug("Building workflow graph for the %s profile", profile.name)
         
         # Create workflow graph with our TypedDict state
         workflow = StateGraph(WorkflowState)
 
         # Add nodes with proper state typing
         async def parse_wrapper(state: WorkflowState) -> WorkflowState:
-            result = await self.parser_node.process(state)
-            return cast(WorkflowState, result)
+            return await self._run_node("parse", self.parser_node, state)
+
+        async def segment_wrapper(state: WorkflowState) -> WorkflowState:
+            return await self._run_node("segment", self.segmentation_node, state)
+
+        async def profile_wrapper(state: WorkflowState) -> WorkflowState:
+            return await self._run_node("profile", self.profile_node, state)
 
         async def embed_wrapper(state: WorkflowState) -> WorkflowState:
-            result = await self.embedding_node.process(state)
-            return cast(WorkflowState, result)
+            return await self._run_node("embed", self.embedding_node, state)
 
         async def similarity_wrapper(state: WorkflowState) -> WorkflowState:
-            result = await self.similarity_node.process(state)
-            return cast(WorkflowState, result)
+            return await self._run_node("similarity", self.similarity_node, state)
 
         async def skills_wrapper(state: WorkflowState) -> WorkflowState:
-            result = await self.technical_node.process(state)
-            return cast(WorkflowState, result)
+            return await self._run_node("skills", self.technical_node, state)
 
         async def culture_wrapper(state: WorkflowState) -> WorkflowState:
-            result = await self.cultural_node.process(state)
-            return cast(WorkflowState, result)
+            return await self._run_node("culture", self.cultural_node, state)
 
         async def combine_wrapper(state: WorkflowState) -> WorkflowState:
-            result = await self.combiner_node.process(state)
-            return cast(WorkflowState, result)
+            return await self._run_node("combine", self.combiner_node, state)
 
         async def feedback_wrapper(state: WorkflowState) -> WorkflowState:
-            result = await self.feedback_node.process(state)
-            return cast(WorkflowState, result)
+            return await self._run_node("feedback", self.feedback_node, state)
+
+        async def next_iteration_wrapper(state: WorkflowState) -> WorkflowState:
+            return cast(WorkflowState, await self.decision_node.advance(state))
 
         # Add nodes with proper state handling
         workflow.add_node("parse", parse_wrapper)
         workflow.add_node("embed", embed_wrapper)
         workflow.add_node("similarity", similarity_wrapper)
+        workflow.add_node("combine", combine_wrapper)
+
+        if not profile.llm_scoring:
+            # Embedding similarity only; the prompt text is never needed
+            workflow.add_edge("parse", "embed")
+            workflow.add_edge("embed", "similarity")
+            workflow.add_edge("similarity", "combine")
+            workflow.add_edge("combine", END)
+            workflow.set_entry_point("parse")
+            return workflow.compile()
+
+        workflow.add_node("segment", segment_wrapper)
+        workflow.add_node("profile", profile_wrapper)
         workflow.add_node("skills", skills_wrapper)
         workflow.add_node("culture", culture_wrapper)
-        workflow.add_node("combine", combine_wrapper)
-        workflow.add_node("feedback", feedback_wrapper)
 
         # Add edges
-        workflow.add_edge("parse", "embed")
+        workflow.add_edge("parse", "segment")
+        workflow.add_edge("segment", "profile")
+        workflow.add_edge("profile", "embed")
         workflow.add_edge("embed", "similarity")
         workflow.add_edge("similarity", "skills")
         workflow.add_edge("skills", "culture")
         workflow.add_edge("culture", "combine")
-        workflow.add_edge("combine", "feedback")
-
-        # Add conditional edge for refinement loop
-        workflow.add_conditional_edges(
-            "feedback",
-            self.decision_node.decide,
-            {
-                "continue": "skills",  # Loop back to skills evaluation
-                "end": END
-            }
-        )
+
+        if not profile.feedback:
+            workflow.add_edge("combine", END)
+        else:
+            workflow.add_node("feedback", feedback_wrapper)
+            workflow.add_node("next_iteration", next_iteration_wrapper)
+            workflow.add_edge("combine", "feedback")
+            workflow.add_edge("next_iteration", "skills")
+
+            # Add conditional edge for refinement loop
+            workflow.add_conditional_edges(
+                "feedback",
+                self.decision_node.decide,
+                {
+                    "continue": "next_iteration",  # Loop back to skills evaluation
+                    "end": END
+                }
+            )
 
         # Set entry point
         workflow.set_entry_point("parse")
@@ -96,9 +208,123 @@ class ResumeWorkflow:
 
         return workflow.compile()
 
-    async def run(self, resume_file: UploadFile, job_file: UploadFile) -> Dict[str, Any]:
-        """Run the workflow on input files"""
-        logger.info(f"Starting workflow execution for resume: {resume_file.filename}")
+    async def _run_node(self, name: str, node, state: WorkflowState) -> WorkflowState:
+        """
+        Run a node inside a timing span, with its name set in the context for usage accounting.
+
+        With checkpointing enabled, a node that already completed for the
+        same inputs and iteration returns its stored output instead.
+        """
+        iteration = state.get("iteration", 1)
+        with span(name, iteration=iteration) as node_span:
+            run_key = current_run.get()
+            key = None
+            if self.checkpoints is not None and run_key:
+                key = CheckpointStore.make_key(run_key, name, iteration)
+                cached = self.checkpoints.get(key)
+                if cached is not None:
+                    logger.info(f"Resuming {name} (iteration {iteration}) from checkpoint")
+                    metrics.counter("workflow_checkpoint_hits_total", "Workflow steps served from checkpoints").inc(node=name)
+                    node_span.outcome = "checkpoint"
+                    return cast(WorkflowState, cached)
+
+            token = current_node.set(name)
+            try:
+                result = await node.process(state)
+            finally:
+                current_node.reset(token)
+            if key is not None:
+                self.checkpoints.put(key, result)
+            return cast(WorkflowState, result)
+
+    async def _run_key(self, resume_file: UploadFile, job_file: UploadFile, jd_id: str,
+                       profile: WorkflowProfile) -> Optional[str]:
+        """
+        Checkpoint key of a run: a hash of both documents and every setting that affects the result.
+
+        None when a document is over the byte limit; the parser rejects it, so there is nothing to resume.
+        """
+        settings = {
+            "profile": profile.name,
+            "max_iterations": self.max_iterations,
+            "embedding_model": self.embedding_node.model_name,
+            "chunking": self.embedding_node.chunking,
+            "resume_profile": self.profile_node.enabled,
+            "budgets": [self.segmentation_node.resume_token_budget, self.segmentation_node.job_token_budget]
+        }
+        resume_digest = await _upload_digest(resume_file, self.max_upload_bytes)
+        job_digest = f"jd:{jd_id}" if jd_id is not None else await _upload_digest(job_file, self.max_upload_bytes)
+        if resume_digest is None or job_digest is None:
+            return None
+        digest = hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8"))
+        digest.update(resume_digest.encode("ascii"))
+        digest.update(job_digest.encode("ascii"))
+        return digest.hexdigest()
+
+    async def register_job(self, job_file: UploadFile) -> RegisteredJob:
+        """
+        Parse, segment and embed a job description once and store it for reuse.
+
+        Registering the same content again returns the existing entry.
+        """
+        [job_text] = await self.parser_node.parse_documents({"job_description": job_file})
+        jd_id = make_jd_id(job_text)
+        existing = self.job_registry.get(jd_id)
+        if existing is not None and existing.embedding_model == self.embedding_node.model_name \
+                and existing.chunking == self.embedding_node.chunking:
+            return existing
+
+        sections, compact = self.segmentation_node.segment_job(job_text)
+        embedding, chunk_embeddings = await self.embedding_node.embed_document(job_text)
+        job = RegisteredJob(
+            jd_id=jd_id,
+            text=job_text,
+            sections=sections,
+            compact=compact,
+            requirements=list_items(sections.get("requirements")),
+            nice_to_have=list_items(sections.get("nice_to_have")),
+            embedding_model=self.embedding_node.model_name,
+            embedding=embedding,
+            chunking=self.embedding_node.chunking,
+            chunk_embeddings=chunk_embeddings
+        )
+        self.job_registry.put(job)
+        return job
+
+    def _job_state(self, jd_id: str) -> Dict[str, Any]:
+        """Initial state for a registered job; vectors from another embedding setup are recomputed"""
+        job = self.job_registry.require(jd_id)
+        state = {
+            "job_desc": job.text,
+            "job_sections": job.sections,
+            "job_compact": job.compact
+        }
+        if job.embedding_model == self.embedding_node.model_name:
+            if not self.embedding_node.chunked:
+                state["job_emb"] = job.embedding
+            elif job.chunking == self.embedding_node.chunking and job.chunk_embeddings is not None:
+                state["job_chunk_embs"] = job.chunk_embeddings
+        return state
+
+    async def run(self, resume_file: UploadFile, job_file: UploadFile = None, jd_id: str = None,
+                  profile: str = None) -> Dict[str, Any]:
+        """
+        Run the workflow on input files.
+
+        The job description is either uploaded as ``job_file`` or refers to
+        a registered one by ``jd_id``, which skips parsing and embedding it.
+        ``profile`` picks the topology for this run: ``fast`` (embeddings
+        only), ``standard`` (one LLM pass) or ``thorough`` (feedback loop);
+        the workflow's default profile is used when omitted.
+
+        Raises:
+            JobNotFoundError: If ``jd_id`` is not registered
+            ValueError: If the profile is unknown
+        """
+        if (job_file is None) == (jd_id is None):
+            raise ValueError("Provide exactly one of job_file or jd_id")
+        workflow_profile = get_profile(profile) if profile else self.profile
+        logger.info(f"Starting {workflow_profile.name} workflow execution for resume: {resume_file.filename}")
         
         # Initialize state with proper typing
         initial_state: WorkflowState = {
@@ -106,26 +332,62 @@ class ResumeWorkflow:
             "job_file": job_file,
             "iteration": 1
         }
+        if jd_id is not None:
+            initial_state.update(self._job_state(jd_id))
+        run_key = await self._run_key(resume_file, job_file, jd_id, workflow_profile) if self.checkpoints is not None else None
 
         # Run the graph with appropriate recursion limit
+        request_id = current_request_id.get() or new_request_id()
+        request_token = current_request_id.set(request_id)
+        run_token = current_run.set(run_key)
         try:
-            # Set recursion limit to max_iterations * 15 to give plenty of buffer as recursions means total numbers of nodes and not just the loop. So, if in single loop we have 10 nodes, then recursions will be 10, even though our internal iterations will be 1.
-            config = {"recursion_limit": self.max_iterations * 15}
-            final_state = await self.graph.ainvoke(initial_state, config)
+            # The recursion limit counts graph steps, not feedback iterations. Every node costs
+            # about two steps (run plus edge), and the loop (skills, culture, combine, feedback,
+            # next_iteration) runs once per iteration after the 5 setup nodes; leave a buffer on top.
+            config = {"recursion_limit": 2 * (5 + 5 * self.max_iterations) + 10}
+            graph = self.get_graph(workflow_profile)
+            with span("workflow", profile=workflow_profile.name), track_usage() as usage:
+                final_state = await graph.ainvoke(initial_state, config)
             logger.info(f"Workflow completed successfully after {final_state['iteration']} iterations")
         except Exception as e:
             logger.error(f"Workflow execution failed: {str(e)}")
             raise
+        finally:
+            current_run.reset(run_token)
+            current_request_id.reset(request_token)
 
         # Return relevant results
         results = {
             "final_score": final_state["final_score"],
             "explanation": final_state["final_explanation"],
-            "technical_score": final_state["skill_score"],
-            "cultural_score": final_state["culture_score"],
+            "technical_score": final_state.get("skill_score"),
+            "cultural_score": final_state.get("culture_score"),
             "embedding_score": final_state["cosine_score"] * 100,
-            "iterations": final_state["iteration"]
+            "iterations": final_state["iteration"],
+            "profile": workflow_profile.name,
+            "request_id": request_id,
+            "usage": usage.summary()
         }
+        if jd_id is not None:
+            results["jd_id"] = jd_id
         
         logger.info(f"Final score: {results['final_score']:.2f}, Total iterations: {results['iterations']}")
-        return results 
\ No newline at end of file
+        logger.info(f"Usage: {results['usage']['prompt_tokens']} prompt + {results['usage']['completion_tokens']} completion tokens, estimated cost ${results['usage']['cost_usd']:.4f}")
+        return results 
+
+async def _upload_digest(file: UploadFile, max_bytes: int, chunk_size: int = 64 * 1024) -> Optional[str]:
+    """SHA-256 of an upload's content, rewinding it for the parser; None as soon as it exceeds ``max_bytes``"""
+    declared = getattr(file, "size", None)
+    if declared is not None and declared > max_bytes:
+        return None
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        while chunk := await file.read(chunk_size):
+            size += len(chunk)
+            if size > max_bytes:
+                return None
+            digest.update(chunk)
+    finally:
+        await file.seek(0)
+    return digest.hexdigest()
@@ -1,65 +1,328 @@
-from typing import Dict, Any
+import asyncio
+import logging
+import time
+from typing import Dict, Any, List, Optional, Tuple
 import numpy as np
-from ..parsers import PDFResumeParser, BaseResumeParser
-from ..embeddings import CosineSimilarityScorer, BaseEmbeddingScorer
-from ..scorers import ChatGPTScorer, BaseLLMScorer
+from ..parsers import FormatDispatchParser, BaseResumeParser, DocumentParseError
+from ..parsers.segmenter import segment_document, compact_text, RESUME_PRIORITY, JOB_PRIORITY
+from ..embeddings import BaseEmbeddingScorer, create_embedding_scorer
+from ..embeddings.chunking import chunk_text, cosine_similarity_matrix, pool_similarity
+from ..scorers import ChatGPTScorer, BaseLLMScorer, ResumeProfiler
 from .base import (
     BaseNode, BaseParserNode, BaseEmbeddingNode,
     BaseScoringNode, BaseFeedbackNode, BaseDecisionNode
 )
-from services.utils import logger
+from services.cassette import get_cassette
+from services.resilience import resilient
+from services.tokens import count_tokens
+from services.usage import record_usage
+from services.utils import logger, env_bool, env_int, env_str, content_hash, LRUCache
 
 class ResumeParserNode(BaseParserNode):
     """Node for parsing resume and job description"""
     def __init__(self, parser: BaseResumeParser = None):
-        self.parser = parser or PDFResumeParser()
+        self.parser = parser or FormatDispatchParser()
 
     async def process(self, state: Dict[str, Any]) -> Dict[str, Any]:
         logger.info("Starting document parsing")
-        resume_text = await self.parser.parse_file(state["resume_file"])
-        job_text = await self.parser.parse_file(state["job_file"])
+        files = {"resume": state["resume_file"]}
+        # A pre-registered job description arrives already parsed
+        if not state.get("job_desc"):
+            files["job_description"] = state["job_file"]
+        texts = dict(zip(files, await self.parse_documents(files)))
+        resume_text = texts["resume"]
+        job_text = texts.get("job_description", state.get("job_desc"))
         
-        logger.debug(f"Parsed resume length: {len(resume_text)} chars")
-        logger.debug(f"Parsed job description length: {len(job_text)} chars")
-        logger.debug("=== Parsed Resume Text ===\n" + resume_text[:100] + "...(truncated)")
-        logger.debug("=== Parsed Job Description ===\n" + job_text[:100] + "...(truncated)")
+        logger.debug("Parsed resume length: %s chars", len(resume_text))
+        logger.debug("Parsed job description length: %s chars", len(job_text))
+        logger.debug("=== Parsed Resume Text ===\n%s...(truncated)", resume_text[:100])
+        logger.debug("=== Parsed Job Description ===\n%s...(truncated)", job_text[:100])
         
+        # The uploads are fully read; drop the handles so they are not carried through every step
         return {
-            **state,
+            "resume_file": None,
+            "job_file": None,
             "resume_text": resume_text,
             "job_desc": job_text
         }
 
+    async def parse_documents(self, files: Dict[str, Any]) -> List[str]:
+        """
+        Parse several documents at once.
+
+        The first failure cancels the remaining parses and is re-raised.
+        A DocumentParseError is tagged with the document that failed; other
+        errors (I/O faults, backend bugs) propagate unchanged.
+        """
+        tasks = {
+            asyncio.ensure_future(self.parser.parse_file(file)): document
+            for document, file in files.items()
+        }
+        try:
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        except asyncio.CancelledError:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        failed = [task for task in done if not task.cancelled() and task.exception() is not None]
+        if failed:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+            task = failed[0]
+            document = tasks[task]
+            error = task.exception()
+            if isinstance(error, DocumentParseError):
+                logger.error(f"Failed to parse {document}: {error}")
+                error.document = error.document or document
+                raise error
+            # Anything else is a fault on our side, not in the client's document; let it surface as a 500
+            logger.error(f"Unexpected error parsing {document}: {type(error).__name__}: {error}")
+            raise error
+
+        return [task.result() for task in tasks]
+
+class SegmentationNode(BaseParserNode):
+    """Node for splitting parsed documents into sections and compact prompt text"""
+    def __init__(self, resume_token_budget: int = None, job_token_budget: int = None):
+        """
+        Args:
+            resume_token_budget: Token budget for the compact resume (env PROMPT_RESUME_TOKENS)
+            job_token_budget: Token budget for the compact job description (env PROMPT_JOB_TOKENS)
+        """
+        self.resume_token_budget = resume_token_budget or env_int("PROMPT_RESUME_TOKENS", 3000)
+        self.job_token_budget = job_token_budget or env_int("PROMPT_JOB_TOKENS", 1500)
+
+    async def process(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        resume_sections = segment_document(state["resume_text"])
+        resume_compact = compact_text(resume_sections, self.resume_token_budget, RESUME_PRIORITY)
+        updates = {
+            "resume_sections": resume_sections,
+            "resume_compact": resume_compact
+        }
+        # A pre-registered job description arrives already segmented
+        if not (state.get("job_sections") and state.get("job_compact")):
+            updates["job_sections"], updates["job_compact"] = self.segment_job(state["job_desc"])
+        
+        logger.debug("Resume sections: %s, Job sections: %s", list(resume_sections), list(updates.get('job_sections', state.get('job_sections'))))
+        logger.debug("Compacted resume %s -> %s chars", len(state['resume_text']), len(resume_compact))
+        
+        return updates
+
+    def segment_job(self, job_text: str) -> Tuple[Dict[str, str], str]:
+        """Sections and compact prompt text of a job description"""
+        job_sections = segment_document(job_text)
+        return job_sections, compact_text(job_sections, self.job_token_budget, JOB_PRIORITY)
+
+class ResumeProfileNode(BaseParserNode):
+    """Node for distilling the resume into a cached structured profile"""
+    def __init__(self, profiler: ResumeProfiler = None, enabled: bool = None):
+        """
+        Args:
+            profiler: Profile extractor, created on first use if not given
+            enabled: Score from the profile instead of resume text (env RESUME_PROFILE)
+        """
+        self.profiler = profiler
+        self.enabled = env_bool("RESUME_PROFILE") if enabled is None else enabled
+
+    async def process(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        if not self.enabled:
+            return {}
+        if self.profiler is None:
+            self.profiler = ResumeProfiler()
+
+        resume_text = state.get("resume_compact") or state["resume_text"]
+        try:
+            profile = await self.profiler.profile(resume_text)
+        except Exception as e:
+            # Profiling is optional: a bad extraction or an upstream failure leaves scoring on the compact text, just less cheaply
+            logger.warning(f"Resume profile extraction failed, scoring from resume text: {type(e).__name__}: {e}")
+            return {}
+
+        profile_text = self.profiler.render(profile)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Resume profile: %s -> %s tokens", count_tokens(resume_text), count_tokens(profile_text))
+        
+        return {
+            "resume_profile": profile,
+            "resume_profile_text": profile_text
+        }
+
 class TextEmbeddingNode(BaseEmbeddingNode):
     """Node for generating text embeddings"""
-    def __init__(self, embedder: BaseEmbeddingScorer = None):
-        self.embedder = embedder or CosineSimilarityScorer()
+    def __init__(self, embedder: BaseEmbeddingScorer = None, chunked: bool = None,
+                 chunk_size: int = None, chunk_overlap: int = None,
+                 batch_size: int = None, cache_size: int = None):
+        """
+        Args:
+            embedder: Embedding backend exposing an ``embeddings`` client (env EMBEDDING_BACKEND)
+            chunked: Embed bounded chunks instead of whole documents (env EMBEDDING_CHUNKED)
+            chunk_size: Maximum characters per chunk (env EMBEDDING_CHUNK_SIZE)
+            chunk_overlap: Characters shared by consecutive chunks (env EMBEDDING_CHUNK_OVERLAP)
+            batch_size: Chunks sent per embedding request (env EMBEDDING_BATCH_SIZE)
+            cache_size: Number of chunk vectors kept in memory (env EMBEDDING_CACHE_SIZE)
+        """
+        self.embedder = embedder or create_embedding_scorer()
+        self.chunked = env_bool("EMBEDDING_CHUNKED") if chunked is None else chunked
+        self.chunk_size = chunk_size or env_int("EMBEDDING_CHUNK_SIZE", 2000)
+        self.chunk_overlap = env_int("EMBEDDING_CHUNK_OVERLAP", 200) if chunk_overlap is None else chunk_overlap
+        self.batch_size = batch_size or env_int("EMBEDDING_BATCH_SIZE", 64)
+        self.chunk_cache = LRUCache(cache_size or env_int("EMBEDDING_CACHE_SIZE", 4096))
+
+    @property
+    def model_name(self) -> str:
+        """Identifies the embedding model, so stored vectors are only reused by the same one"""
+        model = getattr(self.embedder.embeddings, "model", None)
+        return model if isinstance(model, str) else type(self.embedder.embeddings).__name__
+
+    @property
+    def chunking(self) -> Optional[Tuple[int, int]]:
+        """(chunk_size, chunk_overlap) in chunked mode, otherwise None"""
+        return (self.chunk_size, self.chunk_overlap) if self.chunked else None
 
     async def process(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        if self.chunked:
+            return await self._process_chunked(state)
+
         logger.debug("Generating embeddings for resume and job description")
-        resume_emb = await self.embedder.embeddings.aembed_query(state["resume_text"])
-        job_emb = await self.embedder.embeddings.aembed_query(state["job_desc"])
+        updates = {"resume_emb": _as_vector(await self._embed_query(state["resume_text"]))}
+        # A pre-registered job description arrives already embedded
+        if state.get("job_emb") is None:
+            updates["job_emb"] = _as_vector(await self._embed_query(state["job_desc"]))
         
-        logger.debug(f"Generated embeddings - Resume: {len(resume_emb)} dims, Job: {len(job_emb)} dims")
-        return {
-            **state,
-            "resume_emb": resume_emb,
-            "job_emb": job_emb
+        logger.debug("Generated embeddings - Resume: %s dims, Job: %s dims", len(updates['resume_emb']), len(updates.get('job_emb', state.get('job_emb'))))
+        return updates
+
+    async def _process_chunked(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        resume_chunks = chunk_text(state["resume_text"], self.chunk_size, self.chunk_overlap)
+        embed_job = state.get("job_chunk_embs") is None
+        job_chunks = chunk_text(state["job_desc"], self.chunk_size, self.chunk_overlap) if embed_job else []
+        logger.debug("Generating chunked embeddings - Resume: %s chunks, Job: %s chunks", len(resume_chunks), len(job_chunks))
+
+        vectors = await self.embed_chunks(resume_chunks + job_chunks)
+        updates = {
+            "resume_chunk_embs": vectors[:len(resume_chunks)],
+            "resume_emb": _mean_vector(vectors[:len(resume_chunks)])
         }
+        if embed_job:
+            updates["job_chunk_embs"] = vectors[len(resume_chunks):]
+            updates["job_emb"] = _mean_vector(updates["job_chunk_embs"])
+        return updates
+
+    async def embed_document(self, text: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Embed a single document, returning its vector and, in chunked mode, its chunk vectors"""
+        if not self.chunked:
+            return _as_vector(await self._embed_query(text)), None
+        chunk_embs = await self.embed_chunks(chunk_text(text, self.chunk_size, self.chunk_overlap))
+        return _mean_vector(chunk_embs), chunk_embs
+
+    async def embed_chunks(self, chunks: List[str]) -> np.ndarray:
+        """
+        Embed chunks in batches, reusing cached vectors for chunks seen before.
+
+        Returns:
+            float32 matrix with one row per chunk
+        """
+        keys = [content_hash(chunk) for chunk in chunks]
+        resolved: Dict[str, np.ndarray] = {}
+        missing: Dict[str, str] = {}
+        for key, chunk in zip(keys, chunks):
+            if key in resolved or key in missing:
+                continue
+            cached = self.chunk_cache.get(key)
+            if cached is None:
+                missing[key] = chunk
+            else:
+                resolved[key] = cached
+
+        if missing:
+            missing_keys = list(missing)
+            batches = [missing_keys[i:i + self.batch_size] for i in range(0, len(missing_keys), self.batch_size)]
+            results = await asyncio.gather(*[
+                self._embed_documents([missing[key] for key in batch])
+                for batch in batches
+            ])
+            for batch, batch_vectors in zip(batches, results):
+                for key, vector in zip(batch, batch_vectors):
+                    vector = _as_vector(vector)
+                    self.chunk_cache.put(key, vector)
+                    resolved[key] = vector
+        logger.debug("Embedded %s new chunks, %s served from cache", len(missing), len(resolved) - len(missing))
+
+        if not keys:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.stack([resolved[key] for key in keys])
+
+    async def _embed_query(self, text: str) -> List[float]:
+        start = time.perf_counter()
+        vector, replayed = await get_cassette().fetch(
+            "embed_query", {"model": self.model_name, "text": text},
+            lambda: resilient("embeddings").call(lambda: self.embedder.embeddings.aembed_query(text))
+        )
+        self._record_usage([text], time.perf_counter() - start, replayed)
+        return vector
+
+    async def _embed_documents(self, texts: List[str]) -> List[List[float]]:
+        start = time.perf_counter()
+        vectors, replayed = await get_cassette().fetch(
+            "embed_documents", {"model": self.model_name, "texts": texts},
+            lambda: resilient("embeddings").call(lambda: self.embedder.embeddings.aembed_documents(texts))
+        )
+        self._record_usage(texts, time.perf_counter() - start, replayed)
+        return vectors
+
+    def _record_usage(self, texts: List[str], latency: float, replayed: bool = False) -> None:
+        record_usage(self.model_name, sum(count_tokens(text) for text in texts), 0, latency, replayed=replayed)
+
+def _as_vector(vector) -> np.ndarray:
+    """Compact float32 copy of an embedding, a quarter the size of a list of Python floats"""
+    return np.asarray(vector, dtype=np.float32)
+
+def _mean_vector(vectors: np.ndarray) -> np.ndarray:
+    """Normalised mean of chunk vectors, used as the whole-document embedding"""
+    if not len(vectors):
+        return np.empty(0, dtype=np.float32)
+    mean = np.mean(np.asarray(vectors, dtype=np.float32), axis=0)
+    norm = np.linalg.norm(mean)
+    return mean / norm if norm else mean
 
 class SimilarityScoreNode(BaseEmbeddingNode):
     """Node for computing similarity scores"""
+    def __init__(self, pooling: str = None, top_k: int = None):
+        """
+        Args:
+            pooling: Chunk score pooling, one of max/mean/topk_mean (env EMBEDDING_POOLING)
+            top_k: Sections averaged by topk_mean pooling (env EMBEDDING_POOLING_TOP_K)
+        """
+        self.pooling = pooling or env_str("EMBEDDING_POOLING", "max")
+        self.top_k = top_k or env_int("EMBEDDING_POOLING_TOP_K", 3)
+
     async def process(self, state: Dict[str, Any]) -> Dict[str, Any]:
-        vec1 = np.array(state["resume_emb"])
-        vec2 = np.array(state["job_emb"])
+        resume_chunk_embs = state.get("resume_chunk_embs")
+        job_chunk_embs = state.get("job_chunk_embs")
+        if resume_chunk_embs is not None and job_chunk_embs is not None and len(resume_chunk_embs) and len(job_chunk_embs):
+            matrix = cosine_similarity_matrix(resume_chunk_embs, job_chunk_embs)
+            similarity = pool_similarity(matrix, self.pooling, self.top_k)
+            logger.info(f"Computed chunked embedding similarity score ({self.pooling} over {matrix.shape[0]}x{matrix.shape[1]} chunks): {similarity:.4f}")
+            return {
+                "cosine_score": float(similarity)
+            }
+
+        vec1 = np.asarray(state["resume_emb"], dtype=np.float32)
+        vec2 = np.asarray(state["job_emb"], dtype=np.float32)
         
         similarity = np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
         logger.info(f"Computed embedding similarity score: {similarity:.4f}")
         return {
-            **state,
             "cosine_score": float(similarity)
         }
 
+def _resume_for_prompt(state: Dict[str, Any]) -> str:
+    """Most compact resume representation available in the state"""
+    return state.get("resume_profile_text") or state.get("resume_compact") or state["resume_text"]
+
 class TechnicalSkillsNode(BaseScoringNode):
     """Node for evaluating technical skills"""
     def __init__(self, scorer: BaseLLMScorer = None):
@@ -68,21 +331,20 @@ class TechnicalSkillsNode(BaseScoringNode):
     async def process(self, state: Dict[str, Any]) -> Dict[str, Any]:
         logger.info("Evaluating technical skills")
         logger.debug("=== Technical Skills Evaluation Request ===")
-        logger.debug(f"Resume Text:\n{state['resume_text'][:100]}...(truncated)")
-        logger.debug(f"Job Description:\n{state['job_desc'][:100]}...(truncated)")
+        logger.debug("Resume Text:\n%s...(truncated)", state['resume_text'][:100])
+        logger.debug("Job Description:\n%s...(truncated)", state['job_desc'][:100])
         logger.debug("Context: technical skills and experience")
         
         score, explanation = await self.scorer.score(
-            state["resume_text"],
-            state["job_desc"],
+            _resume_for_prompt(state),
+            state.get("job_compact") or state["job_desc"],
             context="technical skills and experience"
         )
         
         logger.info(f"Technical skills score: {score:.2f}")
-        logger.debug(f"Technical skills explanation:\n{explanation}")
+        logger.debug("Technical skills explanation:\n%s", explanation)
         
         return {
-            **state,
             "skill_score": score,
             "skill_explain": explanation
         }
@@ -95,21 +357,20 @@ class CulturalFitNode(BaseScoringNode):
     async def process(self, state: Dict[str, Any]) -> Dict[str, Any]:
         logger.info("Evaluating cultural fit")
         logger.debug("=== Cultural Fit Evaluation Request ===")
-        logger.debug(f"Resume Text:\n{state['resume_text'][:100]}...(truncated)")
-        logger.debug(f"Job Description:\n{state['job_desc'][:100]}...(truncated)")
+        logger.debug("Resume Text:\n%s...(truncated)", state['resume_text'][:100])
+        logger.debug("Job Description:\n%s...(truncated)", state['job_desc'][:100])
         logger.debug("Context: cultural fit and soft skills")
         
         score, explanation = await self.scorer.score(
-            state["resume_text"],
-            state["job_desc"],
+            _resume_for_prompt(state),
+            state.get("job_compact") or state["job_desc"],
             context="cultural fit and soft skills"
         )
         
         logger.info(f"Cultural fit score: {score:.2f}")
-        logger.debug(f"Cultural fit explanation:\n{explanation}")
+        logger.debug("Cultural fit explanation:\n%s", explanation)
         
         return {
-            **state,
             "culture_score": score,
             "culture_explain": explanation
         }
@@ -126,28 +387,30 @@ class ScoreCombinerNode(BaseNode):
     async def process(self, state: Dict[str, Any]) -> Dict[str, Any]:
         cosine_score_normalized = state["cosine_score"] * 100
         
-        final_score = (
-            self.weights["cosine"] * cosine_score_normalized +
-            self.weights["technical"] * state["skill_score"] +
-            self.weights["cultural"] * state["culture_score"]
-        )
+        # Profiles without LLM scoring only produce some of the scores; weights are renormalised over those
+        scores = {
+            "cosine": cosine_score_normalized,
+            "technical": state.get("skill_score"),
+            "cultural": state.get("culture_score")
+        }
+        present = {name: score for name, score in scores.items() if score is not None}
+        total_weight = sum(self.weights[name] for name in present)
+        final_score = sum(self.weights[name] * score for name, score in present.items()) / total_weight
         
-        logger.info(f"Combined scores - Embedding: {cosine_score_normalized:.2f}, Technical: {state['skill_score']:.2f}, Cultural: {state['culture_score']:.2f}")
+        logger.info("Combined scores - " + ", ".join(f"{name.title()}: {score:.2f}" for name, score in present.items()))
         logger.info(f"Final weighted score: {final_score:.2f}")
-        logger.debug(f"Score weights used - Embedding: {self.weights['cosine']}, Technical: {self.weights['technical']}, Cultural: {self.weights['cultural']}")
+        logger.debug("Score weights used - Embedding: %s, Technical: %s, Cultural: %s", self.weights['cosine'], self.weights['technical'], self.weights['cultural'])
         
-        final_explanation = f"""
-Technical Skills Assessment: {state["skill_explain"]}
-
-Cultural Fit Assessment: {state["culture_explain"]}
-
-Embedding Similarity Score: {cosine_score_normalized:.2f}/100 (indicating semantic relevance between resume and job requirements)
-"""
+        parts = []
+        if "technical" in present:
+            parts.append(f"Technical Skills Assessment: {state['skill_explain']}")
+        if "cultural" in present:
+            parts.append(f"Cultural Fit Assessment: {state['culture_explain']}")
+        parts.append(f"Embedding Similarity Score: {cosine_score_normalized:.2f}/100 (indicating semantic relevance between resume and job requirements)")
         
         return {
-            **state,
             "final_score": final_score,
-            "final_explanation": final_explanation.strip()
+            "final_explanation": "\n\n".join(parts)
         }
 
 class FeedbackNode(BaseFeedbackNode):
@@ -167,21 +430,20 @@ Overall Score: {state['final_score']}
 Overall Explanation: {state['final_explanation']}
 """
         logger.debug("=== Feedback Evaluation Request ===")
-        logger.debug(f"Current Evaluation:\n{current_eval}")
-        logger.debug(f"Job Description:\n{state['job_desc'][:100]}...(truncated)")
+        logger.debug("Current Evaluation:\n%s", current_eval)
+        logger.debug("Job Description:\n%s...(truncated)", state['job_desc'][:100])
         
         # Use the new eval_score method specifically designed for evaluation completeness
         status, feedback = await self.scorer.eval_score(
             current_eval,
-            state["job_desc"]
+            state.get("job_compact") or state["job_desc"]
         )
         
         feedback_status = "No changes needed" if status >= 80 else "Changes needed"
         logger.info(f"Feedback status: {feedback_status} (completeness score: {status})")
-        logger.debug(f"Feedback details:\n{feedback}")
+        logger.debug("Feedback details:\n%s", feedback)
         
         return {
-            **state,
             "feedback_status": feedback_status,
             "feedback_text": feedback
         }
@@ -218,8 +480,9 @@ class IterationDecisionNode(BaseDecisionNode):
         if current_iteration >= self.max_iterations:
             logger.warning(f"Reached iteration limit ({current_iteration}), returning current best result")
             return "end"
-            
-        # Increment iteration counter
-        state["iteration"] = current_iteration + 1
         
-        return "continue" 
\ No newline at end of file
+        return "continue"
+
+    async def advance(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Increment the iteration counter before looping back"""
+        return {"iteration": state.get("iteration", 1) + 1} 
\ No newline at end of file
@@ -0,0 +1,42 @@
+from dataclasses import dataclass
+from typing import Dict
+
+@dataclass(frozen=True)
+class WorkflowProfile:
+    """Named workflow topology, trading scoring depth for cost and latency"""
+    name: str
+    description: str
+    # Run the technical and cultural LLM scorers
+    llm_scoring: bool = True
+    # Run the feedback loop after combining scores
+    feedback: bool = True
+
+FAST = WorkflowProfile(
+    name="fast",
+    description="Embedding similarity only, no LLM calls",
+    llm_scoring=False,
+    feedback=False
+)
+STANDARD = WorkflowProfile(
+    name="standard",
+    description="Single LLM scoring pass without feedback",
+    feedback=False
+)
+THOROUGH = WorkflowProfile(
+    name="thorough",
+    description="LLM scoring refined by the feedback loop"
+)
+
+PROFILES: Dict[str, WorkflowProfile] = {profile.name: profile for profile in (FAST, STANDARD, THOROUGH)}
+
+def get_profile(name: str) -> WorkflowProfile:
+    """
+    Look up a profile by name.
+
+    Raises:
+        ValueError: If the name is not a known profile
+    """
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown workflow profile '{name}', expected one of {list(PROFILES)}") from None
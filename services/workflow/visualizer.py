@@ -2,6 +2,7 @@ from typing import Dict, List, Set, Tuple
 import graphviz
 from IPython.display import display, Markdown
 from .graph import ResumeWorkflow
+from .profiles import PROFILES
 
 class WorkflowVisualizer:
     """Utility class for visualizing the resume scoring workflow using Graphviz"""
@@ -18,6 +19,8 @@ class WorkflowVisualizer:
         # Add nodes
         nodes = {
             "parse": "Resume Parser\n(PDF/Doc → Text)",
+            "segment": "Section Segmenter\n(Text → Compact Sections)",
+            "profile": "Resume Profiler\n(Sections → Cached Profile)",
             "embed": "Text Embedder\n(Text → Vectors)",
             "similarity": "Similarity Scorer\n(Cosine Similarity)",
             "skills": "Technical Skills\nEvaluator",
@@ -33,7 +36,9 @@ class WorkflowVisualizer:
         
         # Add regular edges
         edges = [
-            ("parse", "embed"),
+            ("parse", "segment"),
+            ("segment", "profile"),
+            ("profile", "embed"),
             ("embed", "similarity"),
             ("similarity", "skills"),
             ("skills", "culture"),
@@ -57,6 +62,8 @@ class WorkflowVisualizer:
         """Get color for different types of nodes"""
         colors = {
             "parse": "lightblue",
+            "segment": "lightblue",
+            "profile": "lightblue",
             "embed": "lightgreen",
             "similarity": "lightgreen",
             "skills": "pink",
@@ -81,6 +88,8 @@ class MermaidWorkflowVisualizer:
         """Get Mermaid style for different node types"""
         styles = {
             "parse": "style parse fill:#d0e8ff",
+            "segment": "style segment fill:#d0e8ff",
+            "profile": "style profile fill:#d0e8ff",
             "embed": "style embed fill:#d0ffd0",
             "similarity": "style similarity fill:#d0ffd0",
             "skills": "style skills fill:#ffd0d0",
@@ -99,6 +108,8 @@ class MermaidWorkflowVisualizer:
             "graph TB",
             "    %% Node definitions",
             "    parse[\"Resume Parser<br/>(PDF/Doc → Text)\"]",
+            "    segment[\"Section<br/>Segmenter\"]",
+            "    profile[\"Resume<br/>Profiler\"]",
             "    embed[\"Text Embedder<br/>(Text → Vectors)\"]",
             "    similarity[\"Similarity Scorer<br/>(Cosine)\"]",
             "    skills[\"Technical Skills<br/>Evaluator\"]",
@@ -110,10 +121,12 @@ class MermaidWorkflowVisualizer:
             "    %% Node styles",
             "    classDef default stroke:#333,stroke-width:2px;",
             "    " + "\n    ".join([MermaidWorkflowVisualizer.get_node_style(node) for node in 
-                                  ["parse", "embed", "similarity", "skills", "culture", "combine", "feedback", "end"]]),
+                                  ["parse", "segment", "profile", "embed", "similarity", "skills", "culture", "combine", "feedback", "end"]]),
             "",
             "    %% Regular edges",
-            "    parse --> embed",
+            "    parse --> segment",
+            "    segment --> profile",
+            "    profile --> embed",
             "    embed --> similarity",
             "    similarity --> skills",
             "    skills --> culture",
@@ -138,8 +151,11 @@ def print_workflow_summary(workflow: ResumeWorkflow) -> None:
     print("Resume Scoring Workflow Summary")
     print("==============================")
     print("\nComponents:")
-    print("1. Resume Parser (PDFResumeParser)")
-    print("   - Extracts text from PDF/DOC files")
+    print("1. Resume Parser (FormatDispatchParser)")
+    print("   - Detects PDF/DOCX/text by content and extracts text in memory")
+    
+    print("   - Section Segmenter: Splits text into sections and drops boilerplate")
+    print("   - Resume Profiler: Optionally distils the resume into a cached structured profile")
     
     print("\n2. Embedding Components:")
     print("   - Text Embedder: Converts text to vectors")
@@ -152,17 +168,22 @@ def print_workflow_summary(workflow: ResumeWorkflow) -> None:
     
     print("\nWorkflow Steps:")
     print("1. Parse Resume & Job Description")
-    print("2. Generate Embeddings")
-    print("3. Compute Similarity Score")
-    print("4. Evaluate Technical Skills")
-    print("5. Evaluate Cultural Fit")
-    print("6. Combine Scores")
-    print("7. Get Feedback")
-    print("8. Either:")
+    print("2. Segment Documents into Compact Sections (optionally profile the resume)")
+    print("3. Generate Embeddings")
+    print("4. Compute Similarity Score")
+    print("5. Evaluate Technical Skills")
+    print("6. Evaluate Cultural Fit")
+    print("7. Combine Scores")
+    print("8. Get Feedback")
+    print("9. Either:")
     print("   - Loop back to skills evaluation for refinement with feedback")
     print("   - End if satisfied or max iterations reached")
     
-    print("\nScoring Weights:")
+    print("\nProfiles (selectable per request):")
+    for profile in PROFILES.values():
+        print(f"- {profile.name}: {profile.description}")
+    
+    print("\nScoring Weights (renormalised over the scores a profile produces):")
     print("- Technical Skills: 40%")
     print("- Cultural Fit: 30%")
     print("- Embedding Similarity: 30%") 
\ No newline at end of file
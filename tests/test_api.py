@@ -0,0 +1,66 @@
+import threading
+import time
+import pytest
+from fastapi.testclient import TestClient
+import main
+from services.workflow.graph import ResumeWorkflow
+
+@pytest.fixture(autouse=True)
+def fresh_workflow(monkeypatch):
+    monkeypatch.setattr(main, "_workflow", None)
+
+def test_readiness_waits_for_warm_up(monkeypatch):
+    monkeypatch.setenv("WARMUP", "true")
+    release = threading.Event()
+    
+    async def slow_warm_up(self, connect=False):
+        while not release.is_set():
+            await main.asyncio.sleep(0.01)
+        return {"graphs": 0.01}
+    
+    monkeypatch.setattr(ResumeWorkflow, "warm_up", slow_warm_up)
+    with TestClient(main.app) as client:
+        assert client.get("/healthz").status_code == 200
+        response = client.get("/readyz")
+        assert response.status_code == 503
+        assert response.json()["status"] == "warming_up"
+        
+        release.set()
+        deadline = time.monotonic() + 10
+        while client.get("/readyz").status_code != 200 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        response = client.get("/readyz")
+        assert response.status_code == 200
+        assert response.json() == {"status": "ready", "warm_up": {"graphs": 0.01}}
+
+def test_ready_without_warm_up(monkeypatch):
+    monkeypatch.delenv("WARMUP", raising=False)
+    with TestClient(main.app) as client:
+        assert client.get("/readyz").status_code == 200
+        response = client.get("/metrics", headers={"X-Request-ID": "abc"})
+        assert response.headers["x-request-id"] == "abc"
+        assert "# TYPE" in response.text
+
+def test_request_size_limit_cuts_off_chunked_bodies():
+    from fastapi import FastAPI, File, UploadFile
+    app = FastAPI()
+    app.add_middleware(main.RequestSizeLimit, max_bytes=1024)
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    def body(size):
+        yield b'--xyz\r\nContent-Disposition: form-data; name="file"; filename="a.txt"\r\n\r\n'
+        for _ in range(size // 256):
+            yield b"x" * 256
+        yield b"\r\n--xyz--\r\n"
+
+    headers = {"Content-Type": "multipart/form-data; boundary=xyz"}
+    with TestClient(app) as client:
+        assert client.post("/upload", content=body(512), headers=headers).json() == {"size": 512}
+        # No Content-Length: the body is counted as it streams
+        response = client.post("/upload", content=body(4096), headers=headers)
+        assert response.status_code == 413
+        response = client.post("/upload", content=b"x" * 4096, headers={**headers, "Content-Length": "4096"})
+        assert response.status_code == 413
@@ -0,0 +1,59 @@
+import json
+import pytest
+from bulk_score import Item, completed_ids, discover, open_output, read_manifest, score_all
+from unittest.mock import AsyncMock
+
+@pytest.fixture
+def resumes(tmp_path, sample_resume_text):
+    directory = tmp_path / "resumes"
+    (directory / "team").mkdir(parents=True)
+    (directory / "a.txt").write_text(sample_resume_text)
+    (directory / "team" / "b.txt").write_text("Python developer with five years of experience")
+    (directory / "notes.md").write_text("ignored")
+    return directory
+
+def test_discover_and_manifest(resumes):
+    assert [item.id for item in discover(str(resumes))] == ["a.txt", "team/b.txt"]
+    manifest = resumes / "manifest.txt"
+    manifest.write_text('# nightly\na.txt\n{"id": "cand-2", "path": "team/b.txt"}\n')
+    items = read_manifest(str(manifest))
+    assert [item.id for item in items] == ["a.txt", "cand-2"]
+    assert items[1].path == str(resumes / "team" / "b.txt")
+
+def test_resume_skips_completed_items_and_repairs_partial_line(tmp_path):
+    output = tmp_path / "scores.jsonl"
+    output.write_text('{"id": "a", "status": "ok"}\n{"id": "b", "status": "error"}\n{"id": "c", "sta')
+    assert completed_ids(str(output)) == {"a", "b"}
+    assert completed_ids(str(output), retry_errors=True) == {"a"}
+    with open_output(str(output)) as f:
+        f.write('{"id": "c", "status": "ok"}\n')
+    assert completed_ids(str(output)) == {"a", "b", "c"}
+
+async def test_score_all_streams_results_and_records_failures(resumes, tmp_path):
+    workflow = AsyncMock()
+
+    async def run(upload, jd_id, profile):
+        text = (await upload.read()).decode()
+        if text.startswith("Python developer"):
+            raise RuntimeError("upstream down")
+        return {"final_score": 70.0, "jd_id": jd_id}
+    workflow.run.side_effect = run
+
+    items = discover(str(resumes)) + [Item("missing.pdf", str(resumes / "missing.pdf"))]
+    output = tmp_path / "scores.jsonl"
+    with open_output(str(output)) as f:
+        counts = await score_all(workflow, "jd-1", items, f, pool=None, concurrency=2)
+
+    assert counts == {"ok": 1, "error": 2}
+    records = {record["id"]: record for record in map(json.loads, output.read_text().splitlines())}
+    assert records["a.txt"]["status"] == "ok" and records["a.txt"]["final_score"] == 70.0
+    assert records["team/b.txt"]["error"] == "upstream down"
+    assert records["missing.pdf"]["error_type"] == "FileNotFoundError"
+    assert workflow.run.await_count == 2
+
+def test_last_line_for_an_id_wins(tmp_path):
+    output = tmp_path / "scores.jsonl"
+    output.write_text('{"id": "a", "status": "error"}\n{"id": "a", "status": "ok"}\n'
+                      '{"id": "b", "status": "ok"}\n{"id": "b", "status": "error"}\n')
+    assert completed_ids(str(output)) == {"a", "b"}
+    assert completed_ids(str(output), retry_errors=True) == {"a"}
@@ -0,0 +1,82 @@
+import asyncio
+import time
+import pytest
+from services.cassette import AUTO, RECORD, REPLAY, Cassette, CassetteMissError, request_key, set_cassette
+from services.scorers.chatgpt_scorer import ChatGPTScorer
+from services.usage import track_usage
+from services.workflow import TextEmbeddingNode
+from unittest.mock import AsyncMock, MagicMock
+
+def test_request_key_is_stable_and_order_independent():
+    assert request_key("chat", {"a": 1, "b": [1, 2]}) == request_key("chat", {"b": [1, 2], "a": 1})
+    assert request_key("chat", {"a": 1}) != request_key("embed_query", {"a": 1})
+
+async def test_record_then_replay(tmp_path):
+    path = str(tmp_path / "cassette.jsonl")
+    upstream = AsyncMock(side_effect=["first", "second"])
+
+    recorder = Cassette(path, RECORD)
+    assert await recorder.call("chat", {"q": 1}, upstream) == "first"
+    assert await recorder.call("chat", {"q": 1}, upstream) == "second"
+
+    replayer = Cassette(path, REPLAY)
+    # Repeated requests replay in recording order, then repeat the last response
+    assert [await replayer.call("chat", {"q": 1}, upstream) for _ in range(3)] == ["first", "second", "second"]
+    assert upstream.await_count == 2
+    with pytest.raises(CassetteMissError):
+        await replayer.call("chat", {"q": 2}, upstream)
+
+async def test_rerecording_replaces_the_cassette(tmp_path):
+    path = str(tmp_path / "cassette.jsonl")
+    await Cassette(path, RECORD).call("chat", {"q": 1}, AsyncMock(return_value="stale"))
+    await Cassette(path, RECORD).call("chat", {"q": 1}, AsyncMock(return_value="fresh"))
+
+    assert await Cassette(path, REPLAY).call("chat", {"q": 1}, AsyncMock()) == "fresh"
+    with open(path) as f:
+        assert len(f.readlines()) == 1
+
+async def test_auto_mode_records_misses_and_replay_timing(tmp_path):
+    path = str(tmp_path / "cassette.jsonl")
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return [0.5, 0.5]
+
+    auto = Cassette(path, AUTO)
+    assert await auto.call("embed_query", {"text": "a"}, slow) == [0.5, 0.5]
+    assert await auto.call("embed_query", {"text": "a"}, AsyncMock(side_effect=AssertionError)) == [0.5, 0.5]
+
+    timed = Cassette(path, REPLAY, replay_timing=True)
+    start = time.perf_counter()
+    await timed.call("embed_query", {"text": "a"}, slow)
+    assert time.perf_counter() - start >= 0.04
+
+async def test_chat_and_embedding_calls_are_replayed(tmp_path, monkeypatch):
+    path = str(tmp_path / "cassette.jsonl")
+    scorer = ChatGPTScorer()
+    llm = AsyncMock(temperature=0.3)
+    llm.ainvoke.return_value = MagicMock(content="Score: 70\nRationale: Strengths: Python. Gaps: none observed.",
+                                         response_metadata={})
+    monkeypatch.setattr(scorer, "llm", llm)
+    embedder = MagicMock()
+    embedder.embeddings.aembed_query = AsyncMock(return_value=[1.0, 0.0, 0.0])
+    node = TextEmbeddingNode(embedder=embedder)
+    state = {"resume_text": "Python developer", "job_desc": "Python role"}
+
+    try:
+        set_cassette(Cassette(path, RECORD))
+        recorded = await scorer.score("Python developer", "Python role")
+        await node.process(state)
+
+        set_cassette(Cassette(path, REPLAY))
+        llm.ainvoke.reset_mock()
+        embedder.embeddings.aembed_query.reset_mock()
+        with track_usage() as usage:
+            assert await scorer.score("Python developer", "Python role") == recorded
+            assert list((await node.process(state))["resume_emb"]) == [1.0, 0.0, 0.0]
+        assert not llm.ainvoke.called and not embedder.embeddings.aembed_query.called
+        # Replayed calls still count their tokens but cost nothing
+        summary = usage.summary()
+        assert summary["calls"] == 3 and summary["prompt_tokens"] > 0 and summary["cost_usd"] == 0
+    finally:
+        set_cassette(None)
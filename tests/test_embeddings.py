@@ -1,6 +1,10 @@
 import pytest
 import numpy as np
-from services.embeddings import CosineSimilarityScorer, BaseEmbeddingScorer
+from services.embeddings import (
+    CosineSimilarityScorer, BaseEmbeddingScorer, QuantizedEmbeddingStore,
+    HashingEmbeddings, LocalSimilarityScorer, create_embedding_scorer
+)
+from services.embeddings.chunking import chunk_text, cosine_similarity_matrix, pool_similarity
 from unittest.mock import AsyncMock, MagicMock, patch
 
 class TestBaseEmbeddingScorer:
@@ -73,4 +77,133 @@ class TestCosineSimilarityScorer:
         with patch('services.embeddings.cosine_similarity.OpenAIEmbeddings') as mock_embeddings:
             scorer = CosineSimilarityScorer()
             assert mock_embeddings.called
-            assert hasattr(scorer, 'embeddings') 
\ No newline at end of file
+            assert hasattr(scorer, 'embeddings') 
+
+class TestQuantizedEmbeddingStore:
+    @pytest.fixture
+    def vectors(self):
+        rng = np.random.default_rng(0)
+        return rng.normal(size=(200, 16)).astype(np.float32)
+
+    @pytest.mark.parametrize("dtype", ["int8", "float16"])
+    def test_search_returns_nearest(self, tmp_path, vectors, dtype):
+        store = QuantizedEmbeddingStore(str(tmp_path), dim=16, dtype=dtype)
+        store.add([f"doc-{i}" for i in range(len(vectors))], vectors)
+
+        results = store.search(vectors[42], top_k=3)
+
+        assert len(results) == 3
+        assert results[0][0] == "doc-42"
+        assert np.isclose(results[0][1], 1.0, atol=1e-5)  # rescored at full precision
+
+    def test_append_is_visible_to_other_readers(self, tmp_path, vectors):
+        writer = QuantizedEmbeddingStore(str(tmp_path), dim=16)
+        reader = QuantizedEmbeddingStore(str(tmp_path))
+        assert len(reader) == 0
+
+        writer.add(["a", "b"], vectors[:2])
+        writer.add(["c"], vectors[2:3])
+
+        assert len(reader) == 3
+        assert reader.dim == 16
+        assert "c" in reader
+        assert isinstance(reader._codes, np.memmap)
+
+    def test_quantized_search_without_full_precision(self, tmp_path, vectors):
+        store = QuantizedEmbeddingStore(str(tmp_path), dim=16, keep_full_precision=False)
+        store.add([f"doc-{i}" for i in range(len(vectors))], vectors)
+
+        results = store.search(vectors[7], top_k=1)
+
+        assert results[0][0] == "doc-7"
+        assert np.allclose(store.get("doc-7"), vectors[7] / np.linalg.norm(vectors[7]), atol=0.02)
+
+    def test_rejects_duplicate_ids(self, tmp_path, vectors):
+        store = QuantizedEmbeddingStore(str(tmp_path), dim=16)
+        store.add(["a"], vectors[:1])
+        with pytest.raises(ValueError):
+            store.add(["a"], vectors[1:2])
+        assert len(store) == 1
+
+    def test_replace_supersedes_the_stored_vector(self, tmp_path, vectors):
+        store = QuantizedEmbeddingStore(str(tmp_path), dim=16)
+        store.add(["a", "b"], vectors[:2])
+        store.add(["a"], vectors[2:3], replace=True)
+
+        reader = QuantizedEmbeddingStore(str(tmp_path))
+        assert len(reader) == 2 and sorted(reader.ids) == ["a", "b"]
+        assert np.allclose(reader.get("a"), vectors[2] / np.linalg.norm(vectors[2]), atol=1e-5)
+        # The superseded row is no longer found
+        results = dict(reader.search(vectors[0], top_k=5))
+        assert len(results) == 2
+        assert results["a"] < 0.99
+
+class TestChunking:
+    def test_chunks_are_bounded(self, sample_resume_text):
+        chunks = chunk_text(sample_resume_text * 20, max_chars=300, overlap=50)
+        assert len(chunks) > 1
+        assert all(0 < len(chunk) <= 300 for chunk in chunks)
+
+    def test_long_lines_are_split(self):
+        chunks = chunk_text("word " * 1000, max_chars=100, overlap=0)
+        assert all(len(chunk) <= 100 for chunk in chunks)
+        assert " ".join(chunks).split() == ["word"] * 1000
+
+    def test_blank_document(self):
+        assert chunk_text("  \n\n ") == []
+
+    def test_pooling_modes(self):
+        # Rows are resume chunks, columns are job description chunks
+        matrix = np.array([
+            [0.9, 0.1, 0.2],
+            [0.3, 0.5, 0.4]
+        ])
+        assert np.isclose(pool_similarity(matrix, "max"), 0.9)
+        assert np.isclose(pool_similarity(matrix, "mean"), (0.9 + 0.5 + 0.4) / 3)
+        assert np.isclose(pool_similarity(matrix, "topk_mean", top_k=2), (0.9 + 0.5) / 2)
+        with pytest.raises(ValueError):
+            pool_similarity(matrix, "median")
+
+    def test_cosine_similarity_matrix(self):
+        matrix = cosine_similarity_matrix([[1, 0], [0, 2]], [[3, 0], [1, 1], [0, 0]])
+        assert matrix.shape == (2, 3)
+        assert np.isclose(matrix[0, 0], 1.0)
+        assert np.isclose(matrix[1, 1], np.sqrt(0.5))
+        assert matrix[0, 2] == 0.0
+
+class TestHashingEmbeddings:
+    def test_deterministic_and_normalised(self, sample_resume_text):
+        embeddings = HashingEmbeddings(dim=256)
+        vec1 = embeddings.embed_query(sample_resume_text)
+        vec2 = HashingEmbeddings(dim=256).embed_query(sample_resume_text)
+        assert len(vec1) == 256
+        assert vec1 == vec2
+        assert np.isclose(np.linalg.norm(vec1), 1.0)
+
+    def test_related_texts_score_higher(self, sample_resume_text, sample_job_description):
+        embeddings = HashingEmbeddings()
+        resume, job, unrelated = embeddings.transform([
+            sample_resume_text,
+            sample_job_description,
+            "Pastry chef with ten years of experience baking sourdough and croissants"
+        ])
+        assert np.dot(resume, job) > np.dot(unrelated, job)
+
+    def test_fit_idf(self, sample_resume_text, sample_job_description):
+        embeddings = HashingEmbeddings(dim=128).fit([sample_resume_text, sample_job_description])
+        assert embeddings.idf.shape == (128,)
+        assert embeddings.transform(["python"]).shape == (1, 128)
+
+    @pytest.mark.asyncio
+    async def test_local_scorer(self, sample_resume_text):
+        scorer = LocalSimilarityScorer(dim=64)
+        assert np.isclose(await scorer.compute_similarity(sample_resume_text, sample_resume_text), 1.0)
+        assert len(await scorer.embeddings.aembed_documents(["a b c"] * 10)) == 10
+
+    def test_factory(self, monkeypatch):
+        monkeypatch.setenv("EMBEDDING_BACKEND", "local")
+        assert isinstance(create_embedding_scorer(), LocalSimilarityScorer)
+        with patch('services.embeddings.cosine_similarity.OpenAIEmbeddings'):
+            assert isinstance(create_embedding_scorer("openai"), CosineSimilarityScorer)
+        with pytest.raises(ValueError):
+            create_embedding_scorer("word2vec")
@@ -0,0 +1,66 @@
+import httpx
+import numpy as np
+import pytest
+from langchain.chat_models import ChatOpenAI
+from langchain.embeddings import OpenAIEmbeddings
+from benchmarks.fake_openai import FakeUpstreamConfig, LatencyModel, chat_reply, create_app, serve
+from services.resilience import ResiliencePolicy, ResilientCaller
+from services.scorers import ChatGPTScorer
+from services.tokens import decode_tokens
+
+def _client(config: FakeUpstreamConfig) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app(config)), base_url="http://fake")
+
+def test_latency_model_parsing():
+    assert LatencyModel.parse("fixed:50").sample(None) == pytest.approx(0.05)
+    with pytest.raises(ValueError):
+        LatencyModel.parse("gaussian:1")
+
+def test_chat_reply_is_deterministic_and_parseable():
+    messages = [{"role": "user", "content": "Candidate Resume:\nPython FastAPI Docker\nJob Description:\nPython Kubernetes"}]
+    reply = chat_reply(messages)
+    assert reply == chat_reply(messages)
+    score_line, rationale_line = reply.splitlines()
+    assert 35 <= float(score_line.split(":")[1]) <= 100
+    assert "Strengths: python" in rationale_line and "kubernetes" in rationale_line
+
+async def test_injected_rate_limits_and_errors():
+    async with _client(FakeUpstreamConfig(rate_limit_rate=1.0, retry_after=2)) as client:
+        response = await client.post("/v1/chat/completions", json={"messages": []})
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "2"
+    async with _client(FakeUpstreamConfig(error_rate=1.0)) as client:
+        response = await client.post("/v1/embeddings", json={"input": ["text"]})
+        assert response.status_code == 500
+
+async def test_embeddings_accept_text_and_token_ids():
+    async with _client(FakeUpstreamConfig(embedding_dim=64)) as client:
+        first = (await client.post("/v1/embeddings", json={"input": ["python developer", [1, 2, 3]]})).json()
+        second = (await client.post("/v1/embeddings", json={"input": "python developer"})).json()
+    assert len(first["data"]) == 2 and len(first["data"][0]["embedding"]) == 64
+    assert np.allclose(first["data"][0]["embedding"], second["data"][0]["embedding"])
+
+async def test_chat_model_against_fake_server(monkeypatch):
+    with serve(FakeUpstreamConfig(chat_latency=LatencyModel.parse("uniform:1:5"))) as base_url:
+        monkeypatch.setenv("OPENAI_API_BASE", base_url)
+        scorer = ChatGPTScorer()
+        await scorer.warm_up()
+        score, rationale = await scorer.score("Python, FastAPI, Docker", "Python and Kubernetes", "technical skills")
+        assert 35 <= score <= 100
+        assert "Strengths" in rationale
+
+@pytest.mark.skipif(decode_tokens([9906]) is None, reason="OpenAIEmbeddings needs tiktoken's BPE file, which is not cached")
+async def test_langchain_embeddings_against_fake_server(monkeypatch):
+    with serve() as base_url:
+        monkeypatch.setenv("OPENAI_API_BASE", base_url)
+        vector = await OpenAIEmbeddings(max_retries=0).aembed_query("python developer")
+        assert len(vector) == 1536
+
+async def test_rate_limits_are_retried_by_resilience_layer():
+    config = FakeUpstreamConfig(rate_limit_rate=0.5, seed=3)
+    with serve(config) as base_url:
+        llm = ChatOpenAI(max_retries=0, openai_api_base=base_url)
+        caller = ResilientCaller("fake", ResiliencePolicy(max_attempts=10, backoff_base=0.001, failure_threshold=100))
+        for _ in range(5):
+            message = await caller.call(lambda: llm.ainvoke("Candidate Resume:\nPython\nJob Description:\nPython"))
+            assert message.content.startswith("Score:")
@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.mark.parametrize("module", ["services", "main"])
+def test_import_does_not_load_heavy_dependencies(module):
+    heavy = ("langchain", "langgraph", "unstructured", "fitz", "docx", "graphviz")
+    code = f"import sys, {module}; sys.__stdout__.write(','.join(m for m in {heavy!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True,
+                            env={**os.environ, "OPENAI_API_KEY": "sk-test"})
+    assert result.returncode == 0, result.stderr
+    assert result.stdout == ""
+
+def test_lazy_exports_resolve():
+    from services import parsers, workflow
+    assert parsers.PyMuPDFResumeParser.__name__ == "PyMuPDFResumeParser"
+    assert workflow.ResumeWorkflow.__name__ == "ResumeWorkflow"
+    with pytest.raises(AttributeError):
+        workflow.NotAThing
+
+def test_building_the_workflow_prints_no_deprecation_warnings():
+    code = "import main; main.get_workflow()"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True,
+                            env={**os.environ, "OPENAI_API_KEY": "sk-test", "EMBEDDING_BACKEND": "openai"})
+    assert result.returncode == 0, result.stderr
+    assert "DeprecationWarning" not in result.stderr
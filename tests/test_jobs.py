@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from services.jobs import JobRegistry, RegisteredJob, JobNotFoundError, make_jd_id
+
+@pytest.fixture
+def job(sample_job_description):
+    return RegisteredJob(
+        jd_id=make_jd_id(sample_job_description),
+        text=sample_job_description,
+        sections={"header": "Senior Software Engineer", "requirements": "- Python development"},
+        compact="Senior Software Engineer\n\nREQUIREMENTS:\n- Python development",
+        requirements=["Python development"],
+        embedding_model="HashingEmbeddings",
+        embedding=[0.6, 0.8],
+        chunking=(2000, 200),
+        chunk_embeddings=[[1.0, 0.0], [0.0, 1.0]]
+    )
+
+def test_registry_persists_jobs(tmp_path, job):
+    JobRegistry(path=str(tmp_path)).put(job)
+    
+    # A new process only sees the files
+    loaded = JobRegistry(path=str(tmp_path)).require(job.jd_id)
+    assert loaded.text == job.text
+    assert loaded.sections == job.sections
+    assert loaded.requirements == ["Python development"]
+    assert loaded.chunking == (2000, 200)
+    assert loaded.embedding.dtype == np.float32
+    assert loaded.embedding.tolist() == pytest.approx([0.6, 0.8])
+    assert loaded.chunk_embeddings.tolist() == [[1.0, 0.0], [0.0, 1.0]]
+    assert "text" not in loaded.summary()
+
+def test_registry_rejects_unknown_ids(tmp_path, job):
+    registry = JobRegistry(path=str(tmp_path))
+    registry.put(job)
+    
+    assert job.jd_id in registry
+    assert registry.get("0" * 16) is None
+    # Ids are never used as paths unless they are plain hashes
+    assert registry.get("../" + job.jd_id) is None
+    with pytest.raises(JobNotFoundError):
+        registry.require("missing")
+
+def test_in_memory_registry(job):
+    registry = JobRegistry(path="")
+    registry.put(job)
+    assert registry.require(job.jd_id) is job
@@ -0,0 +1,43 @@
+import httpx
+from fastapi import FastAPI, Response
+from benchmarks.load_test import LoadTest, default_mix, node_breakdown, parse_mix, percentile, span_totals
+from services.metrics import MetricsRegistry, render_prometheus
+
+def test_mix_and_percentiles():
+    assert ("sample_resume.pdf", "sample_job.pdf") in default_mix()
+    assert parse_mix("a.pdf:b.pdf=2,c.txt:d.txt") == [("a.pdf", "b.pdf")] * 2 + [("c.txt", "d.txt")]
+    values = [float(value) for value in range(1, 101)]
+    assert percentile(values, 0.5) == 51.0
+    assert percentile(values, 0.99) == 100.0
+    assert percentile([], 0.5) is None
+
+def test_node_breakdown_from_metrics_scrapes():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("workflow_span_duration_seconds", "", buckets=(1.0,))
+    histogram.observe(0.5, span="parse", outcome="ok")
+    before = span_totals(render_prometheus(registry))
+    histogram.observe(0.25, span="parse", outcome="ok")
+    histogram.observe(0.75, span="parse", outcome="error")
+    histogram.observe(2.0, span="skills", outcome="ok")
+    breakdown = node_breakdown(before, span_totals(render_prometheus(registry)))
+    assert list(breakdown) == ["skills", "parse"]
+    assert breakdown["parse"] == {"calls": 2, "total_seconds": 1.0, "mean_seconds": 0.5}
+
+async def test_load_test_counts_statuses():
+    app = FastAPI()
+    calls = []
+
+    @app.post("/score")
+    async def score():
+        calls.append(1)
+        return Response(status_code=200 if len(calls) % 2 else 500)
+
+    mix = [("sample_resume.txt", "sample_job.txt")]
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        for rate in (None, 200.0):
+            calls.clear()
+            load = LoadTest(client, mix, requests=10, concurrency=3, rate=rate)
+            summary = load.summary(await load.run())
+            assert summary["requests"] == 10 and len(calls) == 10
+            assert summary["statuses"] == {"200": 5, "500": 5} and summary["error_rate"] == 0.5
+            assert summary["latency_seconds"]["p50"] is not None
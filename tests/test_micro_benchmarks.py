@@ -0,0 +1,36 @@
+import pytest
+from benchmarks.micro import BENCHMARKS, Benchmark, Result, Runner, compare
+
+@pytest.fixture
+def runner():
+    runner = Runner(repeat=3, warmup=0, min_time=0.0)
+    yield runner
+    runner.close()
+
+def test_runner_times_sync_and_async_operations(runner):
+    calls = []
+
+    async def operation():
+        calls.append(1)
+
+    result = runner.run(Benchmark("async", lambda: operation))
+    assert result.loops == 1 and len(result.samples) == 3
+    # One probe call, one calibration batch, three samples
+    assert len(calls) == 5
+    assert runner.run(Benchmark("sync", lambda: lambda: sum(range(10)))).median > 0
+
+def test_missing_dependency_is_skipped(runner):
+    def setup():
+        import not_an_installed_module  # noqa: F401
+    result = runner.run(Benchmark("missing", setup))
+    assert result.skipped and result.as_dict() == {"skipped": result.skipped}
+
+def test_compare_flags_regressions_beyond_threshold_and_noise():
+    baseline = {"fast": {"median": 1.0, "iqr": 0.0}, "noisy": {"median": 1.0, "iqr": 0.5}, "same": {"median": 1.0, "iqr": 0.0}}
+    results = [Result("fast", [1.4] * 4), Result("noisy", [1.4] * 4), Result("same", [1.1] * 4), Result("new", [9.0] * 4)]
+    assert compare(results, baseline, threshold=0.25) == ["fast"]
+
+def test_every_benchmark_runs(runner):
+    for bench in BENCHMARKS.values():
+        result = runner.run(bench)
+        assert result.skipped or result.median > 0, bench.name
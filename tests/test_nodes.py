@@ -1,7 +1,10 @@
+import asyncio
 import pytest
 import numpy as np
+from services.parsers import DocumentParseError
+from services.resilience import UpstreamUnavailableError
 from services.workflow.nodes import (
-    ResumeParserNode, TextEmbeddingNode, SimilarityScoreNode,
+    ResumeParserNode, SegmentationNode, ResumeProfileNode, TextEmbeddingNode, SimilarityScoreNode,
     TechnicalSkillsNode, CulturalFitNode, ScoreCombinerNode,
     FeedbackNode, IterationDecisionNode
 )
@@ -40,6 +43,127 @@ async def test_resume_parser_node(mock_parser, mock_resume_file, mock_job_file):
     assert "resume_text" in result
     assert "job_desc" in result
     assert mock_parser.parse_file.call_count == 2
+    # Only updates are returned, and the upload handles are released
+    assert result["resume_file"] is None and result["job_file"] is None
+    assert "iteration" not in result
+
+@pytest.mark.asyncio
+async def test_resume_parser_node_parses_concurrently(mock_resume_file, mock_job_file):
+    started = []
+    both_started = asyncio.Event()
+
+    async def parse_file(file):
+        started.append(file.filename)
+        if len(started) == 2:
+            both_started.set()
+        # Would deadlock if the documents were parsed one after the other
+        await asyncio.wait_for(both_started.wait(), timeout=1)
+        return f"text of {file.filename}"
+
+    parser = MagicMock()
+    parser.parse_file = parse_file
+    result = await ResumeParserNode(parser=parser).process({
+        "resume_file": mock_resume_file,
+        "job_file": mock_job_file
+    })
+    
+    assert result["resume_text"] == "text of resume.pdf"
+    assert result["job_desc"] == "text of job.pdf"
+
+@pytest.mark.asyncio
+async def test_resume_parser_node_failure_cancels_other_parse(mock_resume_file, mock_job_file):
+    cancelled = asyncio.Event()
+
+    async def parse_file(file):
+        if file.filename == "job.pdf":
+            raise DocumentParseError("Could not open PDF: corrupt xref table")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    parser = MagicMock()
+    parser.parse_file = parse_file
+    with pytest.raises(DocumentParseError) as exc_info:
+        await ResumeParserNode(parser=parser).process({
+            "resume_file": mock_resume_file,
+            "job_file": mock_job_file
+        })
+    
+    assert exc_info.value.document == "job_description"
+    assert "corrupt xref table" in str(exc_info.value)
+    assert cancelled.is_set()
+
+@pytest.mark.asyncio
+async def test_resume_parser_node_does_not_blame_the_document_for_server_faults(mock_resume_file, mock_job_file):
+    parser = MagicMock()
+    parser.parse_file = AsyncMock(side_effect=OSError("disk full"))
+    with pytest.raises(OSError):
+        await ResumeParserNode(parser=parser).process({
+            "resume_file": mock_resume_file,
+            "job_file": mock_job_file
+        })
+
+@pytest.mark.asyncio
+async def test_segmentation_node(sample_resume_text, sample_job_description):
+    node = SegmentationNode(resume_token_budget=60, job_token_budget=1000)
+    state = {
+        "resume_text": sample_resume_text,
+        "job_desc": sample_job_description
+    }
+    
+    result = await node.process(state)
+    
+    assert set(result["resume_sections"]) >= {"header", "experience", "skills"}
+    assert set(result["job_sections"]) >= {"requirements", "nice_to_have"}
+    assert "john@example.com" not in result["resume_compact"]
+    assert len(result["resume_compact"]) <= 60 * 4
+    assert "NICE TO HAVE:" in result["job_compact"]
+
+@pytest.mark.asyncio
+async def test_scoring_nodes_prefer_compact_text(mock_scorer):
+    node = TechnicalSkillsNode(scorer=mock_scorer)
+    state = {
+        "resume_text": "Raw resume",
+        "job_desc": "Raw job",
+        "resume_compact": "Compact resume",
+        "job_compact": "Compact job"
+    }
+    
+    await node.process(state)
+    
+    assert mock_scorer.score.call_args.args[:2] == ("Compact resume", "Compact job")
+
+@pytest.mark.asyncio
+async def test_resume_profile_node(mock_scorer):
+    profiler = AsyncMock()
+    profiler.profile.return_value = {"total_years": 7.0}
+    profiler.render = MagicMock(return_value="Total experience: 7.0 years")
+    state = {"resume_text": "Raw resume", "job_desc": "Raw job", "resume_compact": "Compact resume"}
+    
+    assert await ResumeProfileNode(profiler=profiler, enabled=False).process(state) == {}
+    profiler.profile.assert_not_called()
+    
+    result = await ResumeProfileNode(profiler=profiler, enabled=True).process(state)
+    profiler.profile.assert_awaited_once_with("Compact resume")
+    assert result["resume_profile"] == {"total_years": 7.0}
+    
+    # Nodes return only their updates; the graph merges them into the state
+    await TechnicalSkillsNode(scorer=mock_scorer).process({**state, **result})
+    assert mock_scorer.score.call_args.args[0] == "Total experience: 7.0 years"
+    
+    # An unusable reply falls back to the compact text
+    profiler.profile.side_effect = ValueError("no JSON")
+    result = await ResumeProfileNode(profiler=profiler, enabled=True).process(state)
+    assert "resume_profile_text" not in result
+
+    # So does an upstream failure, while cancellation still propagates
+    profiler.profile.side_effect = UpstreamUnavailableError("llm", 5.0)
+    assert await ResumeProfileNode(profiler=profiler, enabled=True).process(state) == {}
+    profiler.profile.side_effect = asyncio.CancelledError()
+    with pytest.raises(asyncio.CancelledError):
+        await ResumeProfileNode(profiler=profiler, enabled=True).process(state)
 
 @pytest.mark.asyncio
 async def test_text_embedding_node(mock_embedder):
@@ -54,7 +178,46 @@ async def test_text_embedding_node(mock_embedder):
     assert "resume_emb" in result
     assert "job_emb" in result
     assert len(result["resume_emb"]) == 3
+    assert result["resume_emb"].dtype == np.float32
     assert mock_embedder.embeddings.aembed_query.call_count == 2
+    assert set(result) == {"resume_emb", "job_emb"}
+
+@pytest.mark.asyncio
+async def test_text_embedding_node_chunked(mock_embedder, sample_resume_text, sample_job_description):
+    mock_embedder.embeddings.aembed_documents.side_effect = lambda texts: [[float(len(t)), 1.0, 0.0] for t in texts]
+    node = TextEmbeddingNode(embedder=mock_embedder, chunked=True, chunk_size=120, chunk_overlap=0, batch_size=2)
+    state = {
+        "resume_text": sample_resume_text,
+        "job_desc": sample_job_description
+    }
+    
+    result = await node.process(state)
+    
+    assert len(result["resume_chunk_embs"]) > 1
+    assert len(result["job_chunk_embs"]) > 1
+    assert result["job_chunk_embs"].dtype == np.float32
+    assert len(result["resume_emb"]) == 3
+    assert all(len(batch.args[0]) <= 2 for batch in mock_embedder.embeddings.aembed_documents.call_args_list)
+    assert not mock_embedder.embeddings.aembed_query.called
+    
+    # Chunk vectors are cached, so a second pass makes no embedding calls
+    calls = mock_embedder.embeddings.aembed_documents.call_count
+    await node.process(state)
+    assert mock_embedder.embeddings.aembed_documents.call_count == calls
+
+@pytest.mark.asyncio
+async def test_similarity_score_node_chunked():
+    node = SimilarityScoreNode(pooling="mean")
+    state = {
+        "resume_emb": [1, 0],
+        "job_emb": [0, 1],
+        "resume_chunk_embs": [[1, 0], [0, 1]],
+        "job_chunk_embs": [[1, 0], [1, 1]]
+    }
+    
+    result = await node.process(state)
+    
+    assert abs(result["cosine_score"] - (1.0 + np.sqrt(0.5)) / 2) < 1e-6
 
 @pytest.mark.asyncio
 async def test_similarity_score_node():
@@ -118,6 +281,15 @@ async def test_score_combiner_node():
     expected_score = (0.3 * 80 + 0.4 * 85 + 0.3 * 75)
     assert abs(result["final_score"] - expected_score) < 0.01
 
+@pytest.mark.asyncio
+async def test_score_combiner_node_renormalises_missing_scores():
+    node = ScoreCombinerNode()
+    
+    result = await node.process({"cosine_score": 0.8})
+    
+    assert abs(result["final_score"] - 80.0) < 0.01
+    assert "Technical" not in result["final_explanation"]
+
 @pytest.mark.asyncio
 async def test_feedback_node(mock_scorer, sample_evaluation):
     node = FeedbackNode(scorer=mock_scorer)
@@ -152,4 +324,15 @@ def test_iteration_decision_node():
     
     # Test completion due to max iterations
     state = {"iteration": 3, "feedback_status": "Changes needed"}
-    assert node.decide(state) == "end" 
\ No newline at end of file
+    assert node.decide(state) == "end" 
+    
+    # The counter is advanced by its own graph step, not by mutating the state
+    state = {"iteration": 1, "feedback_status": "Changes needed"}
+    node.decide(state)
+    assert state["iteration"] == 1
+
+@pytest.mark.asyncio
+async def test_iteration_decision_node_advance():
+    node = IterationDecisionNode(max_iterations=3)
+    assert await node.advance({"iteration": 2}) == {"iteration": 3}
+
@@ -0,0 +1,238 @@
+import pytest
+import docx
+import fitz
+from io import BytesIO
+from fastapi import UploadFile
+from services.parsers import (
+    FormatDispatchParser, DOCXResumeParser, PDFResumeParser, PyMuPDFResumeParser,
+    detect_format, UnsupportedDocumentError, DocumentParseError,
+    DocumentTooLargeError, PageLimitExceededError, ParseLimits, read_upload
+)
+from services.tokens import count_tokens
+from services.parsers.segmenter import (
+    segment_document, compact_text, normalize_line, JOB_PRIORITY
+)
+
+def make_pdf(pages):
+    document = fitz.open()
+    for text in pages:
+        page = document.new_page()
+        page.insert_text((72, 72), text)
+    content = document.tobytes()
+    document.close()
+    return content
+
+def make_docx(paragraphs, table=None):
+    document = docx.Document()
+    for text in paragraphs:
+        document.add_paragraph(text)
+    if table:
+        grid = document.add_table(rows=len(table), cols=len(table[0]))
+        for row, values in zip(grid.rows, table):
+            for cell, value in zip(row.cells, values):
+                cell.text = value
+    buffer = BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+def test_detect_format():
+    assert detect_format(make_pdf(["Resume"])) == "pdf"
+    assert detect_format(make_docx(["Resume"])) == "docx"
+    assert detect_format("Plain résumé text".encode("utf-8")) == "text"
+    with pytest.raises(UnsupportedDocumentError):
+        detect_format(b"")
+    with pytest.raises(UnsupportedDocumentError):
+        detect_format(b"\xd0\xcf\x11\xe0legacy word")
+    with pytest.raises(UnsupportedDocumentError):
+        detect_format(b"\x00\xff\xfe\x00" * 10)
+
+@pytest.mark.asyncio
+async def test_docx_parser_keeps_table_order():
+    content = make_docx(["SKILLS"], table=[["Python", "5 years"], ["Kubernetes", "2 years"]])
+    text = await DOCXResumeParser().parse_bytes(content)
+    assert text.splitlines() == ["SKILLS", "Python | 5 years", "Kubernetes | 2 years"]
+
+@pytest.mark.asyncio
+async def test_pymupdf_parser_rejects_corrupt_pdf():
+    with pytest.raises(DocumentParseError):
+        await PyMuPDFResumeParser().parse_bytes(b"%PDF-1.7 not really a pdf")
+
+@pytest.mark.asyncio
+async def test_dispatch_ignores_filename():
+    parser = FormatDispatchParser()
+    # A DOCX uploaded with a .pdf name still goes to the DOCX backend
+    docx_upload = UploadFile(filename="resume.pdf", file=BytesIO(make_docx(["Senior Engineer"])))
+    pdf_upload = UploadFile(filename="job.docx", file=BytesIO(make_pdf(["Platform Director"])))
+
+    assert "Senior Engineer" in await parser.parse_file(docx_upload)
+    assert "Platform Director" in await parser.parse_file(pdf_upload)
+
+@pytest.mark.asyncio
+async def test_dispatch_sample_files():
+    parser = FormatDispatchParser()
+    with open("samples/sample_resume.pdf", "rb") as f:
+        pdf_text = await parser.parse_bytes(f.read())
+    with open("samples/sample_job.txt", "rb") as f:
+        txt_text = await parser.parse_bytes(f.read())
+    assert "JOHN DOE" in pdf_text
+    assert txt_text.strip()
+
+@pytest.mark.asyncio
+async def test_read_upload_rejects_oversized_stream():
+    upload = UploadFile(filename="big.pdf", file=BytesIO(b"x" * 1000))
+    with pytest.raises(DocumentTooLargeError) as exc_info:
+        await read_upload(upload, max_bytes=100, chunk_size=64)
+    assert exc_info.value.status_code == 413
+    # Rejected after the first chunk past the limit, not after reading everything
+    assert upload.file.tell() <= 192
+
+@pytest.mark.asyncio
+async def test_read_upload_uses_declared_size():
+    upload = UploadFile(filename="big.pdf", file=BytesIO(b"x" * 10), size=10_000)
+    with pytest.raises(DocumentTooLargeError):
+        await read_upload(upload, max_bytes=100)
+    assert upload.file.tell() == 0
+
+@pytest.mark.asyncio
+async def test_page_limit_rejects_or_truncates():
+    content = make_pdf([f"Page {i}" for i in range(1, 6)])
+
+    with pytest.raises(PageLimitExceededError) as exc_info:
+        await PyMuPDFResumeParser(ParseLimits(max_pages=3)).parse_bytes(content)
+    assert exc_info.value.status_code == 422
+
+    text = await PyMuPDFResumeParser(ParseLimits(max_pages=3, truncate=True)).parse_bytes(content)
+    assert "Page 3" in text
+    assert "Page 4" not in text
+
+@pytest.mark.asyncio
+async def test_unstructured_backend_applies_the_page_limit_before_partitioning(monkeypatch):
+    import langchain.document_loaders
+    partitioned = []
+
+    class FakeLoader:
+        """Stands in for Unstructured, which is not installed everywhere"""
+        def __init__(self, path):
+            self.path = path
+
+        def load(self):
+            with fitz.open(self.path) as document:
+                pages = [page.get_text() for page in document]
+            partitioned.append(len(pages))
+            return [type("Doc", (), {"page_content": text})() for text in pages]
+
+    monkeypatch.setattr(langchain.document_loaders, "UnstructuredPDFLoader", FakeLoader)
+    content = make_pdf([f"Page {i}" for i in range(1, 6)])
+
+    with pytest.raises(PageLimitExceededError):
+        await PDFResumeParser(ParseLimits(max_pages=3)).parse_bytes(content)
+    assert partitioned == []
+
+    text = await PDFResumeParser(ParseLimits(max_pages=3, truncate=True)).parse_bytes(content)
+    assert partitioned == [3]
+    assert "Page 3" in text and "Page 4" not in text
+
+@pytest.mark.asyncio
+async def test_char_limit_truncates():
+    limits = ParseLimits(max_chars=20, truncate=True)
+    parser = FormatDispatchParser(limits=limits)
+    assert len(await parser.parse_bytes(make_docx(["A long paragraph of resume text"] * 5))) == 20
+    assert len(await parser.parse_bytes(b"plain text " * 100)) == 20
+
+def test_parse_limits_from_env(monkeypatch):
+    monkeypatch.setenv("PARSE_MAX_PAGES", "2")
+    monkeypatch.setenv("PARSE_LIMIT_MODE", "truncate")
+    limits = ParseLimits.from_env()
+    assert limits.max_pages == 2
+    assert limits.truncate
+
+def test_segment_resume(sample_resume_text):
+    sections = segment_document(sample_resume_text)
+    
+    assert list(sections) == ["header", "experience", "skills"]
+    assert sections["header"] == "JOHN DOE\nSoftware Engineer"
+    assert "- Led development of microservices architecture" in sections["experience"]
+    assert "Tools: Docker, Kubernetes, AWS" in sections["skills"]
+
+def test_segment_job_description(sample_job_description):
+    sections = segment_document(sample_job_description)
+    
+    assert "Required Experience: 5+ years" in sections["requirements"]
+    assert "- Python development" in sections["requirements"]
+    assert "- Kubernetes expertise" in sections["nice_to_have"]
+
+def test_drops_boilerplate_and_repeated_footers():
+    text = "\n".join([
+        "Jane Roe",
+        "jane@example.com | +1 (555) 123-4567 | linkedin.com/in/jane",
+        "Experience",
+        "Engineer at Acme  (2018 - 2020)",
+        "Confidential - Acme Resume",
+        "Page 1 of 3\fLead at Initech",
+        "Confidential - Acme Resume\fSkills",
+        "•   Go,   Rust",
+        "Confidential - Acme Resume",
+        "Benefits",
+        "Free snacks"
+    ])
+    sections = segment_document(text)
+    
+    assert sections == {
+        "header": "Jane Roe",
+        "experience": "Engineer at Acme (2018 - 2020)\nLead at Initech",
+        "skills": "- Go, Rust"
+    }
+
+def test_repeated_content_is_kept_unless_it_is_page_furniture():
+    roles = ["Software Engineer", "Acme (2020 - 2022)", "Software Engineer", "Initech (2018 - 2020)",
+             "Software Engineer", "Globex (2016 - 2018)"]
+    sections = segment_document("\n".join(["Experience", *roles]))
+    assert sections["experience"].count("Software Engineer") == 3
+    
+    # Across pages, only repeats at the page edges are running headers and footers
+    bullets = ["- Built APIs", "- Ran on-call", "- Mentored engineers", "- Cut costs"]
+    pages = [
+        ["Jane Roe", "Experience", *bullets, *roles[:2], *bullets, *roles[2:4], *bullets, "Draft v2"],
+        ["Jane Roe", *bullets, *roles[4:], *bullets, "Draft v2"]
+    ]
+    sections = segment_document("\f".join("\n".join(page) for page in pages))
+    assert sections["experience"].count("Software Engineer") == 3
+    assert "header" not in sections
+    assert "Draft v2" not in sections["experience"]
+
+def test_bullets_and_sentences_are_not_headings():
+    text = "\n".join([
+        "Requirements",
+        "- Experience with Kubernetes",
+        "- Skills in Go and Rust",
+        "- 5+ years building APIs",
+        "Skills in distributed systems are a plus",
+        "TECHNICAL SKILLS & TOOLS",
+        "- Terraform"
+    ])
+    sections = segment_document(text)
+    assert sections == {
+        "requirements": "- Experience with Kubernetes\n- Skills in Go and Rust\n- 5+ years building APIs\n"
+                        "Skills in distributed systems are a plus",
+        "skills": "- Terraform"
+    }
+
+def test_segmentation_is_cached(sample_resume_text):
+    first = segment_document(sample_resume_text)
+    first["experience"] = "mutated"
+    assert segment_document(sample_resume_text)["experience"] != "mutated"
+
+def test_compact_text_respects_budget_and_priority(sample_job_description):
+    sections = segment_document(sample_job_description)
+    
+    full = compact_text(sections, priority=JOB_PRIORITY)
+    short = compact_text(sections, token_budget=30, priority=JOB_PRIORITY)
+    
+    assert full.index("REQUIREMENTS:") < full.index("NICE TO HAVE:")
+    assert count_tokens(short) <= 30
+    assert "REQUIREMENTS:" in short
+    assert "NICE TO HAVE:" not in short
+    assert count_tokens(full) < count_tokens(sample_job_description)
+
+def test_normalize_line():
+    assert normalize_line("  ●  Built   CI/CD\tpipelines ") == "- Built CI/CD pipelines"
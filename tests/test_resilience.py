@@ -0,0 +1,145 @@
+import asyncio
+import pytest
+from services.metrics import metrics
+from services.resilience import (
+    CircuitBreaker, ResiliencePolicy, ResilientCaller, UpstreamUnavailableError, is_retryable
+)
+
+class RateLimitError(Exception):
+    """Stands in for the OpenAI client error of the same name"""
+
+def flaky(failures, result="ok", error=ConnectionError):
+    calls = []
+    async def call():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise error("upstream hiccup")
+        return result
+    return call, calls
+
+def make_caller(name, **policy):
+    policy = {"backoff_base": 0.0, **policy}
+    return ResilientCaller(name, ResiliencePolicy(**policy))
+
+def test_is_retryable():
+    assert is_retryable(asyncio.TimeoutError())
+    assert is_retryable(RateLimitError())
+    assert not is_retryable(ValueError("bad request"))
+
+@pytest.mark.asyncio
+async def test_retries_retryable_errors():
+    caller = make_caller("test-retry", max_attempts=3)
+    call, calls = flaky(2)
+    
+    assert await caller.call(call) == "ok"
+    assert len(calls) == 3
+    assert metrics.counter("upstream_retries_total").value(upstream="test-retry") == 2
+
+@pytest.mark.asyncio
+async def test_does_not_retry_client_errors():
+    caller = make_caller("test-client-error", max_attempts=3)
+    call, calls = flaky(1, error=ValueError)
+    
+    with pytest.raises(ValueError):
+        await caller.call(call)
+    assert len(calls) == 1
+    assert caller.breaker.state == "closed"
+
+@pytest.mark.asyncio
+async def test_timeout_bounds_each_attempt():
+    caller = make_caller("test-timeout", timeout=0.05, max_attempts=2)
+    
+    async def slow():
+        await asyncio.sleep(1)
+    
+    with pytest.raises(asyncio.TimeoutError):
+        await caller.call(slow)
+    assert metrics.counter("upstream_timeouts_total").value(upstream="test-timeout") == 2
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_opens_and_recovers():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+    caller = ResilientCaller("test-breaker", ResiliencePolicy(max_attempts=2, backoff_base=0.0), breaker)
+    call, calls = flaky(2)
+    
+    with pytest.raises(ConnectionError):
+        await caller.call(call)
+    assert breaker.state == "open"
+    with pytest.raises(UpstreamUnavailableError):
+        await caller.call(call)
+    assert len(calls) == 2
+    
+    # After the reset timeout one trial call closes the circuit again
+    now[0] = 11
+    assert breaker.state == "half_open"
+    assert await caller.call(call) == "ok"
+    assert breaker.state == "closed"
+
+@pytest.mark.asyncio
+async def test_cancelled_half_open_trial_releases_the_circuit():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+    caller = ResilientCaller("test-breaker-cancel", ResiliencePolicy(max_attempts=1, backoff_base=0.0), breaker)
+    call, _ = flaky(1)
+    with pytest.raises(ConnectionError):
+        await caller.call(call)
+    
+    now[0] = 11
+    async def hang():
+        await asyncio.sleep(10)
+    trial = asyncio.ensure_future(caller.call(hang))
+    await asyncio.sleep(0)
+    trial.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await trial
+    
+    # The next call gets the trial slot instead of being refused forever
+    assert await caller.call(call) == "ok"
+    assert breaker.state == "closed"
+
+@pytest.mark.asyncio
+async def test_cancelled_ordinary_call_keeps_the_trial_slot():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+    caller = ResilientCaller("test-breaker-cancel-other", ResiliencePolicy(max_attempts=1, backoff_base=0.0), breaker)
+
+    async def hang():
+        await asyncio.sleep(10)
+    # Admitted while the circuit is closed, still in flight when it opens
+    straggler = asyncio.ensure_future(caller.call(hang))
+    await asyncio.sleep(0)
+    call, _ = flaky(1)
+    with pytest.raises(ConnectionError):
+        await caller.call(call)
+
+    now[0] = 11
+    trial = asyncio.ensure_future(caller.call(hang))
+    await asyncio.sleep(0)
+    straggler.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await straggler
+
+    # The real trial is still in flight, so a second one is refused
+    with pytest.raises(UpstreamUnavailableError):
+        await caller.call(call)
+    trial.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await trial
+
+@pytest.mark.asyncio
+async def test_hedges_slow_attempts():
+    caller = make_caller("test-hedge", hedge=True, hedge_min_samples=5)
+    for _ in range(5):
+        caller.latency.observe(0.01)
+    started = []
+    
+    async def call():
+        started.append(1)
+        # The first request hangs, the hedge answers quickly
+        await asyncio.sleep(1 if len(started) == 1 else 0)
+        return len(started)
+    
+    assert await asyncio.wait_for(caller.call(call), 0.5) == 2
+    assert metrics.counter("upstream_hedges_total").value(upstream="test-hedge") == 1
+    assert metrics.counter("upstream_hedge_wins_total").value(upstream="test-hedge") == 1
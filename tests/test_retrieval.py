@@ -0,0 +1,78 @@
+import pytest
+from services.embeddings import HashingEmbeddings, QuantizedEmbeddingStore
+from services.retrieval import BM25Index, tokenize, reciprocal_rank_fusion, HybridRetriever
+
+@pytest.fixture
+def resumes():
+    return {
+        "k8s": "Platform engineer, 6 years running Kubernetes clusters and Terraform on AWS",
+        "frontend": "Frontend developer building React and TypeScript applications",
+        "python": "Backend engineer with Python, FastAPI and Docker, some Kubernetes exposure",
+        "chef": "Pastry chef baking sourdough bread"
+    }
+
+def test_tokenize_keeps_technical_terms():
+    assert tokenize("C++, C# and Node.js; 5+ years of the experience.") == [
+        "c++", "c#", "node.js", "5+", "years", "experience"
+    ]
+
+def test_bm25_ranks_matching_documents(resumes):
+    index = BM25Index()
+    for doc_id, text in resumes.items():
+        index.add(doc_id, text)
+
+    results = index.search("Kubernetes platform engineer", top_k=3)
+
+    assert [doc_id for doc_id, _ in results][:2] == ["k8s", "python"]
+    assert all(score > 0 for _, score in results)
+    assert "chef" not in dict(results)
+
+def test_bm25_incremental_update(resumes, tmp_path):
+    index = BM25Index()
+    for doc_id, text in resumes.items():
+        index.add(doc_id, text)
+
+    index.add("chef", "Site reliability engineer running Kubernetes")
+    index.remove("k8s")
+
+    results = dict(index.search("kubernetes"))
+    assert "k8s" not in results
+    assert "chef" in results
+    assert len(index) == 3
+
+    path = str(tmp_path / "index.json")
+    index.save(path)
+    assert BM25Index.load(path).search("kubernetes") == index.search("kubernetes")
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "c", "d"]], k=60)
+    assert [doc_id for doc_id, _ in fused] == ["b", "c", "a", "d"]
+    with pytest.raises(ValueError):
+        reciprocal_rank_fusion([["a"]], weights=[1.0, 2.0])
+
+@pytest.mark.asyncio
+async def test_hybrid_shortlist(resumes, tmp_path, sample_job_description):
+    embeddings = HashingEmbeddings(dim=256)
+    retriever = HybridRetriever(BM25Index(), QuantizedEmbeddingStore(str(tmp_path), dim=256), embeddings)
+    for doc_id, text in resumes.items():
+        await retriever.add(doc_id, text)
+
+    shortlist = await retriever.shortlist(sample_job_description, top_k=2)
+
+    assert len(shortlist) == 2
+    assert "chef" not in dict(shortlist)
+
+async def test_hybrid_readd_replaces_both_rankings(resumes, tmp_path):
+    embeddings = HashingEmbeddings(dim=256)
+    store = QuantizedEmbeddingStore(str(tmp_path), dim=256)
+    retriever = HybridRetriever(BM25Index(), store, embeddings)
+    for doc_id, text in resumes.items():
+        await retriever.add(doc_id, text)
+
+    # The chef retrains; the updated resume must be found by meaning as well as by keyword
+    updated = "Site reliability engineer running Kubernetes, Terraform and AWS in production"
+    await retriever.add("chef", updated)
+
+    assert len(store) == len(resumes)
+    assert store.search(await embeddings.aembed_query(updated), top_k=1)[0][0] == "chef"
+    assert retriever.index.search("sourdough", top_k=5) == []
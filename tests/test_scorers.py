@@ -1,5 +1,9 @@
+import asyncio
 import pytest
 from services.scorers.chatgpt_scorer import ChatGPTScorer
+from services.scorers.profiler import ResumeProfiler, parse_profile, render_profile, clear_profile_cache
+from services.tokens import count_message_tokens, count_tokens
+from services.usage import track_usage
 from unittest.mock import AsyncMock, MagicMock
 
 @pytest.fixture
@@ -55,6 +59,25 @@ async def test_eval_score_method(scorer, sample_evaluation, sample_job_descripti
     assert "covers all key requirements" in rationale
     assert mock_llm.ainvoke.called
 
+@pytest.mark.asyncio
+async def test_score_enforces_input_budget(scorer, sample_resume_text, sample_job_description, mock_llm_response):
+    scorer_instance, mock_llm = scorer
+    mock_llm.ainvoke.return_value = mock_llm_response
+    scorer_instance.max_input_tokens = 800
+    long_resume = sample_resume_text + "\nPROJECTS\n" + "".join(f"A paper about medieval poetry, part {i}.\n" for i in range(200))
+    
+    with track_usage() as usage:
+        await scorer_instance.score(long_resume, sample_job_description, "technical skills")
+    
+    messages = mock_llm.ainvoke.call_args.args[0]
+    assert count_message_tokens(messages) <= 800
+    assert "Kubernetes" in messages[1].content
+    # The irrelevant section goes last and is cut to what is left of the budget
+    assert messages[1].content.index("Kubernetes") < messages[1].content.index("medieval poetry")
+    assert "part 199" not in messages[1].content
+    assert usage.summary()["calls"] == 1
+    assert usage.summary()["prompt_tokens"] == count_message_tokens(messages)
+
 def test_prompt_templates(scorer):
     scorer_instance, _ = scorer
     
@@ -64,4 +87,108 @@ def test_prompt_templates(scorer):
     
     # Test evaluation prompts
     assert "talent acquisition specialist" in scorer_instance.eval_system_template.lower()
-    assert "review if this evaluation" in scorer_instance.eval_human_template.lower() 
\ No newline at end of file
+    assert "review if this evaluation" in scorer_instance.eval_human_template.lower() 
+
+PROFILE_REPLY = """```json
+{"current_title": "Senior Software Engineer",
+ "roles": [
+   {"title": "Senior Software Engineer", "company": "Tech Corp", "start": "2020-01", "end": "present", "years": 5, "managed_people": true},
+   {"title": "Software Engineer", "company": "StartupCo", "start": "2018-01", "end": "2020-01", "years": 2, "managed_people": false}
+ ],
+ "skills": ["Python", "FastAPI", "python", "Docker", "Kubernetes"],
+ "education": []}
+```"""
+
+@pytest.fixture
+def profiler(tmp_path):
+    clear_profile_cache()
+    mock_llm = AsyncMock()
+    mock_llm.model_name = "gpt-3.5-turbo"
+    mock_llm.ainvoke.return_value = MagicMock(content=PROFILE_REPLY)
+    yield ResumeProfiler(llm=mock_llm, cache_dir=str(tmp_path)), mock_llm
+    clear_profile_cache()
+
+def test_parse_profile_normalises_reply():
+    profile = parse_profile(PROFILE_REPLY)
+    
+    assert profile["total_years"] == 7.0
+    assert profile["management_years"] == 5.0
+    assert profile["skills"] == ["Python", "FastAPI", "Docker", "Kubernetes"]
+    rendered = render_profile(profile)
+    assert "Total experience: 7.0 years (people management: 5.0 years)" in rendered
+    assert "- Senior Software Engineer, Tech Corp (2020-01 to present, 5.0 years, managed people)" in rendered
+    
+    with pytest.raises(ValueError):
+        parse_profile("I could not find any roles")
+
+@pytest.mark.asyncio
+async def test_profiler_caches_by_document(profiler, sample_resume_text):
+    resume_profiler, mock_llm = profiler
+    
+    first, second = await asyncio.gather(
+        resume_profiler.profile(sample_resume_text),
+        resume_profiler.profile(sample_resume_text)
+    )
+    assert first == second
+    assert mock_llm.ainvoke.call_count == 1
+    
+    # A fresh process only has the on-disk copy
+    clear_profile_cache()
+    assert await resume_profiler.profile(sample_resume_text) == first
+    assert mock_llm.ainvoke.call_count == 1
+    
+    await resume_profiler.profile(sample_resume_text + "\nCertified Kubernetes Administrator")
+    assert mock_llm.ainvoke.call_count == 2
+    
+    rendered = resume_profiler.render(first)
+    assert count_tokens(rendered) < count_tokens(sample_resume_text)
+
+
+@pytest.mark.asyncio
+async def test_profiler_waiters_survive_first_caller_cancelling(profiler, sample_resume_text):
+    resume_profiler, mock_llm = profiler
+    released = asyncio.Event()
+    
+    async def slow_reply(messages):
+        await released.wait()
+        return MagicMock(content=PROFILE_REPLY)
+    mock_llm.ainvoke.side_effect = slow_reply
+    
+    first = asyncio.ensure_future(resume_profiler.profile(sample_resume_text))
+    second = asyncio.ensure_future(resume_profiler.profile(sample_resume_text))
+    await asyncio.sleep(0.01)
+    first.cancel()
+    await asyncio.sleep(0)
+    released.set()
+    
+    profile = await second
+    assert profile["total_years"] == 7.0
+    assert first.cancelled()
+    assert mock_llm.ainvoke.call_count == 1
+
+@pytest.mark.asyncio
+async def test_profiler_shared_call_usage_is_reported_by_every_waiter(profiler, sample_resume_text):
+    resume_profiler, mock_llm = profiler
+    released = asyncio.Event()
+
+    async def slow_reply(messages):
+        await released.wait()
+        return MagicMock(content=PROFILE_REPLY, response_metadata={"token_usage": {"prompt_tokens": 900, "completion_tokens": 120}})
+    mock_llm.ainvoke.side_effect = slow_reply
+
+    async def request():
+        with track_usage() as usage:
+            await resume_profiler.profile(sample_resume_text)
+        return usage.summary()
+
+    first = asyncio.ensure_future(request())
+    await asyncio.sleep(0.01)
+    second = asyncio.ensure_future(request())
+    await asyncio.sleep(0.01)
+    released.set()
+
+    for summary in await asyncio.gather(first, second):
+        assert summary["calls"] == 1
+        assert summary["prompt_tokens"] == 900 and summary["completion_tokens"] == 120
+        assert summary["cost_usd"] > 0
+    assert mock_llm.ainvoke.call_count == 1
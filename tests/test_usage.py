@@ -0,0 +1,102 @@
+import pytest
+import json
+from services.context import current_node, current_request_id
+from services.metrics import MetricsRegistry, metrics, render_prometheus
+from services.tokens import count_tokens, count_message_tokens, fit_text_to_budget
+from services.tracing import SpanExporter, set_exporter, span
+from services.usage import estimate_cost, record_usage, track_usage
+from unittest.mock import MagicMock
+
+def test_count_tokens():
+    assert count_tokens("") == 0
+    assert 0 < count_tokens("Senior Software Engineer") < 10
+    messages = [MagicMock(content="Hello"), MagicMock(content="World")]
+    assert count_message_tokens(messages) > count_tokens("Hello") + count_tokens("World")
+
+def test_fit_text_to_budget_drops_least_relevant_sections(sample_resume_text, sample_job_description):
+    assert fit_text_to_budget(sample_resume_text, 10_000) == sample_resume_text
+    
+    fitted = fit_text_to_budget(sample_resume_text, 45, reference="Kubernetes Docker AWS Python FastAPI")
+    
+    assert count_tokens(fitted) <= 45
+    assert "SKILLS:" in fitted  # most relevant to the reference
+    assert "JOHN DOE" in fitted
+
+def test_estimate_cost():
+    assert estimate_cost("gpt-3.5-turbo-0125", 1000, 1000) == pytest.approx(0.002)
+    assert estimate_cost("gpt-4o-mini", 1000) == pytest.approx(0.00015)
+    assert estimate_cost("unknown-model", 1000, 1000) == 0.0
+
+def test_record_usage_per_request_and_node():
+    calls = metrics.counter("llm_calls_total").value(node="skills", model="gpt-3.5-turbo")
+    
+    with track_usage() as usage:
+        token = current_node.set("skills")
+        try:
+            record_usage("gpt-3.5-turbo", 1000, 100, 0.5)
+            record_usage("gpt-3.5-turbo", 500, 50, 0.25)
+        finally:
+            current_node.reset(token)
+        record_usage("text-embedding-ada-002", 200, 0, 0.1)
+    # Outside the block nothing is attributed to the request
+    record_usage("gpt-3.5-turbo", 1, 1, 0.1)
+    
+    summary = usage.summary()
+    assert summary["calls"] == 3
+    assert summary["prompt_tokens"] == 1700
+    assert summary["nodes"]["skills"]["completion_tokens"] == 150
+    assert summary["nodes"]["unknown"]["calls"] == 1
+    assert summary["cost_usd"] == pytest.approx(0.00075 + 0.000225 + 0.00002, abs=1e-6)
+    assert metrics.counter("llm_calls_total").value(node="skills", model="gpt-3.5-turbo") == calls + 2
+
+def test_metrics_registry():
+    registry = MetricsRegistry()
+    counter = registry.counter("requests_total")
+    counter.inc(node="parse")
+    counter.inc(2, node="parse")
+    assert registry.counter("requests_total").value(node="parse") == 3
+    
+    histogram = registry.histogram("latency_seconds", buckets=(0.1, 1.0))
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    (counts, total, count), = histogram.samples().values()
+    assert counts == [1, 2]
+    assert count == 2
+    with pytest.raises(ValueError):
+        registry.histogram("requests_total")
+
+def test_render_prometheus():
+    registry = MetricsRegistry()
+    registry.counter("requests_total", "Requests served").inc(3, node='pa"rse')
+    registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0)).observe(0.5, node="embed")
+    
+    text = render_prometheus(registry)
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{node="pa\\"rse"} 3' in text
+    assert "# TYPE latency_seconds histogram" in text
+    assert 'latency_seconds_bucket{node="embed",le="0.1"} 0' in text
+    assert 'latency_seconds_bucket{node="embed",le="1.0"} 1' in text
+    assert 'latency_seconds_bucket{node="embed",le="+Inf"} 1' in text
+    assert 'latency_seconds_sum{node="embed"} 0.5' in text
+    assert 'latency_seconds_count{node="embed"} 1' in text
+
+def test_span_records_metrics_and_exports(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    set_exporter(SpanExporter(str(path)))
+    errors = metrics.counter("workflow_spans_total").value(span="embed", outcome="error")
+    token = current_request_id.set("req-1")
+    try:
+        with span("parse", iteration=1):
+            pass
+        with pytest.raises(RuntimeError):
+            with span("embed", iteration=1):
+                raise RuntimeError("upstream down")
+    finally:
+        current_request_id.reset(token)
+        set_exporter(None)
+    
+    ok, failed = [json.loads(line) for line in path.read_text().splitlines()]
+    assert ok["name"] == "parse" and ok["outcome"] == "ok" and ok["iteration"] == 1
+    assert ok["request_id"] == "req-1" and ok["duration_seconds"] >= 0
+    assert failed["outcome"] == "error" and failed["error"] == "RuntimeError"
+    assert metrics.counter("workflow_spans_total").value(span="embed", outcome="error") == errors + 1
@@ -1,72 +1,99 @@
+import asyncio
+import json
 import pytest
 import sys
 import logging
 import os
 from io import StringIO
-from services.utils import WarningFilter, setup_workflow_logger
+from services.context import current_node, current_request_id
+from services.utils import (
+    WarningFilter, warning_filter, setup_workflow_logger, LRUCache,
+    NonBlockingQueueHandler, JsonFormatter, DebugSampler,
+    env_bool, env_int, env_float, env_str, content_hash
+)
 
 def test_warning_filter():
-    # Create a warning filter and a test output buffer
-    test_output = StringIO()
-    original_stderr = sys.stderr
+    output = StringIO()
+    handler = logging.StreamHandler(output)
+    noisy = logging.getLogger("pdfminer.pdfpage")
+    noisy.addHandler(handler)
     
     try:
-        # Replace stderr with our test buffer
-        sys.stderr = test_output
-        
-        # Create and use the warning filter
-        with WarningFilter():
-            # Write directly to sys.stderr (which is our test buffer)
-            print("CropBox missing warning", file=sys.stderr)
-            print("LangChainDeprecationWarning: some warning", file=sys.stderr)
-            print("Important error message", file=sys.stderr)
-            print("warn_deprecated: some warning", file=sys.stderr)
-            print("langchain_community.chat_models warning", file=sys.stderr)
-        
-        # Get the filtered output
-        filtered_output = test_output.getvalue()
-        
-        # The important error message should be in the output
-        assert "Important error message" in filtered_output
-        # The filtered warnings should not be in the output
-        assert "CropBox missing" not in filtered_output
-        assert "LangChainDeprecationWarning" not in filtered_output
-        assert "warn_deprecated" not in filtered_output
-        assert "langchain_community.chat_models" not in filtered_output
-    
+        noisy.warning("CropBox missing from /Page, defaulting to MediaBox")
+        noisy.warning("Important error message")
     finally:
-        # Restore original stderr
-        sys.stderr = original_stderr
+        noisy.removeHandler(handler)
+    
+    filtered_output = output.getvalue()
+    assert "Important error message" in filtered_output
+    assert "CropBox missing" not in filtered_output
+    
+    # Other noise is recognised wherever it is logged
+    warning_filter = WarningFilter()
+    for message in ("LangChainDeprecationWarning: some warning", "warn_deprecated: some warning",
+                    "langchain_community.chat_models warning"):
+        assert not warning_filter.filter(logging.makeLogRecord({"msg": message}))
+
+async def test_warning_filter_never_swaps_stderr():
+    stderr = sys.stderr
+    
+    async def request():
+        with warning_filter:
+            assert sys.stderr is stderr
+            await asyncio.sleep(0)
+    
+    await asyncio.gather(*(request() for _ in range(10)))
+    assert sys.stderr is stderr
+
+def _sinks(logger):
+    """Handlers the background listener writes to"""
+    assert len(logger.handlers) == 1
+    assert isinstance(logger.handlers[0], NonBlockingQueueHandler)
+    return logger.handlers[0].listener.handlers
 
 def test_setup_workflow_logger():
     # Test with default settings
     logger = setup_workflow_logger()
     assert logger.name == "resume_workflow"
-    assert logger.level == logging.DEBUG
-    assert len(logger.handlers) == 1
-    assert isinstance(logger.handlers[0], logging.StreamHandler)
-    assert logger.handlers[0].stream == sys.stdout
+    assert logger.level == logging.INFO
+    sinks = _sinks(logger)
+    assert len(sinks) == 1
+    assert isinstance(sinks[0], logging.StreamHandler)
+    assert sinks[0].stream == sys.stdout
     
     # Test with custom log level
-    logger = setup_workflow_logger(log_level="INFO")
-    assert logger.level == logging.INFO
+    logger = setup_workflow_logger(log_level="DEBUG")
+    assert logger.level == logging.DEBUG
     
     # Test with log file
     test_log_file = "test.log"
     try:
         logger = setup_workflow_logger(log_file=test_log_file)
-        assert len(logger.handlers) == 2
-        assert isinstance(logger.handlers[1], logging.FileHandler)
-        assert logger.handlers[1].baseFilename == os.path.abspath(test_log_file)
+        sinks = _sinks(logger)
+        assert len(sinks) == 2
+        assert isinstance(sinks[1], logging.FileHandler)
+        assert sinks[1].baseFilename == os.path.abspath(test_log_file)
     finally:
+        setup_workflow_logger()
         # Clean up test log file
         if os.path.exists(test_log_file):
             os.remove(test_log_file)
 
+def test_logger_reads_environment(monkeypatch):
+    monkeypatch.setenv("LOG_LEVEL", "WARNING")
+    monkeypatch.setenv("LOG_FORMAT", "json")
+    try:
+        logger = setup_workflow_logger()
+        assert logger.level == logging.WARNING
+        assert isinstance(_sinks(logger)[0].formatter, JsonFormatter)
+    finally:
+        monkeypatch.undo()
+        setup_workflow_logger()
+
 def test_logger_formatting():
     # Test console formatter
     logger = setup_workflow_logger()
-    console_handler = logger.handlers[0]
+    console_handler = _sinks(logger)[0]
     assert "%(asctime)s - %(levelname)s - %(message)s" in console_handler.formatter._fmt
     assert console_handler.formatter.datefmt == "%H:%M:%S"
     
@@ -74,12 +101,66 @@ def test_logger_formatting():
     test_log_file = "test.log"
     try:
         logger = setup_workflow_logger(log_file=test_log_file)
-        file_handler = logger.handlers[1]
+        file_handler = _sinks(logger)[1]
         assert "%(name)s" in file_handler.formatter._fmt
     finally:
+        setup_workflow_logger()
         if os.path.exists(test_log_file):
             os.remove(test_log_file)
 
+def test_json_logs_carry_request_id_and_node(tmp_path):
+    log_file = tmp_path / "workflow.log"
+    logger = setup_workflow_logger(log_level="DEBUG", log_file=str(log_file), log_format="json")
+    request_token = current_request_id.set("req-42")
+    node_token = current_node.set("embed")
+    try:
+        logger.info("Embedded %s chunks", 3)
+        try:
+            raise ValueError("bad vector")
+        except ValueError:
+            logger.exception("Embedding failed")
+    finally:
+        current_node.reset(node_token)
+        current_request_id.reset(request_token)
+        # Stops the listener, flushing queued records
+        setup_workflow_logger()
+    
+    first, second = [json.loads(line) for line in log_file.read_text().splitlines()]
+    assert first["message"] == "Embedded 3 chunks"
+    assert first["level"] == "INFO"
+    assert first["request_id"] == "req-42" and first["node"] == "embed"
+    assert "ValueError: bad vector" in second["exception"]
+
+def test_debug_sampler():
+    sampler = DebugSampler(rate=0.25)
+    record = logging.makeLogRecord({"levelno": logging.DEBUG, "pathname": "nodes.py", "lineno": 10})
+    assert sum(sampler.filter(record) for _ in range(100)) == 25
+    
+    # Other levels are never sampled
+    record = logging.makeLogRecord({"levelno": logging.INFO, "pathname": "nodes.py", "lineno": 11})
+    assert all(sampler.filter(record) for _ in range(10))
+    assert all(DebugSampler().filter(logging.makeLogRecord({"levelno": logging.DEBUG})) for _ in range(10))
+
 def test_logger_propagation():
     logger = setup_workflow_logger()
-    assert not logger.propagate  # Should not propagate to avoid duplicate logs 
\ No newline at end of file
+    assert not logger.propagate  # Should not propagate to avoid duplicate logs 
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "a" is now most recently used
+    cache.put("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert len(cache) == 2
+
+def test_env_helpers(monkeypatch):
+    monkeypatch.setenv("TEST_FLAG", "yes")
+    monkeypatch.setenv("TEST_INT", "7")
+    monkeypatch.setenv("TEST_EMPTY", "")
+    assert env_bool("TEST_FLAG") is True
+    assert env_int("TEST_INT", 1) == 7
+    assert env_str("TEST_EMPTY", "default") == "default"
+    assert env_float("TEST_MISSING", 0.5) == 0.5
+    assert content_hash("abc") == content_hash(b"abc")
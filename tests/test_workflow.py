@@ -1,6 +1,11 @@
+import numpy as np
 import pytest
-from services.workflow.graph import ResumeWorkflow
-from unittest.mock import AsyncMock, patch
+from services.jobs import JobRegistry, JobNotFoundError
+from services.workflow.checkpoint import CheckpointStore
+from services.workflow.graph import ResumeWorkflow, _upload_digest
+from fastapi import UploadFile
+from io import BytesIO
+from unittest.mock import AsyncMock, MagicMock, patch
 from copy import deepcopy
 
 @pytest.fixture
@@ -78,6 +83,8 @@ async def test_workflow_execution(mock_nodes, mock_resume_file, mock_job_file):
         assert result["technical_score"] == 85.0
         assert result["cultural_score"] == 75.0
         assert abs(result["embedding_score"] - 80.0) < 0.01  # 0.8 * 100
+        assert result["usage"]["calls"] == 0  # nodes are mocked, no upstream calls
+        assert len(result["request_id"]) == 32
 
 @pytest.mark.asyncio
 async def test_workflow_error_handling(mock_nodes, mock_resume_file, mock_job_file):
@@ -115,4 +122,167 @@ async def test_workflow_iteration_limit(mock_nodes, mock_resume_file, mock_job_f
         result = await workflow.run(mock_resume_file, mock_job_file)
         
         # Should stop at max_iterations even though feedback requests changes
-        assert result["iterations"] == 3  # Now we can assert exact value since state is preserved 
\ No newline at end of file
+        assert result["iterations"] == 3  # Now we can assert exact value since state is preserved 
+
+@pytest.mark.asyncio
+async def test_registered_job_skips_job_parsing_and_embedding(tmp_path, mock_nodes, sample_resume_text,
+                                                              sample_job_description, mock_resume_file, mock_job_file):
+    workflow = ResumeWorkflow(max_iterations=1, job_registry=JobRegistry(path=str(tmp_path)))
+    parser = AsyncMock()
+    parser.parse_file.return_value = sample_job_description
+    workflow.parser_node.parser = parser
+    workflow.embedding_node.chunked = False
+    embedder = MagicMock()
+    embedder.embeddings = AsyncMock()
+    embedder.embeddings.aembed_query.return_value = [0.6, 0.8]
+    workflow.embedding_node.embedder = embedder
+    
+    job = await workflow.register_job(mock_job_file)
+    assert "Required Experience: 5+ years" in job.requirements
+    assert "Kubernetes expertise" in job.nice_to_have
+    assert (await workflow.register_job(mock_job_file)).jd_id == job.jd_id
+    assert embedder.embeddings.aembed_query.call_count == 1
+    
+    parser.parse_file.reset_mock()
+    parser.parse_file.return_value = sample_resume_text
+    embedder.embeddings.aembed_query.reset_mock()
+    with patch('services.workflow.nodes.TechnicalSkillsNode.process', mock_nodes["technical"]), \
+         patch('services.workflow.nodes.CulturalFitNode.process', mock_nodes["cultural"]), \
+         patch('services.workflow.nodes.ScoreCombinerNode.process', mock_nodes["combiner"]), \
+         patch('services.workflow.nodes.FeedbackNode.process', mock_nodes["feedback"]):
+        result = await workflow.run(mock_resume_file, jd_id=job.jd_id)
+    
+    # Only the resume is parsed and embedded
+    parser.parse_file.assert_awaited_once_with(mock_resume_file)
+    embedder.embeddings.aembed_query.assert_awaited_once_with(sample_resume_text)
+    assert result["jd_id"] == job.jd_id
+    assert abs(result["embedding_score"] - 100.0) < 0.01
+    
+    with pytest.raises(JobNotFoundError):
+        await workflow.run(mock_resume_file, jd_id="0" * 16)
+
+
+@pytest.mark.asyncio
+async def test_retry_resumes_from_checkpoints(tmp_path, mock_resume_file, mock_job_file):
+    def updates(values):
+        return AsyncMock(return_value=values)
+    
+    parser = updates({"resume_file": None, "job_file": None, "resume_text": "parsed resume", "job_desc": "parsed job"})
+    embedder = updates({"resume_emb": np.array([0.6, 0.8], dtype=np.float32), "job_emb": np.array([0.6, 0.8], dtype=np.float32)})
+    technical = updates({"skill_score": 85.0, "skill_explain": "Good skills"})
+    feedback_calls = []
+    
+    async def flaky_feedback(state):
+        feedback_calls.append(state["iteration"])
+        if state["iteration"] == 2 and len(feedback_calls) == 2:
+            raise TimeoutError("upstream timeout")
+        return {"feedback_status": "Changes needed", "feedback_text": "More detail"}
+    
+    with patch('services.workflow.nodes.ResumeParserNode.process', parser), \
+         patch('services.workflow.nodes.TextEmbeddingNode.process', embedder), \
+         patch('services.workflow.nodes.TechnicalSkillsNode.process', technical), \
+         patch('services.workflow.nodes.CulturalFitNode.process', updates({"culture_score": 75.0, "culture_explain": "Good culture"})), \
+         patch('services.workflow.nodes.ScoreCombinerNode.process', updates({"final_score": 80.0, "final_explanation": "Overall good"})), \
+         patch('services.workflow.nodes.FeedbackNode.process', AsyncMock(side_effect=flaky_feedback)):
+        workflow = ResumeWorkflow(max_iterations=2, checkpoints=CheckpointStore(str(tmp_path / "checkpoints.db")))
+        with pytest.raises(TimeoutError):
+            await workflow.run(mock_resume_file, mock_job_file)
+        assert parser.call_count == 1 and technical.call_count == 2
+        
+        result = await workflow.run(mock_resume_file, mock_job_file)
+    
+    # Only the failed step ran again
+    assert parser.call_count == 1
+    assert embedder.call_count == 1
+    assert technical.call_count == 2
+    assert feedback_calls == [1, 2, 2]
+    assert result["iterations"] == 2
+    assert abs(result["embedding_score"] - 100.0) < 0.01
+
+@pytest.mark.asyncio
+async def test_upload_digest_stops_at_the_byte_limit():
+    class CountingFile(BytesIO):
+        bytes_read = 0
+
+        def read(self, size=-1):
+            data = super().read(size)
+            self.bytes_read += len(data)
+            return data
+
+    upload = UploadFile(filename="resume.txt", file=CountingFile(b"x" * 10_000))
+    assert await _upload_digest(upload, max_bytes=1_000, chunk_size=256) is None
+    # Reading stops one chunk past the limit, and the upload is rewound for the parser
+    assert upload.file.bytes_read <= 1_024
+    assert upload.file.tell() == 0
+    assert len(await _upload_digest(upload, max_bytes=10_000)) == 64
+
+def test_checkpoint_store_expires_entries(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.db"), ttl=60)
+    vectors = np.arange(6, dtype=np.float32).reshape(2, 3)
+    store.put("run:embed:1", {"resume_chunk_embs": vectors, "resume_file": None})
+    
+    restored = store.get("run:embed:1")
+    assert restored["resume_file"] is None
+    assert restored["resume_chunk_embs"].dtype == np.float32
+    assert np.array_equal(restored["resume_chunk_embs"], vectors)
+    
+    store.ttl = -1
+    assert store.get("run:embed:1") is None
+    assert store.purge() == 1
+
+@pytest.mark.asyncio
+async def test_workflow_profiles(mock_nodes, mock_resume_file, mock_job_file):
+    feedback = AsyncMock(return_value={"feedback_status": "Changes needed", "feedback_text": "More detail"})
+    with patch('services.workflow.nodes.ResumeParserNode.process', mock_nodes["parser"]), \
+         patch('services.workflow.nodes.TextEmbeddingNode.process', mock_nodes["embedder"]), \
+         patch('services.workflow.nodes.SimilarityScoreNode.process', mock_nodes["similarity"]), \
+         patch('services.workflow.nodes.TechnicalSkillsNode.process', mock_nodes["technical"]), \
+         patch('services.workflow.nodes.CulturalFitNode.process', mock_nodes["cultural"]), \
+         patch('services.workflow.nodes.FeedbackNode.process', feedback):
+        workflow = ResumeWorkflow(max_iterations=3)
+        
+        fast = await workflow.run(mock_resume_file, mock_job_file, profile="fast")
+        assert fast["profile"] == "fast"
+        assert fast["technical_score"] is None
+        assert abs(fast["final_score"] - 80.0) < 0.01
+        assert not mock_nodes["technical"].called
+        
+        standard = await workflow.run(mock_resume_file, mock_job_file, profile="standard")
+        assert standard["profile"] == "standard"
+        assert standard["technical_score"] == 85.0
+        assert standard["iterations"] == 1
+        assert not feedback.called
+        
+        thorough = await workflow.run(mock_resume_file, mock_job_file)
+        assert thorough["profile"] == "thorough"
+        assert thorough["iterations"] == 3
+        assert feedback.call_count == 3
+        
+        # Each profile's graph is compiled once
+        assert workflow.get_graph(workflow.profile) is workflow.graph
+        assert len(workflow._graphs) == 3
+        
+        with pytest.raises(ValueError):
+            await workflow.run(mock_resume_file, mock_job_file, profile="exhaustive")
+
+
+@pytest.mark.asyncio
+async def test_warm_up_compiles_graphs_and_loads_parsers():
+    workflow = ResumeWorkflow()
+    scorer_warm_up = AsyncMock()
+    with patch.object(workflow.technical_node.scorer, "warm_up", scorer_warm_up):
+        timings = await workflow.warm_up()
+    
+    assert set(timings) == {"graphs", "parsers", "tokenizer"}
+    assert set(workflow._graphs) == {"fast", "standard", "thorough"}
+    # Upstream connections are only opened on request
+    scorer_warm_up.assert_not_called()
+    
+    failing = AsyncMock(side_effect=ConnectionError("no route"))
+    with patch.object(workflow.embedding_node.embedder, "warm_up", failing), \
+         patch.object(workflow.technical_node.scorer, "warm_up", scorer_warm_up):
+        timings = await workflow.warm_up(connect=True)
+    # A failed step is skipped, the others still run
+    assert "embeddings" not in timings
+    assert "llm" in timings
+    scorer_warm_up.assert_awaited_once()